@@ -1,11 +1,49 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import trips
+from app.middleware import TimingMiddleware
+from app.responses import ModelJSONResponse
+from app.routes import trips, jobs, stats, metrics
+from app.services.job_queue import job_queue
+from app.services.metrics import event_loop_monitor
+from app.services.openai_service import openai_service
+from app.services.trip_store import trip_store
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await trip_store.initialize()
+    event_loop_monitor.start()
+    simulator = None
+    if openai_service.provider == "simulated" and not os.getenv("SIMULATED_BASE_URL"):
+        # AI_PROVIDER=simulated sem servidor externo: arrancar o simulador no mesmo processo
+        from app.services.provider_simulator import create_app_from_env, start_server
+        simulator = await start_server(create_app_from_env(), int(os.getenv("SIMULATOR_PORT", "8900")))
+    # SDKs dos providers, ligações e catálogo aquecidos em background: o servidor
+    # começa logo a responder (arranques a frio no Render/Railway)
+    warm_up = None
+    if os.getenv("WARM_UP", "true").lower() == "true":
+        warm_up = asyncio.create_task(openai_service.warm_up())
+    yield
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    await event_loop_monitor.stop()
+    if simulator is not None:
+        from app.services.provider_simulator import stop_servers
+        await stop_servers(simulator)
+    # Parar os workers de jobs assíncronos antes de fechar o que eles usam
+    await job_queue.close()
+    # Fechar o pool de ligações ao provider de IA e o armazenamento
+    await openai_service.aclose()
+    await trip_store.close()
 
 app = FastAPI(
     title="MyTrip API",
     description="API para geração de roteiros de viagem com IA",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ModelJSONResponse
 )
 
 # Configurar CORS
@@ -22,8 +60,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing em todas as respostas e profiling com ?profile=1 (ADMIN_KEY)
+app.add_middleware(TimingMiddleware)
+
 # Rotas
 app.include_router(trips.router, prefix="/api/v1", tags=["trips"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+app.include_router(stats.router, prefix="/api/v1", tags=["stats"])
+app.include_router(metrics.router, tags=["metrics"])
 
 @app.get("/")
 async def root():
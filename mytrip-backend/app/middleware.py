@@ -0,0 +1,87 @@
+import hmac
+import json
+import os
+from typing import List
+from urllib.parse import parse_qs
+from dotenv import load_dotenv
+from app.services.profiler import StackSampler
+from app.services.timing import start_timer
+
+load_dotenv()
+
+class TimingMiddleware:
+    """Middleware ASGI que mede as fases de cada pedido.
+
+    Junta o header `Server-Timing` (prompt, fila, provider, parse, validação,
+    gravação, serialização e total) a todas as respostas. Com `?profile=1` e o
+    header `X-Admin-Key` igual a ADMIN_KEY, corre o pedido com o profiler por
+    amostragem e devolve as stacks (formato folded) em vez da resposta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.admin_key = os.getenv("ADMIN_KEY", "")
+        self.profile_interval = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = start_timer()
+        if b"profile=" in scope.get("query_string", b""):
+            query = parse_qs(scope["query_string"].decode("latin-1"))
+            if query.get("profile") == ["1"]:
+                await self._profile(scope, receive, send, timer)
+                return
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing().encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        await self.app(scope, receive, send_with_timing)
+
+    def _authorized(self, scope) -> bool:
+        if not self.admin_key:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == b"x-admin-key":
+                return hmac.compare_digest(value, self.admin_key.encode())
+        return False
+
+    async def _profile(self, scope, receive, send, timer):
+        if not self._authorized(scope):
+            await _send_body(send, 403, b"application/json", json.dumps({"detail": "Profiling requer X-Admin-Key"}).encode())
+            return
+        status = 500
+        messages: List[dict] = []
+        
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            messages.append(message)
+        
+        sampler = StackSampler(self.profile_interval)
+        sampler.start()
+        try:
+            # A resposta (incluindo streaming) é consumida toda dentro da janela do profiler
+            await self.app(scope, receive, capture)
+        finally:
+            folded = sampler.stop()
+        await _send_body(send, 200, b"text/plain; charset=utf-8", folded.encode(), [
+            (b"server-timing", timer.server_timing().encode()),
+            (b"x-profiled-status", str(status).encode()),
+            (b"x-profile-samples", str(sampler.samples).encode()),
+        ])
+
+async def _send_body(send, status: int, content_type: bytes, body: bytes, headers: List[tuple] = ()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -41,6 +41,13 @@ class DayItinerary(BaseModel):
     accommodation_suggestion: Optional[str] = None
     daily_budget: Optional[str] = None  # Ex: "€60-90"
 
+class ItineraryData(BaseModel):
+    """Roteiro gerado pela IA (antes de ser guardado como TripResponse)"""
+    itinerary: List[DayItinerary] = []
+    general_tips: Optional[List[str]] = None
+    estimated_cost: Optional[str] = None
+    best_season: Optional[str] = None
+
 class TripResponse(BaseModel):
     """Modelo para resposta de roteiro gerado"""
     id: Optional[str] = None
@@ -51,6 +58,20 @@ class TripResponse(BaseModel):
     estimated_cost: Optional[str] = None
     best_season: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Parâmetros do pedido (para estender ou regenerar dias com o mesmo orçamento e interesses)
+    budget: Optional[str] = None
+    budget_min: Optional[int] = None
+    budget_max: Optional[int] = None
+    interests: List[str] = []
+    updated_at: Optional[datetime] = None
+
+class TripExtendRequest(BaseModel):
+    """Dias a acrescentar ao fim de um roteiro guardado (POST /trips/{id}/extend)"""
+    days: int = Field(..., ge=1, le=29, description="Número de dias a acrescentar (o roteiro fica com no máximo 30)")
+
+class DayRegenerateRequest(BaseModel):
+    """Opções para regenerar um dia (POST /trips/{id}/days/{n}/regenerate)"""
+    focus: Optional[str] = Field(None, max_length=200, description="O que o novo dia deve privilegiar (ex: natureza, museus)")
 
 class TripSummary(BaseModel):
     """Modelo resumido de roteiro para listagem"""
@@ -58,3 +79,40 @@ class TripSummary(BaseModel):
     region: str
     duration_days: int
     created_at: datetime
+
+class TripListResponse(BaseModel):
+    """Página de roteiros resumidos"""
+    trips: List[TripSummary]
+    next_cursor: Optional[str] = None  # Passar como `cursor` para obter a página seguinte
+
+class JobStatus(BaseModel):
+    """Estado de uma geração assíncrona (POST /trips?async=true)"""
+    id: str
+    status: str  # queued, running, done, failed
+    duration_days: int
+    days_ready: int = 0  # Dias já gerados
+    queue_position: Optional[int] = None  # Só enquanto está na fila
+    trip_id: Optional[str] = None
+    trip: Optional[TripResponse] = None  # Roteiro completo quando status=done
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class TripBatchRequest(BaseModel):
+    """Vários pedidos de roteiro de uma vez (POST /trips/batch)"""
+    trips: List[TripRequest] = Field(..., min_length=1, description="Pedidos de roteiro (os repetidos são gerados uma só vez)")
+
+class TripBatchItem(BaseModel):
+    """Resultado de um pedido do lote, na posição `index` do pedido original"""
+    index: int
+    status: str  # ok, error
+    trip: Optional[TripResponse] = None
+    error: Optional[str] = None
+    duplicate_of: Optional[int] = None  # Índice do pedido igual cujo roteiro foi reutilizado
+
+class TripBatchResponse(BaseModel):
+    """Resultados do lote, pela ordem dos pedidos"""
+    results: List[TripBatchItem]
+    succeeded: int
+    failed: int
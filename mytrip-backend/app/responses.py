@@ -0,0 +1,45 @@
+from typing import Any
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+from app.services.body_cache import EncodedBody, accepted_encoding, etag_matches, variant_etag
+from app.services.timing import phase
+
+# Os roteiros podem mudar (estender, regenerar um dia): guardar, mas revalidar sempre com a ETag
+CACHE_CONTROL = "public, no-cache"
+
+class ModelJSONResponse(JSONResponse):
+    """JSONResponse serializada pelo pydantic-core (Rust).
+
+    Aceita modelos pydantic diretamente, sem passar por `jsonable_encoder`.
+    Devolvida diretamente pelos endpoints, evita também a revalidação do
+    `response_model` (que fica só para a documentação).
+    """
+
+    def render(self, content: Any) -> bytes:
+        with phase("serialize"):
+            return to_json(content)
+
+class EncodedJSONResponse(Response):
+    """Resposta com um corpo pré-serializado (BodyCache).
+
+    Envia a variante brotli ou gzip que o cliente aceitar (`Vary:
+    Accept-Encoding`), com uma ETag forte por variante e Cache-Control; num
+    GET com `If-None-Match` igual à ETag dessa variante responde 304 sem corpo.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, body: EncodedBody, request: Request, status_code: int = 200):
+        encoding = accepted_encoding(request.headers.get("accept-encoding"), body)
+        etag = variant_etag(body.etag, encoding)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if request.method in ("GET", "HEAD") and etag_matches(request.headers.get("if-none-match"), etag):
+            super().__init__(status_code=304, headers=headers)
+            return
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            content = body.br if encoding == "br" else body.gzip
+        else:
+            content = body.json
+        super().__init__(content, status_code=status_code, headers=headers)
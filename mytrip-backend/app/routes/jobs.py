@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from app.models.trip import JobStatus
+from app.responses import ModelJSONResponse
+from app.services.job_queue import DONE, Job, job_queue
+
+router = APIRouter()
+
+def job_status(job: Job) -> JobStatus:
+    trip = job.result if job.status == DONE else None
+    return JobStatus(
+        id=job.id,
+        status=job.status,
+        duration_days=job.total,
+        days_ready=job.done,
+        queue_position=job_queue.position(job),
+        trip_id=trip.id if trip is not None else None,
+        trip=trip,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Estado, progresso e resultado de uma geração assíncrona
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    headers = None
+    if not job.finished:
+        # Sugestão de intervalo de polling
+        headers = {"Retry-After": "2"}
+    return ModelJSONResponse(job_status(job), headers=headers)
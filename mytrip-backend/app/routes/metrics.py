@@ -0,0 +1,77 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.body_cache import trip_bodies
+from app.services.job_queue import job_queue
+from app.services.metrics import registry
+from app.services.openai_service import openai_service
+
+router = APIRouter()
+
+# Métricas lidas dos serviços no momento do scrape
+registry.counter(
+    "mytrip_itinerary_cache_requests_total",
+    "Pedidos à cache de roteiros por resultado (hit, miss, coalesced)",
+    ["result"],
+    collect=lambda: {
+        ("hit",): openai_service.cache.hits,
+        ("miss",): openai_service.cache.misses,
+        ("coalesced",): openai_service.cache.coalesced,
+    }
+)
+registry.counter(
+    "mytrip_day_cache_days_total",
+    "Dias pedidos em gerações novas, por origem (cache de dias ou provider)",
+    ["result"],
+    collect=lambda: {
+        ("hit",): openai_service.day_cache.days_from_cache,
+        ("miss",): openai_service.day_cache.days_requested - openai_service.day_cache.days_from_cache,
+    }
+)
+registry.counter(
+    "mytrip_day_cache_composed_trips_total",
+    "Roteiros compostos a partir da cache de dias (full: sem chamar o provider)",
+    ["result"],
+    collect=lambda: {
+        ("full",): openai_service.day_cache.full_hits,
+        ("partial",): openai_service.day_cache.partial_hits,
+    }
+)
+registry.counter(
+    "mytrip_day_cache_saved_seconds_total",
+    "Tempo de geração estimado que os dias reutilizados pouparam",
+    collect=lambda: {(): openai_service.day_cache.seconds_saved}
+)
+registry.counter(
+    "mytrip_trip_body_cache_requests_total",
+    "Leituras de roteiros por resultado (hit: corpo pré-serializado, miss, not_modified: 304)",
+    ["result"],
+    collect=lambda: {
+        ("hit",): trip_bodies.hits,
+        ("miss",): trip_bodies.misses,
+        ("not_modified",): trip_bodies.not_modified,
+    }
+)
+registry.gauge(
+    "mytrip_generations_pending",
+    "Chamadas ao provider em curso ou à espera de vez",
+    collect=lambda: {(): openai_service.pending}
+)
+registry.gauge(
+    "mytrip_rate_limit_queued",
+    "Chamadas à espera de quota de RPM/TPM, por provider",
+    ["provider"],
+    collect=lambda: {(backend.name,): backend.limiter.queued for backend in openai_service.backends}
+)
+registry.gauge(
+    "mytrip_jobs",
+    "Jobs assíncronos por estado (queued, running)",
+    ["state"],
+    collect=lambda: {("queued",): job_queue.queued, ("running",): job_queue.running}
+)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métricas no formato de texto do Prometheus
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
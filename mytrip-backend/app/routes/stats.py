@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+from app.services.body_cache import trip_bodies
+from app.services.job_queue import job_queue
+from app.services.openai_service import openai_service
+from app.services.trip_store import trip_store
+
+router = APIRouter()
+
+@router.get("/stats/cache")
+async def cache_stats():
+    """
+    Estatísticas da cache de roteiros (hits, misses, pedidos coalescidos)
+    """
+    return openai_service.cache.stats()
+
+@router.get("/stats/day-cache")
+async def day_cache_stats():
+    """
+    Cache de dias: roteiros compostos, dias reutilizados e tempo de geração poupado
+    """
+    return openai_service.day_cache.stats()
+
+@router.get("/stats/prompts")
+async def prompt_stats():
+    """
+    Tokens de entrada dos prompts enviados ao provider (estimados e reportados)
+    """
+    return openai_service.prompt_stats.stats()
+
+@router.get("/stats/completions")
+async def completion_stats():
+    """
+    Tokens de saída por provider/escalão/dias: max_tokens aprendido, truncagem e reserva desperdiçada
+    """
+    return openai_service.token_budget.stats()
+
+@router.get("/stats/providers")
+async def provider_stats():
+    """
+    Estado dos providers de IA: circuito, latência, taxa de erro e hedging
+    """
+    if openai_service._router is None:
+        # Providers ainda não criados (arranque): não importar os SDKs só para isto
+        return {"providers": {}}
+    return openai_service.router.stats()
+
+@router.get("/stats/jobs")
+async def job_stats():
+    """
+    Fila de gerações assíncronas: workers, jobs em fila/em curso, concluídos e rejeitados
+    """
+    return job_queue.stats()
+
+@router.get("/stats/trips")
+async def trip_store_stats():
+    """
+    Roteiros guardados: número, memória ocupada pelos blobs comprimidos e descartes
+    """
+    return await trip_store.stats()
+
+@router.get("/stats/trip-bodies")
+async def trip_body_stats():
+    """
+    Corpos pré-serializados de GET /trips/{id}: hits, misses, respostas 304 e memória
+    """
+    return trip_bodies.stats()
@@ -1,19 +1,207 @@
-from fastapi import APIRouter, HTTPException
-from app.models.trip import TripRequest, TripResponse
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic_core import to_json
+from app.models.trip import (
+    TripRequest, TripResponse, ItineraryData, TripListResponse,
+    TripBatchRequest, TripBatchItem, TripBatchResponse,
+    TripExtendRequest, DayRegenerateRequest
+)
+from app.responses import EncodedJSONResponse, ModelJSONResponse
+from app.routes.jobs import job_status
+from app.services.body_cache import EncodedBody, trip_bodies
+from app.services.job_queue import Job, JobQueueFull, job_queue
+from app.services.metrics import trip_generation_seconds
+from app.services.normalization import normalize_request
+from app.services.timing import current_timer, phase, start_timer
 from app.services.openai_service import openai_service
+from app.services.trip_store import trip_store
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import asyncio
+import json
+import os
+import time
+
+load_dotenv()
 
 router = APIRouter()
 
-# Armazenamento temporário em memória (depois vamos usar MongoDB)
-trips_db: List[TripResponse] = []
+# Pedidos por lote e gerações simultâneas de cada lote
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Duração máxima de um roteiro (igual ao limite de TripRequest.duration_days)
+MAX_TRIP_DAYS = 30
+
+# Edições em curso por roteiro: (lock, nº de pedidos a usá-lo)
+_edit_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+# Roteiros descartados pelo armazenamento (limite de roteiros/memória, TTL) deixam de ser servidos da cache
+trip_store.on_remove(trip_bodies.invalidate)
+
+async def _save_trip(trip_request: TripRequest, itinerary_data: ItineraryData) -> TripResponse:
+    """Cria o TripResponse a partir do roteiro gerado e guarda-o"""
+    query = normalize_request(
+        trip_request.region,
+        trip_request.duration_days,
+        trip_request.budget,
+        trip_request.interests,
+        trip_request.budget_min,
+        trip_request.budget_max,
+        trip_request.country
+    )
+    trip_response = TripResponse(
+        # Nome canónico do destino ("Lisbon" é guardado como "Lisboa"), com o país
+        # explícito se for outro, para estender/regenerar no mesmo destino
+        region=query.destination.label,
+        duration_days=trip_request.duration_days,
+        itinerary=itinerary_data.itinerary,
+        general_tips=itinerary_data.general_tips or [],
+        estimated_cost=itinerary_data.estimated_cost,
+        best_season=itinerary_data.best_season,
+        created_at=datetime.utcnow(),
+        budget=trip_request.budget,
+        budget_min=trip_request.budget_min,
+        budget_max=trip_request.budget_max,
+        interests=list(query.interests)
+    )
+    
+    with phase("store"):
+        trip = await trip_store.insert(trip_response)
+    _cache_body(trip)
+    return trip
+
+def _cache_body(trip: TripResponse) -> EncodedBody:
+    """Serializa e comprime o roteiro uma vez (JSON, gzip, brotli), substituindo
+    o corpo anterior: os GET seguintes devolvem estes bytes ou 304"""
+    with phase("serialize"):
+        return trip_bodies.put(trip.id, to_json(trip))
+
+def _trip_response(trip: TripResponse, request: Request, status_code: int = 200) -> Response:
+    body = trip_bodies.peek(trip.id) or _cache_body(trip)
+    return EncodedJSONResponse(body, request, status_code=status_code)
+
+@asynccontextmanager
+async def _editing(trip_id: str) -> AsyncIterator[TripResponse]:
+    """Roteiro guardado a editar (404 se não existir), uma edição de cada vez por
+    roteiro para que estender e regenerar em simultâneo não percam alterações"""
+    lock, users = _edit_locks.get(trip_id, (None, 0))
+    lock = lock or asyncio.Lock()
+    _edit_locks[trip_id] = (lock, users + 1)
+    try:
+        async with lock:
+            trip = await trip_store.get(trip_id)
+            if trip is None:
+                raise HTTPException(status_code=404, detail="Roteiro não encontrado")
+            yield trip
+    finally:
+        lock, users = _edit_locks[trip_id]
+        if users == 1:
+            del _edit_locks[trip_id]
+        else:
+            _edit_locks[trip_id] = (lock, users - 1)
+
+async def _generate_days(trip: TripResponse, day_range: Tuple[int, int], duration_days: int, focus: Optional[str] = None) -> ItineraryData:
+    """Gera os dias `day_range` do roteiro guardado (502 se o provider não os devolver todos)"""
+    try:
+        generated = await openai_service.generate_days(
+            trip.itinerary,
+            day_range,
+            region=trip.region,
+            duration_days=duration_days,
+            budget=trip.budget or "medio",
+            interests=trip.interests,
+            budget_min=trip.budget_min,
+            budget_max=trip.budget_max,
+            focus=focus
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao gerar roteiro: {str(e)}"
+        )
+    if len(generated.itinerary) != day_range[1] - day_range[0] + 1:
+        raise HTTPException(status_code=502, detail="O provider não devolveu todos os dias pedidos")
+    return generated
+
+def _check_capacity(trip_request: TripRequest):
+    """429 + Retry-After quando a fila de gerações no provider está cheia"""
+    retry_after = openai_service.overload_retry_after(
+        region=trip_request.region,
+        duration_days=trip_request.duration_days,
+        budget=trip_request.budget or "medio",
+        interests=trip_request.interests or [],
+        budget_min=trip_request.budget_min,
+        budget_max=trip_request.budget_max,
+        country=trip_request.country
+    )
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados roteiros em geração. Tente novamente mais tarde.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+async def _run_trip_job(job: Job, trip_request: TripRequest) -> TripResponse:
+    """Gera e guarda o roteiro de um job, atualizando os dias prontos"""
+    # As fases do job não pertencem ao pedido HTTP que criou o worker
+    start_timer()
+    start = time.perf_counter()
+    async for kind, payload in openai_service.stream_itinerary(
+        region=trip_request.region,
+        duration_days=trip_request.duration_days,
+        budget=trip_request.budget or "medio",
+        interests=trip_request.interests or [],
+        budget_min=trip_request.budget_min,
+        budget_max=trip_request.budget_max,
+        country=trip_request.country
+    ):
+        if kind == "day":
+            job.advance()
+        else:
+            trip = await _save_trip(trip_request, payload)
+            trip_generation_seconds.observe(time.perf_counter() - start, mode="async")
+            return trip
+    raise RuntimeError("Geração terminou sem roteiro")
+
+def _submit_job(trip_request: TripRequest) -> ModelJSONResponse:
+    """Enfileira a geração e responde 202 com o job (429 se a fila estiver cheia)"""
+    try:
+        job = job_queue.submit(lambda job: _run_trip_job(job, trip_request), total=trip_request.duration_days)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados roteiros em fila. Tente novamente mais tarde.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return ModelJSONResponse(
+        job_status(job),
+        status_code=202,
+        headers={"Location": f"/api/v1/jobs/{job.id}"}
+    )
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
 
 @router.post("/trips", response_model=TripResponse, status_code=201)
-async def create_trip(trip_request: TripRequest):
+async def create_trip(
+    trip_request: TripRequest,
+    request: Request,
+    async_mode: bool = Query(False, alias="async", description="Responde 202 com um job em vez de esperar pelo roteiro"),
+    debug: bool = Query(False, description="Inclui o tempo de cada fase (ms) no campo `debug`")
+):
     """
-    Gera um novo roteiro de viagem usando IA
+    Gera um novo roteiro de viagem usando IA.
+
+    Com `?async=true` a geração fica numa fila de workers e a resposta é
+    imediata (202 + job); o estado e o roteiro obtêm-se em `GET /jobs/{id}`.
+    O tempo de cada fase segue no header `Server-Timing`.
     """
+    if async_mode:
+        return _submit_job(trip_request)
+    _check_capacity(trip_request)
+    start = time.perf_counter()
     try:
         # Gerar roteiro com OpenAI
         itinerary_data = await openai_service.generate_itinerary(
@@ -22,25 +210,16 @@ async def create_trip(trip_request: TripRequest):
             budget=trip_request.budget or "medio",
             interests=trip_request.interests or [],
             budget_min=trip_request.budget_min,
-            budget_max=trip_request.budget_max
-        )
-        
-        # Criar resposta
-        trip_response = TripResponse(
-            id=f"trip_{len(trips_db) + 1}",
-            region=trip_request.region,
-            duration_days=trip_request.duration_days,
-            itinerary=itinerary_data.get("itinerary", []),
-            general_tips=itinerary_data.get("general_tips", []),
-            estimated_cost=itinerary_data.get("estimated_cost"),
-            best_season=itinerary_data.get("best_season"),
-            created_at=datetime.utcnow()
+            budget_max=trip_request.budget_max,
+            country=trip_request.country
         )
         
-        # Salvar em memória
-        trips_db.append(trip_response)
-        
-        return trip_response
+        trip = await _save_trip(trip_request, itinerary_data)
+        trip_generation_seconds.observe(time.perf_counter() - start, mode="sync")
+        timer = current_timer()
+        if debug and timer is not None:
+            return ModelJSONResponse({**trip.model_dump(), "debug": {"timings_ms": timer.snapshot()}}, status_code=201)
+        return _trip_response(trip, request, status_code=201)
         
     except Exception as e:
         raise HTTPException(
@@ -48,34 +227,237 @@ async def create_trip(trip_request: TripRequest):
             detail=f"Erro ao gerar roteiro: {str(e)}"
         )
 
-@router.get("/trips")
-async def list_trips():
+@router.post("/trips/stream")
+async def create_trip_stream(trip_request: TripRequest):
     """
-    Lista todos os roteiros criados
+    Gera um roteiro em streaming (Server-Sent Events).
+
+    Eventos: `day` (cada DayItinerary assim que fica completo), `summary`
+    (dicas, custo estimado, melhor época), `done` (id do roteiro guardado)
+    e `error`.
     """
-    return {"trips": trips_db}
+    _check_capacity(trip_request)
+    
+    async def events():
+        start = time.perf_counter()
+        try:
+            async for kind, payload in openai_service.stream_itinerary(
+                region=trip_request.region,
+                duration_days=trip_request.duration_days,
+                budget=trip_request.budget or "medio",
+                interests=trip_request.interests or [],
+                budget_min=trip_request.budget_min,
+                budget_max=trip_request.budget_max,
+                country=trip_request.country
+            ):
+                if kind == "day":
+                    yield _sse("day", payload.model_dump_json())
+                else:
+                    yield _sse("summary", payload.model_dump_json(include={"general_tips", "estimated_cost", "best_season"}))
+                    trip = await _save_trip(trip_request, payload)
+                    trip_generation_seconds.observe(time.perf_counter() - start, mode="stream")
+                    yield _sse("done", json.dumps({"id": trip.id}))
+        except Exception as e:
+            yield _sse("error", json.dumps({"detail": f"Erro ao gerar roteiro: {str(e)}"}, ensure_ascii=False))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@router.get("/trips/{trip_id}", response_model=TripResponse)
-async def get_trip(trip_id: str):
+async def _generate_batch(trips: List[TripRequest]) -> AsyncIterator[TripBatchItem]:
+    """Gera os pedidos únicos do lote (no máximo BATCH_CONCURRENCY de cada vez),
+    emitindo cada resultado (e os dos pedidos repetidos) assim que fica pronto"""
+    first_index: Dict[tuple, int] = {}
+    duplicates: Dict[int, List[int]] = {}
+    for index, trip_request in enumerate(trips):
+        key = openai_service.request_key(
+            trip_request.region,
+            trip_request.duration_days,
+            trip_request.budget or "medio",
+            trip_request.interests or [],
+            trip_request.budget_min,
+            trip_request.budget_max,
+            trip_request.country
+        )
+        if key in first_index:
+            duplicates[first_index[key]].append(index)
+        else:
+            first_index[key] = index
+            duplicates[index] = []
+    
+    semaphore = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+    
+    async def generate(index: int) -> TripBatchItem:
+        trip_request = trips[index]
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                itinerary_data = await openai_service.generate_itinerary(
+                    region=trip_request.region,
+                    duration_days=trip_request.duration_days,
+                    budget=trip_request.budget or "medio",
+                    interests=trip_request.interests or [],
+                    budget_min=trip_request.budget_min,
+                    budget_max=trip_request.budget_max,
+                    country=trip_request.country
+                )
+                trip = await _save_trip(trip_request, itinerary_data)
+                trip_generation_seconds.observe(time.perf_counter() - start, mode="batch")
+                return TripBatchItem(index=index, status="ok", trip=trip)
+            except Exception as e:
+                return TripBatchItem(index=index, status="error", error=f"Erro ao gerar roteiro: {str(e)}")
+    
+    tasks = [asyncio.create_task(generate(index)) for index in duplicates]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            yield item
+            for index in duplicates[item.index]:
+                yield item.model_copy(update={"index": index, "duplicate_of": item.index})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@router.post("/trips/batch", response_model=TripBatchResponse)
+async def create_trip_batch(
+    batch: TripBatchRequest,
+    stream: bool = Query(False, description="Emite cada resultado como uma linha NDJSON assim que fica pronto")
+):
     """
-    Obtém detalhes de um roteiro específico
+    Gera vários roteiros de uma vez.
+
+    Pedidos iguais (mesma chave da cache) são gerados uma só vez. Um erro num
+    pedido não afeta os restantes: cada resultado traz `status` ok ou error.
     """
-    for trip in trips_db:
-        if trip.id == trip_id:
-            return trip
+    if len(batch.trips) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Máximo de {BATCH_MAX_ITEMS} pedidos por lote")
+    
+    if stream:
+        async def lines():
+            async for item in _generate_batch(batch.trips):
+                yield item.model_dump_json() + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
     
-    raise HTTPException(status_code=404, detail="Roteiro não encontrado")
+    results = [item async for item in _generate_batch(batch.trips)]
+    results.sort(key=lambda item: item.index)
+    succeeded = sum(1 for item in results if item.status == "ok")
+    return ModelJSONResponse(TripBatchResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    ))
+
+@router.get("/trips", response_model=TripListResponse)
+async def list_trips(
+    limit: int = Query(20, ge=1, le=100, description="Nº máximo de roteiros por página"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido em `next_cursor` na página anterior"),
+    sort: str = Query("-created_at", pattern="^-?created_at$", description="created_at (mais antigos primeiro) ou -created_at")
+):
+    """
+    Lista os roteiros criados (resumos paginados por cursor)
+    """
+    try:
+        trips, next_cursor = await trip_store.list_summaries(
+            limit=limit,
+            cursor=cursor,
+            descending=sort.startswith("-")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ModelJSONResponse(TripListResponse(trips=trips, next_cursor=next_cursor))
+
+@router.get("/trips/{trip_id}", response_model=TripResponse)
+async def get_trip(trip_id: str, request: Request):
+    """
+    Obtém detalhes de um roteiro específico.
+
+    O corpo é serializado e comprimido uma vez (brotli/gzip conforme o
+    `Accept-Encoding`); com `If-None-Match` igual à `ETag` responde 304.
+    """
+    body = trip_bodies.get(trip_id)
+    if body is None:
+        # Um extend/regenerate/delete que acabe durante a leitura não é desfeito pela cache
+        generation = trip_bodies.generation
+        with phase("store"):
+            trip = await trip_store.get(trip_id)
+        if trip is None:
+            raise HTTPException(status_code=404, detail="Roteiro não encontrado")
+        with phase("serialize"):
+            body = trip_bodies.fill(trip_id, to_json(trip), generation)
+    response = EncodedJSONResponse(body, request)
+    if response.status_code == 304:
+        trip_bodies.not_modified += 1
+    return response
+
+@router.post("/trips/{trip_id}/extend", response_model=TripResponse)
+async def extend_trip(trip_id: str, extend_request: TripExtendRequest, request: Request):
+    """
+    Acrescenta dias ao fim de um roteiro guardado.
+
+    Só os dias novos são gerados: o provider recebe um resumo dos dias
+    existentes (atrações já usadas, onde acaba o último dia) em vez do roteiro.
+    """
+    async with _editing(trip_id) as trip:
+        duration_days = trip.duration_days + extend_request.days
+        if duration_days > MAX_TRIP_DAYS:
+            raise HTTPException(status_code=422, detail=f"Um roteiro tem no máximo {MAX_TRIP_DAYS} dias")
+        start = time.perf_counter()
+        generated = await _generate_days(trip, (trip.duration_days + 1, duration_days), duration_days)
+        trip = trip.model_copy(update={
+            "duration_days": duration_days,
+            "itinerary": trip.itinerary + generated.itinerary,
+            "general_tips": trip.general_tips or generated.general_tips,
+            # O provider estima o custo da viagem toda com os dias novos
+            "estimated_cost": generated.estimated_cost or trip.estimated_cost,
+            "updated_at": datetime.utcnow()
+        })
+        with phase("store"):
+            await trip_store.update(trip)
+        _cache_body(trip)
+        trip_generation_seconds.observe(time.perf_counter() - start, mode="extend")
+    return _trip_response(trip, request)
+
+@router.post("/trips/{trip_id}/days/{day}/regenerate", response_model=TripResponse)
+async def regenerate_day(
+    trip_id: str,
+    request: Request,
+    day: int = Path(..., ge=1, description="Número do dia a substituir"),
+    regenerate_request: Optional[DayRegenerateRequest] = None
+):
+    """
+    Substitui um dia de um roteiro guardado por um dia novo.
+
+    Só esse dia é gerado, com atrações diferentes das dos restantes dias e
+    do dia substituído; `focus` indica o que o novo dia deve privilegiar.
+    """
+    async with _editing(trip_id) as trip:
+        if not any(existing.day == day for existing in trip.itinerary):
+            raise HTTPException(status_code=404, detail="Dia não encontrado")
+        start = time.perf_counter()
+        focus = regenerate_request.focus if regenerate_request else None
+        generated = await _generate_days(trip, (day, day), trip.duration_days, focus)
+        trip = trip.model_copy(update={
+            "itinerary": [generated.itinerary[0] if existing.day == day else existing for existing in trip.itinerary],
+            "updated_at": datetime.utcnow()
+        })
+        with phase("store"):
+            await trip_store.update(trip)
+        _cache_body(trip)
+        trip_generation_seconds.observe(time.perf_counter() - start, mode="regenerate")
+    return _trip_response(trip, request)
 
 @router.delete("/trips/{trip_id}")
 async def delete_trip(trip_id: str):
     """
     Remove um roteiro
     """
-    global trips_db
-    
-    for i, trip in enumerate(trips_db):
-        if trip.id == trip_id:
-            trips_db.pop(i)
-            return {"message": "Roteiro removido com sucesso"}
-    
-    raise HTTPException(status_code=404, detail="Roteiro não encontrado")
+    # Com o lock de edição, um extend/regenerate em curso não volta a guardar o corpo depois
+    async with _editing(trip_id):
+        with phase("store"):
+            if not await trip_store.delete(trip_id):
+                raise HTTPException(status_code=404, detail="Roteiro não encontrado")
+        # Só depois de removido: um GET que falhe a cache já não encontra o roteiro
+        trip_bodies.invalidate(trip_id)
+    return {"message": "Roteiro removido com sucesso"}
@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional: sem ela só há a variante gzip
+    brotli = None
+
+load_dotenv()
+
+# Alterações recentes lembradas por id (as mais antigas contam como "mudou" para todos)
+MAX_TRACKED_CHANGES = 4096
+
+class EncodedBody(NamedTuple):
+    """Corpo JSON de uma resposta, serializado e comprimido uma só vez"""
+    etag: str
+    json: bytes  # Sem compressão, para clientes sem Accept-Encoding
+    gzip: bytes
+    br: Optional[bytes]
+    expires_at: float
+
+    @property
+    def stored_bytes(self) -> int:
+        return len(self.json) + len(self.gzip) + len(self.br or b"")
+
+def make_etag(body: bytes) -> str:
+    """ETag forte: hash do conteúdo (igual em todos os processos/instâncias)"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag de uma variante: cada content-coding é uma representação diferente
+    (RFC 9110), por isso br e gzip têm a sua ("<hash>-br", "<hash>-gzip")"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` inclui a ETag (comparação fraca, como manda o RFC 9110 para GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+def accepted_encoding(accept_encoding: Optional[str], body: EncodedBody) -> Optional[str]:
+    """Melhor variante para o `Accept-Encoding` do cliente: br, gzip ou None (sem compressão)"""
+    accepted = {}
+    for item in (accept_encoding or "").lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    for coding, variant in (("br", body.br), ("gzip", body.gzip)):
+        if variant is not None and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+class BodyCache:
+    """Corpos de resposta pré-serializados (gzip e brotli), por id, com LRU por bytes e TTL.
+
+    Os roteiros são servidos muitas vezes sem mudar: o JSON é gerado e
+    comprimido uma vez (na criação ou na primeira leitura) e as leituras
+    seguintes devolvem os bytes prontos, ou 304 se o cliente já os tiver.
+    Quem altera ou remove o roteiro tem de chamar `put` ou `invalidate`; o
+    TTL limita o tempo em que outro processo (ex: Mongo partilhado) pode
+    servir uma versão antiga.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 600.0,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries: "OrderedDict[str, EncodedBody]" = OrderedDict()
+        self.stored_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        # Geração de cada alteração (put/invalidate), para `fill` saber se o roteiro
+        # mudou enquanto era lido; só as últimas ficam por id, as antigas em `_forgotten`
+        self.generation = 0
+        self._changes: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def encode(self, body: bytes) -> EncodedBody:
+        """Comprime o JSON (gzip e, se disponível, brotli) e calcula a ETag"""
+        return EncodedBody(
+            etag=make_etag(body),
+            json=body,
+            gzip=gzip.compress(body, compresslevel=self.gzip_level, mtime=0),
+            br=brotli.compress(body, quality=self.brotli_quality) if brotli is not None else None,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+
+    def get(self, key: str) -> Optional[EncodedBody]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at < time.monotonic():
+            self.invalidate(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key: str) -> Optional[EncodedBody]:
+        """Corpo em cache sem contar como leitura (ex: resposta à própria criação)"""
+        entry = self._entries.get(key)
+        return entry if entry is not None and entry.expires_at >= time.monotonic() else None
+
+    def put(self, key: str, body: bytes) -> EncodedBody:
+        """Codifica o corpo e guarda-o (substituindo a versão anterior)"""
+        entry = self.encode(body)
+        if not self.enabled:
+            return entry
+        self.invalidate(key)
+        self._entries[key] = entry
+        self.stored_bytes += entry.stored_bytes
+        while self.stored_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.stored_bytes -= evicted.stored_bytes
+            self.evictions += 1
+        return entry
+
+    def fill(self, key: str, body: bytes, generation: int) -> EncodedBody:
+        """Guarda um corpo lido do armazenamento depois de `generation` (valor lido antes
+        da leitura), só se o roteiro não mudou entretanto; um corpo guardado nesse
+        intervalo (ex: por um extend) nunca é substituído"""
+        current = self.peek(key)
+        if current is not None:
+            return current
+        if self._changes.get(key, self._forgotten) > generation:
+            return self.encode(body)
+        return self.put(key, body)
+
+    def invalidate(self, key: str):
+        self.generation += 1
+        self._changes[key] = self.generation
+        self._changes.move_to_end(key)
+        if len(self._changes) > MAX_TRACKED_CHANGES:
+            _, self._forgotten = self._changes.popitem(last=False)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.stored_bytes -= entry.stored_bytes
+
+    def clear(self):
+        self._entries.clear()
+        self.stored_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "stored_bytes": self.stored_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "brotli": brotli is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+        }
+
+# Instância global (corpos dos roteiros servidos em GET /trips/{id})
+trip_bodies = BodyCache(
+    max_bytes=int(float(os.getenv("TRIP_BODY_CACHE_MB", "32")) * 1024 * 1024),
+    ttl_seconds=float(os.getenv("TRIP_BODY_CACHE_TTL", "600"))
+)
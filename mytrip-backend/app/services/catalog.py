@@ -0,0 +1,120 @@
+import json
+import os
+import unicodedata
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent.parent / "data" / "mock_catalog.json"
+
+class CatalogPlace(NamedTuple):
+    name: str
+    description: str
+    duration: str  # Ex: "2-3 horas"
+    tips: str
+    hours: float  # Duração usada no horário do dia
+    entrance_fee: str
+
+class RegionCatalog(NamedTuple):
+    name: str
+    places: Tuple[CatalogPlace, ...]
+    meals: Tuple[str, ...]
+    tips: Tuple[str, ...]
+    cost: str
+    breakfast: Tuple[Tuple[str, str], ...]  # (restaurante, custo)
+    lunch: Tuple[Tuple[str, str], ...]
+    dinner: Tuple[Tuple[str, str], ...]
+
+def fold_text(text: str) -> str:
+    """Texto comparável: sem acentos, minúsculas, hífenes e espaços normalizados"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.casefold().replace("-", " ").split())
+
+def normalize_region_key(text: str) -> str:
+    """Chave de pesquisa: sem acentos, minúsculas, sem país (" Lisboa, Portugal" -> "lisboa")"""
+    return fold_text(text.split(",", 1)[0])
+
+def _duration_hours(duration: str) -> float:
+    if "3-4" in duration or "4-5" in duration:
+        return 3.5
+    if "2-3" in duration:
+        return 2.5
+    if "1-2" in duration:
+        return 1.5
+    return 1.0
+
+def make_place(name: str, description: str, duration: str, tips: str) -> CatalogPlace:
+    lowered = name.lower()
+    fee = "€5-15" if "museu" in lowered or "palácio" in lowered else "Grátis"
+    return CatalogPlace(name, description, duration, tips, _duration_hours(duration), fee)
+
+class Catalog:
+    """Catálogo de regiões do modo mock, carregado uma única vez.
+
+    As estruturas são imutáveis (tuplos) e a pesquisa por nome ou alias é O(1).
+    """
+
+    def __init__(self, data: dict):
+        self.best_season: str = data["best_season"]
+        defaults = data["defaults"]
+        self._default_places = tuple(tuple(p) for p in defaults["places"])
+        self._areas = tuple(defaults.get("areas", []))
+        self._defaults = defaults
+        self.regions: Dict[str, RegionCatalog] = {}
+        self._index: Dict[str, RegionCatalog] = {}
+        self._aliases: Dict[str, Tuple[str, ...]] = {}
+        for name, region in data["regions"].items():
+            entry = self._build_region(name, region)
+            self.regions[name] = entry
+            self._aliases[name] = tuple(region.get("aliases", []))
+            for alias in [name, *region.get("aliases", [])]:
+                self._index[normalize_region_key(alias)] = entry
+
+    def _build_region(self, name: str, region: dict) -> RegionCatalog:
+        defaults = self._defaults
+        return RegionCatalog(
+            name=name,
+            places=tuple(make_place(*p) for p in region["places"]),
+            meals=tuple(region.get("meals") or defaults["meals"]),
+            tips=tuple(region.get("tips") or defaults["tips"]),
+            cost=region.get("cost") or defaults["cost"],
+            breakfast=tuple(tuple(m) for m in region.get("breakfast") or defaults["breakfast"]),
+            lunch=tuple(tuple(m) for m in region.get("lunch") or defaults["lunch"]),
+            dinner=tuple(tuple(m) for m in region.get("dinner") or defaults["dinner"]),
+        )
+
+    def lookup(self, region: str) -> Optional[RegionCatalog]:
+        """Região do catálogo para o nome ou alias indicado (None se desconhecida)"""
+        return self._index.get(normalize_region_key(region))
+
+    def aliases(self, name: str) -> Tuple[str, ...]:
+        """Nomes alternativos da região `name` (ex: "Lisbon" para "Lisboa")"""
+        return self._aliases.get(name, ())
+
+    def generic_region(self, name: str) -> RegionCatalog:
+        """Região genérica para destinos fora do catálogo (sem cair para Lisboa)"""
+        return self._build_region(name, {"places": self.generic_places(name)})
+
+    def generic_places(self, name: str) -> Tuple[Tuple[str, str, str, str], ...]:
+        return tuple(
+            (p[0].format(region=name), p[1], p[2], p[3])
+            for p in self._default_places
+        )
+
+    def area_places(self, name: str) -> Tuple[Tuple[str, str, str, str], ...]:
+        """Atividades genéricas repetidas por zona do destino (ex: "Museu de Lisboa (zona norte)"),
+        para viagens longas que esgotam as atrações da região"""
+        return tuple(
+            (f"{place[0]} ({area})", *place[1:])
+            for area in self._areas
+            for place in self.generic_places(name)
+        )
+
+def load_catalog(path: Optional[str] = None) -> Catalog:
+    """Lê o catálogo (MOCK_CATALOG_PATH ou o ficheiro incluído na app)"""
+    path = path or os.getenv("MOCK_CATALOG_PATH") or DEFAULT_CATALOG_PATH
+    with open(path, encoding="utf-8") as f:
+        return Catalog(json.load(f))
+
+# Instância global
+catalog = load_catalog()
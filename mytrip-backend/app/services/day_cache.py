@@ -0,0 +1,140 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, NamedTuple, Optional
+
+from app.models.trip import DayItinerary, ItineraryData
+
+class CachedDay(NamedTuple):
+    day: DayItinerary
+    places: FrozenSet[str]  # Atrações do dia (para não repetir atrações ao compor)
+    seconds: float  # Tempo de geração atribuído a este dia (para estimar o tempo poupado)
+    expires_at: float
+
+class _DayPool:
+    """Dias gerados para um destino/escalão/interesses e o resumo mais recente"""
+
+    def __init__(self):
+        self.days: List[CachedDay] = []
+        self.general_tips: List[str] = []
+        self.best_season: Optional[str] = None
+
+class ComposedDays(NamedTuple):
+    days: List[DayItinerary]  # Por ordem, ainda com a numeração original
+    general_tips: List[str]
+    best_season: Optional[str]
+    seconds_saved: float
+
+def place_keys(day: DayItinerary) -> FrozenSet[str]:
+    return frozenset(key for key in (place.name.strip().casefold() for place in day.places) if key)
+
+class DayCache:
+    """Cache de dias de roteiro, para compor viagens novas a partir de dias já gerados.
+
+    Os dias ficam agrupados por (destino canónico, escalão de orçamento,
+    interesses): uma viagem de 5 dias a Lisboa pode reutilizar os 3 dias de
+    uma viagem anterior e pedir ao provider só os 2 que faltam. A composição
+    escolhe dias sem atrações em comum. Como no ItineraryCache, os dias são
+    partilhados sem cópia e não devem ser modificados.
+    """
+
+    def __init__(self, max_pools: int = 256, max_days_per_pool: int = 30, ttl_seconds: float = 3600.0):
+        self.max_pools = max_pools
+        self.max_days_per_pool = max_days_per_pool
+        self.ttl_seconds = ttl_seconds
+        self._pools: "OrderedDict[Hashable, _DayPool]" = OrderedDict()
+        self.trips = 0
+        self.full_hits = 0
+        self.partial_hits = 0
+        self.days_requested = 0
+        self.days_from_cache = 0
+        self.seconds_saved = 0.0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_pools > 0 and self.max_days_per_pool > 0 and self.ttl_seconds > 0
+
+    def _live_days(self, key: Hashable) -> List[CachedDay]:
+        pool = self._pools.get(key)
+        if pool is None:
+            return []
+        now = time.monotonic()
+        pool.days = [entry for entry in pool.days if entry.expires_at >= now]
+        return pool.days
+
+    def add(self, key: Hashable, data: ItineraryData, seconds: float):
+        """Guarda os dias de um roteiro gerado (sem degradação) em `seconds`"""
+        if not self.enabled:
+            return
+        days = [day for day in data.itinerary if day.places]
+        if not days:
+            return
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _DayPool()
+        self._pools.move_to_end(key)
+        live = self._live_days(key)
+        known = {entry.places for entry in live}
+        expires_at = time.monotonic() + self.ttl_seconds
+        per_day = seconds / len(days)
+        for day in days:
+            places = place_keys(day)
+            if places not in known:
+                known.add(places)
+                live.append(CachedDay(day, places, per_day, expires_at))
+        # Os dias mais antigos saem primeiro
+        del live[:max(0, len(live) - self.max_days_per_pool)]
+        pool.general_tips = data.general_tips or pool.general_tips
+        pool.best_season = data.best_season or pool.best_season
+        while len(self._pools) > self.max_pools:
+            self._pools.popitem(last=False)
+            self.evictions += 1
+
+    def compose(self, key: Hashable, duration_days: int) -> ComposedDays:
+        """Até `duration_days` dias em cache sem atrações repetidas entre eles"""
+        if not self.enabled:
+            return ComposedDays([], [], None, 0.0)
+        self.trips += 1
+        self.days_requested += duration_days
+        chosen: List[CachedDay] = []
+        used = set()
+        for entry in self._live_days(key):
+            if len(chosen) == duration_days:
+                break
+            if entry.places & used:
+                continue
+            used |= entry.places
+            chosen.append(entry)
+        if not chosen:
+            return ComposedDays([], [], None, 0.0)
+        self._pools.move_to_end(key)
+        pool = self._pools[key]
+        saved = sum(entry.seconds for entry in chosen)
+        if len(chosen) == duration_days:
+            self.full_hits += 1
+        else:
+            self.partial_hits += 1
+        self.days_from_cache += len(chosen)
+        self.seconds_saved += saved
+        return ComposedDays([entry.day for entry in chosen], pool.general_tips, pool.best_season, saved)
+
+    def clear(self):
+        self._pools.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pools": len(self._pools),
+            "days": sum(len(pool.days) for pool in self._pools.values()),
+            "max_pools": self.max_pools,
+            "max_days_per_pool": self.max_days_per_pool,
+            "ttl_seconds": self.ttl_seconds,
+            "trips": self.trips,
+            "full_hits": self.full_hits,
+            "partial_hits": self.partial_hits,
+            "days_requested": self.days_requested,
+            "days_from_cache": self.days_from_cache,
+            "day_hit_rate": round(self.days_from_cache / self.days_requested, 4) if self.days_requested else 0.0,
+            "seconds_saved": round(self.seconds_saved, 2),
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class ItineraryCache:
+    """Cache LRU com TTL para roteiros gerados, com deduplicação single-flight.
+
+    Pedidos idênticos em simultâneo partilham a mesma chamada ao provider em vez
+    de gerarem cada um o seu roteiro. Os valores são partilhados (sem cópia):
+    quem os recebe não os deve modificar.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Any:
+        """Devolve o valor em cache (ou None se não existir/expirou)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def contains(self, key: Hashable) -> bool:
+        """True se a chave está em cache (válida) ou a ser gerada neste momento"""
+        if key in self._in_flight:
+            return True
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def start_flight(self, key: Hashable) -> asyncio.Future:
+        """Regista uma geração feita fora de `get_or_create` (ex: streaming), para os
+        pedidos idênticos em simultâneo esperarem por ela em vez de chamarem o provider"""
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        return future
+
+    def finish_flight(self, key: Hashable, future: asyncio.Future, value: Any = None, cacheable: bool = False):
+        """Termina a geração de `start_flight` e entrega `value` a quem espera (None se
+        foi interrompida: esses pedidos geram o roteiro eles próprios)"""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if future.done():
+            return
+        if value is not None and cacheable:
+            self.set(key, value)
+        future.set_result(value)
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_create(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Tuple[Any, bool]]]
+    ) -> Any:
+        """Obtém o valor da cache ou gera-o uma única vez.
+
+        `factory` devolve `(valor, cacheable)`; valores degradados (ex: fallback
+        para mock) são partilhados com os pedidos em espera mas não ficam em cache.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            value = await asyncio.shield(task)
+            if value is None:
+                # Geração em streaming interrompida (o cliente desligou): gerar aqui
+                return await self.get_or_create(key, factory)
+            return value
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._run(key, factory))
+        self._in_flight[key] = task
+        # shield: se um cliente desistir, a geração continua para os restantes
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, factory: Callable[[], Awaitable[Tuple[Any, bool]]]) -> Any:
+        try:
+            value, cacheable = await factory()
+            if cacheable:
+                self.set(key, value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,193 @@
+import asyncio
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class JobQueueFull(Exception):
+    """A fila de jobs está cheia; `retry_after` (s) é uma estimativa de quando haverá vaga"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Fila de jobs cheia")
+        self.retry_after = retry_after
+
+class Job:
+    """Geração em background: estado, progresso (dias prontos) e resultado"""
+
+    def __init__(self, total: int):
+        self.id = f"job_{uuid.uuid4().hex}"
+        self.status = QUEUED
+        self.total = total
+        self.done = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.expires_at: Optional[float] = None  # monotonic, definido quando termina
+        self.seq = 0  # Ordem de chegada à fila (para a posição)
+
+    def advance(self, amount: int = 1):
+        self.done = min(self.total, self.done + amount)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+Runner = Callable[[Job], Awaitable[Any]]
+
+class JobQueue:
+    """Pool limitado de workers em processo para gerações assíncronas.
+
+    `submit` põe o job na fila e devolve logo; `workers` tarefas consomem a
+    fila, pelo que o nº de gerações simultâneas não depende do nº de ligações
+    HTTP abertas. A fila tem no máximo `max_queued` jobs à espera (acima disso
+    `JobQueueFull`). Os jobs terminados ficam consultáveis durante `ttl_seconds`
+    e no máximo `max_jobs` são guardados. Os jobs vivem só neste processo.
+    """
+
+    def __init__(self, workers: int = 8, max_queued: int = 500, ttl_seconds: float = 3600.0, max_jobs: int = 10000):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._seq = 0
+        self._started = 0  # Jobs que já saíram da fila (para a posição)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.avg_run_seconds: Optional[float] = None  # Média móvel da duração de cada job
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == RUNNING)
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, runner: Runner, total: int) -> Job:
+        """Enfileira `runner(job)`; o valor devolvido fica em `job.result`"""
+        self._ensure_workers()
+        self._prune()
+        if self._queue.full():
+            self.rejected += 1
+            raise JobQueueFull(self.retry_after())
+        job = Job(total)
+        self._seq += 1
+        job.seq = self._seq
+        self._jobs[job.id] = job
+        self._queue.put_nowait((job, runner))
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """Posição na fila (1 = o próximo a arrancar); None se já arrancou"""
+        if job.status != QUEUED:
+            return None
+        return max(1, job.seq - self._started)
+
+    def retry_after(self) -> int:
+        """Estimativa (s) até a fila ter vaga"""
+        per_job = self.avg_run_seconds or 10.0
+        return max(1, math.ceil(per_job * max(self.queued, 1) / max(self.workers, 1)))
+
+    async def _worker(self):
+        while True:
+            job, runner = await self._queue.get()
+            self._started += 1
+            job.status = RUNNING
+            job.started_at = datetime.utcnow()
+            start = time.monotonic()
+            try:
+                job.result = await runner(job)
+                job.done = job.total
+                job.status = DONE
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.status = FAILED
+                job.error = "Job cancelado"
+                raise
+            except Exception as e:
+                job.status = FAILED
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                elapsed = time.monotonic() - start
+                self.avg_run_seconds = elapsed if self.avg_run_seconds is None else 0.8 * self.avg_run_seconds + 0.2 * elapsed
+                job.finished_at = datetime.utcnow()
+                job.expires_at = time.monotonic() + self.ttl_seconds
+                self._queue.task_done()
+
+    def _prune(self):
+        """Descarta jobs terminados expirados e, acima de `max_jobs`, os terminados mais antigos"""
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items() if job.expires_at is not None and job.expires_at < now]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                del self._jobs[job_id]
+
+    async def close(self):
+        """Cancela os workers (chamado no shutdown da app)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs que ficaram na fila já não vão correr
+        while self._queue is not None and not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            job.status = FAILED
+            job.error = "Job cancelado"
+        self._queue = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "tracked_jobs": len(self._jobs),
+            "avg_run_ms": round(self.avg_run_seconds * 1000, 1) if self.avg_run_seconds is not None else None,
+        }
+
+# Instância global
+job_queue = JobQueue(
+    workers=int(os.getenv("JOB_WORKERS", os.getenv("AI_MAX_CONCURRENCY", "8"))),
+    max_queued=int(os.getenv("JOB_MAX_QUEUED", "500")),
+    ttl_seconds=float(os.getenv("JOB_TTL", "3600")),
+    max_jobs=int(os.getenv("JOB_MAX_TRACKED", "10000"))
+)
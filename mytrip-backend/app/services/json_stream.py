@@ -0,0 +1,149 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic_core import from_json
+
+# Caracteres que mudam o estado do parser, fora e dentro de strings
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+class IncrementalItineraryParser:
+    """Parser incremental para o JSON do roteiro devolvido pelo provider.
+
+    Recebe o texto aos bocados (streaming) e devolve cada objeto de
+    `itinerary[]` assim que a sua chaveta de fecho chega, sem esperar pelo
+    resto da resposta. Texto antes do primeiro `{` (prosa, ```json) é ignorado.
+
+    `item_loader` converte o texto JSON de cada item (por omissão `json.loads`);
+    itens que façam o loader lançar ValueError são descartados.
+    """
+
+    def __init__(self, array_key: str = "itinerary", item_loader: Callable[[str], Any] = json.loads):
+        self.array_key = array_key
+        self.item_loader = item_loader
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start = -1
+        self.items: List[Any] = []
+        self.start = -1  # Posição do `{` de topo
+        self.end: Optional[int] = None  # Posição a seguir ao `}` de topo
+
+    @property
+    def text(self) -> str:
+        """Todo o texto recebido até agora"""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Adiciona texto e devolve os itens completados por este bocado"""
+        self._text += chunk
+        completed = []
+        text = self._text
+        n = len(text)
+        i = self._pos
+        if not self._started:
+            # Prosa antes do JSON: aspas soltas não abrem strings
+            i = text.find("{", i)
+            if i < 0:
+                self._pos = n
+                return completed
+            self._started = True
+            self._depth = 1
+            self.start = i
+            i += 1
+        # Salta diretamente para o próximo carácter relevante (regex em C)
+        # em vez de percorrer o texto carácter a carácter
+        while i < n and not self._finished:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(text, i)
+                if match is None:
+                    i = n
+                    break
+                i = match.start()
+                if text[i] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    if self._depth == 1:
+                        # Candidato a chave do objeto de topo
+                        self._last_key = text[self._string_start + 1:i]
+                i += 1
+                continue
+            match = _STRUCTURAL.search(text, i)
+            if match is None:
+                i = n
+                break
+            i = match.start()
+            ch = text[i]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == self.array_key:
+                    self._array_depth = 2
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = i
+            else:
+                if ch == "}" and self._item_start >= 0 and self._depth == self._array_depth + 1:
+                    item = self._load(text[self._item_start:i + 1])
+                    if item is not None:
+                        self.items.append(item)
+                        completed.append(item)
+                    self._item_start = -1
+                elif ch == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finished = True
+                    self.end = i + 1
+            i += 1
+        self._pos = i
+        return completed
+
+    def _load(self, fragment: str) -> Optional[Any]:
+        try:
+            return self.item_loader(fragment)
+        except ValueError:
+            return None
+
+    @property
+    def finished(self) -> bool:
+        """True quando o objeto de topo foi fechado"""
+        return self._finished
+
+def salvage_json_object(
+    text: str,
+    array_key: str = "itinerary",
+    item_loader: Callable[[str], Any] = json.loads
+) -> Tuple[List[Any], Dict[str, Any], bool]:
+    """Recupera o que estiver completo num objeto JSON truncado ou com texto à volta.
+
+    Devolve (itens completos de `array_key`, restantes campos de topo, objeto fechado).
+    Os campos de topo vêm do parsing parcial do pydantic-core: strings e listas
+    cortadas a meio ficam de fora, o resto aproveita-se.
+    """
+    parser = IncrementalItineraryParser(array_key, item_loader)
+    parser.feed(text)
+    if parser.start < 0:
+        return [], {}, False
+    try:
+        fields = from_json(text[parser.start:parser.end], allow_partial=True, cache_strings=False)
+    except ValueError:
+        # JSON malformado a meio (vírgulas a mais, comentários...): ficam só os itens
+        fields = {}
+    if not isinstance(fields, dict):
+        fields = {}
+    fields.pop(array_key, None)
+    return parser.items, fields, parser.finished
@@ -0,0 +1,184 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Valores das labels de uma série, pela ordem de `labelnames`
+LabelValues = Tuple[str, ...]
+# Métricas calculadas na leitura: devolvem {valores das labels: valor}
+Collect = Callable[[], Dict[LabelValues, float]]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect: Optional[Collect] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[LabelValues, float] = {}
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        values = self.collect() if self.collect is not None else self._values
+        for key, value in sorted(values.items()):
+            yield self.name, self.labelnames, key, value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labelnames, values, value in self._samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Contador monótono (ou calculado na leitura com `collect`)"""
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    """Valor instantâneo (ou calculado na leitura com `collect`)"""
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    """Histograma com buckets cumulativos, no formato do Prometheus"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por série: contagens por bucket (não cumulativas; a última é +Inf), soma
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def _samples(self):
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", self.labelnames + ("le",), key + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labelnames, key, total[0]
+            yield f"{self.name}_count", self.labelnames, key, cumulative
+
+class Registry:
+    """Conjunto de métricas expostas em /metrics (formato de texto do Prometheus)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect: Optional[Collect] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, collect))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect: Optional[Collect] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class EventLoopLagMonitor:
+    """Mede o atraso do event loop: acorda a cada `interval` s e regista quanto chegou atrasado"""
+
+    def __init__(self, histogram: Histogram, interval: float = 0.5):
+        self.histogram = histogram
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.histogram.observe(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+# Instância global e métricas do pipeline de geração
+registry = Registry()
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+
+trip_generation_seconds = registry.histogram(
+    "mytrip_trip_generation_seconds",
+    "Tempo total de criação de um roteiro (geração + gravação), por modo",
+    ["mode"], LATENCY_BUCKETS
+)
+provider_request_seconds = registry.histogram(
+    "mytrip_provider_request_seconds",
+    "Latência de cada chamada ao provider de IA, por provider, modelo e resultado",
+    ["provider", "model", "outcome"], LATENCY_BUCKETS
+)
+prompt_tokens = registry.histogram(
+    "mytrip_prompt_tokens",
+    "Tokens de entrada por chamada ao provider (reportados ou estimados)",
+    ["provider"], TOKEN_BUCKETS
+)
+completion_tokens = registry.histogram(
+    "mytrip_completion_tokens",
+    "Tokens de saída por chamada ao provider (reportados ou estimados)",
+    ["provider"], TOKEN_BUCKETS
+)
+parse_failures = registry.counter(
+    "mytrip_parse_failures_total",
+    "Respostas do provider que não eram JSON válido e completo (parse_error, truncated)",
+    ["reason"]
+)
+mock_fallbacks = registry.counter(
+    "mytrip_mock_fallbacks_total",
+    "Gerações servidas pelo modo mock, por motivo",
+    ["reason"]
+)
+event_loop_lag_seconds = registry.histogram(
+    "mytrip_event_loop_lag_seconds",
+    "Atraso do event loop medido por um temporizador periódico",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+event_loop_monitor = EventLoopLagMonitor(event_loop_lag_seconds)
@@ -0,0 +1,131 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from app.services.catalog import CatalogPlace, RegionCatalog, catalog, make_place
+
+PLACES_PER_DAY = 4
+DAY_START = 9.0  # Primeira atração às 9:00 (após pequeno-almoço às 8:00)
+DAY_END = 19.5  # Última atração tem de acabar antes do jantar
+
+def _format_time(value: float) -> str:
+    hours = int(value)
+    return f"{hours:02d}:{int((value - hours) * 60):02d}"
+
+@lru_cache(maxsize=256)
+def _region_pool(region: str) -> Tuple[RegionCatalog, Tuple[CatalogPlace, ...]]:
+    """Região do catálogo e lista de atrações para rodar ao longo dos dias.
+
+    Primeiro as atrações da região, depois atividades genéricas do destino
+    e as mesmas atividades por zona, para que uma viagem de 30 dias não
+    repita atrações (nem fique com dias vazios depois de juntar as partes).
+    """
+    region_data = catalog.lookup(region)
+    if region_data is None:
+        region_data = catalog.generic_region(region.strip())
+        places = region_data.places
+    else:
+        places = region_data.places + tuple(make_place(*p) for p in catalog.generic_places(region_data.name))
+    return region_data, places + tuple(make_place(*p) for p in catalog.area_places(region_data.name))
+
+def _schedule_day(pool: Tuple[CatalogPlace, ...], cursor: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Preenche um dia com atrações a partir de `cursor`; devolve (atrações, novo cursor)"""
+    day_places = []
+    current_time = DAY_START
+    while len(day_places) < PLACES_PER_DAY:
+        place = pool[cursor % len(pool)]
+        if day_places and current_time + place.hours > DAY_END:
+            break
+        cursor += 1
+        end_time = current_time + place.hours
+        day_places.append({
+            "name": place.name,
+            "description": place.description,
+            "start_time": _format_time(current_time),
+            "end_time": _format_time(end_time),
+            "duration": place.duration,
+            "entrance_fee": place.entrance_fee,
+            "tips": place.tips
+        })
+        current_time = end_time + 0.5  # 30 min para deslocamento
+        # Pausa para almoço se passar das 12:30
+        if 12.5 <= current_time < 14:
+            current_time = 14
+    return day_places, cursor
+
+def generate_mock_itinerary(region: str, duration_days: int) -> Dict[str, Any]:
+    """Roteiro mock completo (todos os dias com atrações e 3 refeições)"""
+    region_data, pool = _region_pool(region)
+    name = region_data.name
+    meals_pool = region_data.meals
+    itinerary = []
+    cursor = 0
+    for day in range(1, duration_days + 1):
+        day_places, cursor = _schedule_day(pool, cursor)
+
+        # Título do dia
+        if day == 1:
+            title = f"Descobrindo {name}"
+        elif day == duration_days:
+            title = f"Último Dia em {name}"
+        else:
+            title = f"Explorando {name} - Dia {day}"
+
+        # Refeições do dia com horários e preços
+        breakfast = region_data.breakfast[(day - 1) % len(region_data.breakfast)]
+        lunch_idx = (day - 1) % len(region_data.lunch)
+        lunch = region_data.lunch[lunch_idx]
+        dinner = region_data.dinner[(day - 1) % len(region_data.dinner)]
+
+        itinerary.append({
+            "day": day,
+            "title": title,
+            "daily_budget": region_data.cost,
+            "places": day_places,
+            "meals": [
+                {
+                    "type": "Pequeno-almoço",
+                    "time": "08:00",
+                    "restaurant": breakfast[0],
+                    "suggestion": "Pastel de nata, torrada e café",
+                    "estimated_cost": breakfast[1],
+                    "location": "Perto do hotel"
+                },
+                {
+                    "type": "Almoço",
+                    "time": "13:00",
+                    "restaurant": lunch[0],
+                    "suggestion": meals_pool[(day - 1) % len(meals_pool)],
+                    "estimated_cost": lunch[1],
+                    "location": "Centro histórico"
+                },
+                {
+                    "type": "Jantar",
+                    "time": "19:30",
+                    "restaurant": dinner[0],
+                    "suggestion": meals_pool[day % len(meals_pool)],
+                    "estimated_cost": dinner[1],
+                    "location": "Zona ribeirinha"
+                }
+            ],
+            "accommodation_suggestion": f"Hotel no centro de {name} para fácil acesso"
+        })
+
+    return {
+        "itinerary": itinerary,
+        "general_tips": list(region_data.tips),
+        "estimated_cost": region_data.cost,
+        "best_season": catalog.best_season
+    }
+
+@lru_cache(maxsize=1024)
+def mock_itinerary_json(region: str, duration_days: int, first_day: int = 1) -> str:
+    """JSON do roteiro mock; é determinístico, por isso fica memorizado.
+
+    Com `first_day` > 1 devolve só os dias `first_day`..`duration_days`, os
+    mesmos de uma viagem de `duration_days` dias (partes e dias em falta
+    continuam a rotação em vez de repetirem o início).
+    """
+    data = generate_mock_itinerary(region, duration_days)
+    if first_day > 1:
+        data = {**data, "itinerary": data["itinerary"][first_day - 1:]}
+    return json.dumps(data, ensure_ascii=False)
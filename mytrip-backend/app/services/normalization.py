@@ -0,0 +1,156 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from app.services.catalog import Catalog, catalog, fold_text, normalize_region_key
+
+DEFAULT_ALIASES_PATH = Path(__file__).resolve().parent.parent / "data" / "aliases.json"
+
+# Partículas que ficam em minúsculas ao capitalizar um destino desconhecido
+_PARTICLES = {"de", "da", "do", "das", "dos", "e", "del", "la", "le", "di", "of", "the", "am", "an"}
+
+class Destination(NamedTuple):
+    name: str  # Nome canónico (ex: "Lisboa" para "lisbon" ou " Lisboa, Portugal")
+    country: Optional[str]  # None se não for possível inferir
+    key: str  # Chave usada na cache e na deduplicação (com ", país" se o país explícito for outro)
+
+    @property
+    def label(self) -> str:
+        """Destino para o prompt e para os pedidos seguintes: com o país quando faz parte da chave"""
+        return f"{self.name}, {self.country}" if "," in self.key else self.name
+
+class TripQuery(NamedTuple):
+    """Pedido de roteiro na forma canónica (a mesma para todas as variantes equivalentes)"""
+    destination: Destination
+    duration_days: int
+    budget: str
+    budget_min: Optional[int]
+    budget_max: Optional[int]
+    interests: Tuple[str, ...]
+
+    @property
+    def key(self) -> Tuple:
+        if self.budget_min is not None and self.budget_max is not None:
+            budget_key: Union[str, Tuple[int, int]] = (self.budget_min, self.budget_max)
+        else:
+            budget_key = self.budget
+        return (self.destination.key, self.duration_days, budget_key, self.interests)
+
+def _display_name(text: str) -> str:
+    """Nome como escrito, ou capitalizado se veio todo em minúsculas/maiúsculas"""
+    if text != text.lower() and text != text.upper():
+        return text
+    words = text.lower().split()
+    return " ".join(
+        word if index and word in _PARTICLES else word[:1].upper() + word[1:]
+        for index, word in enumerate(words)
+    )
+
+class Gazetteer:
+    """Índice de destinos, países e interesses por nome e alias (PT/EN, sem
+    acentos nem maiúsculas). As regiões do catálogo mock são todas portuguesas."""
+
+    def __init__(self, data: dict, region_catalog: Catalog):
+        self._countries: Dict[str, str] = {}
+        for name, aliases in data["countries"].items():
+            for alias in [name, *aliases]:
+                self._countries[fold_text(alias)] = name
+        self._places: Dict[str, Destination] = {}
+        for name, place in data["places"].items():
+            self._add_place(name, place.get("country"), place.get("aliases", []))
+        # Os aliases do catálogo incluem locais dentro da região (Belém, Faro): só
+        # os sinónimos acima mudam o destino, os restantes valem por si
+        for name in region_catalog.regions:
+            for alias in [name, *region_catalog.aliases(name)]:
+                self._add_place(alias.split(",", 1)[0].strip(), "Portugal", [])
+        for key, country in self._countries.items():
+            # O próprio país como destino ("Portugal", "Spain")
+            self._places.setdefault(key, Destination(country, country, fold_text(country)))
+        self._longest_place = max(len(key.split()) for key in self._places)
+        self._interests: Dict[str, str] = {}
+        for name, aliases in data["interests"].items():
+            for alias in [name, *aliases]:
+                self._interests[fold_text(alias)] = name
+
+    def _add_place(self, name: str, country: Optional[str], aliases: Iterable[str]):
+        entry = Destination(name, country, normalize_region_key(name))
+        for alias in [name, *aliases]:
+            self._places.setdefault(normalize_region_key(alias), entry)
+
+    def country(self, text: str) -> Optional[str]:
+        """Nome canónico do país ("Spain" -> "Espanha")"""
+        return self._countries.get(fold_text(text))
+
+    def _infer_country(self, key: str) -> Optional[str]:
+        """País de um destino desconhecido a partir dos nomes conhecidos que contém
+        (ex: "lisboa e sintra" -> Portugal)"""
+        words = key.split()
+        for size in range(min(self._longest_place, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                entry = self._places.get(" ".join(words[start:start + size]))
+                if entry is not None and entry.country:
+                    return entry.country
+        return None
+
+    def resolve(self, region: str, country: Optional[str] = None) -> Destination:
+        """Destino canónico de `region` ("Lisbon", " lisboa, Portugal" -> Lisboa, Portugal).
+
+        O país explícito (`country` ou o sufixo ", País") prevalece sobre o
+        conhecido ou inferido: se for outro, é outro destino e a chave leva o país
+        ("Valencia" com país Venezuela não partilha a cache com a de Espanha).
+        """
+        name, _, suffix = region.partition(",")
+        key = normalize_region_key(name)
+        explicit = " ".join(((country or "").strip() or suffix.strip()).split())
+        explicit = explicit and (self.country(explicit) or explicit)
+        entry = self._places.get(key)
+        if entry is None:
+            name = " ".join(name.split())
+            entry = Destination(_display_name(name), self._infer_country(key), key)
+        if not explicit or explicit == entry.country:
+            return entry
+        return Destination(entry.name, explicit, f"{entry.key}, {fold_text(explicit)}")
+
+    def interests(self, interests: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        """Interesses canónicos, sem repetidos e por ordem ("Food", "gastronomia" -> ("gastronomia",))"""
+        canonical: Dict[str, str] = {}
+        for interest in sorted(" ".join(i.split()).lower() for i in interests or []):
+            key = fold_text(interest)
+            if key:
+                label = self._interests.get(key, interest)
+                canonical.setdefault(fold_text(label), label)
+        return tuple(canonical[key] for key in sorted(canonical))
+
+def load_gazetteer(path: Optional[str] = None) -> Gazetteer:
+    """Lê os aliases (ALIASES_PATH ou o ficheiro incluído na app)"""
+    path = path or os.getenv("ALIASES_PATH") or DEFAULT_ALIASES_PATH
+    with open(path, encoding="utf-8") as f:
+        return Gazetteer(json.load(f), catalog)
+
+# Instância global
+gazetteer = load_gazetteer()
+
+@lru_cache(maxsize=1024)
+def resolve_destination(region: str, country: Optional[str] = None) -> Destination:
+    return gazetteer.resolve(region, country)
+
+def normalize_request(
+    region: str,
+    duration_days: int,
+    budget: Optional[str] = "medio",
+    interests: Optional[Iterable[str]] = None,
+    budget_min: Optional[int] = None,
+    budget_max: Optional[int] = None,
+    country: Optional[str] = None
+) -> TripQuery:
+    """Forma canónica do pedido, partilhada pela cache, pela deduplicação dos lotes e pelo armazenamento"""
+    return TripQuery(
+        destination=resolve_destination(region, country),
+        duration_days=duration_days,
+        budget=fold_text(budget or "medio"),
+        budget_min=budget_min,
+        budget_max=budget_max,
+        interests=gazetteer.interests(interests)
+    )
@@ -1,36 +1,288 @@
 import os
-from openai import OpenAI
-from groq import Groq
+import asyncio
+import httpx
 from dotenv import load_dotenv
-import json
-from typing import Dict, Any
+import importlib
+import logging
+import math
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+from app.models.trip import DayItinerary, ItineraryData, Place
+from app.services.catalog import catalog
+from app.services.day_cache import ComposedDays, DayCache
+from app.services.itinerary_cache import ItineraryCache
+from app.services.json_stream import IncrementalItineraryParser, salvage_json_object
+from app.services import metrics
+from app.services.mock_itinerary import mock_itinerary_json
+from app.services.normalization import normalize_request, resolve_destination
+from app.services.provider_router import CircuitBreaker, ProviderBackend, ProviderRouter, classify_error
+from app.services.rate_limiter import RateLimitScheduler
+from app.services.prompts import (
+    PromptStats,
+    budget_context,
+    build_messages,
+    build_user_prompt,
+    estimate_tokens,
+    estimate_trip_cost,
+)
+from app.services.structured_logging import get_logger, log_event
+from app.services.timing import phase
+from app.services.token_budget import MaxTokensEstimator
+from app.services.trip_planner import (
+    REPAIR_FOCUS,
+    ItineraryMerger,
+    chunk_focus,
+    compose_focus,
+    group_day_ranges,
+    missing_days,
+    plan_day_ranges,
+    trip_context,
+)
 
 load_dotenv()
 
+logger = get_logger("ai")
+
+# Motivo pelo qual a geração atual foi degradada (fallback para mock, JSON inválido...)
+_degraded_reason: ContextVar[Optional[str]] = ContextVar("degraded_reason", default=None)
+
+# Motivos em que vale a pena pedir de novo só os dias em falta
+# (os restantes, como quota ou erro do provider, já caíram para mock)
+REPAIRABLE_REASONS = {None, "truncated", "parse_error", "stream_interrupted", "missing_days"}
+
+# Valida o JSON do provider diretamente para os modelos
+ITINERARY_ADAPTER = TypeAdapter(ItineraryData)
+
+# SDK de cada provider: importado só para os providers configurados (o do openai
+# demora ~0.5s a importar, o que pesa nos arranques a frio do Render/Railway)
+PROVIDER_SDKS = {"groq": "groq", "openai": "openai", "simulated": "openai"}
+
+def simulator_base_url() -> str:
+    """URL do simulador (SIMULATED_BASE_URL ou o arrancado pela app em SIMULATOR_PORT)"""
+    port = os.getenv("SIMULATOR_PORT", "8900")
+    return os.getenv("SIMULATED_BASE_URL", f"http://127.0.0.1:{port}/v1")
+
 class OpenAIService:
     def __init__(self):
         # Verificar qual provider usar
         self.provider = os.getenv("AI_PROVIDER", "openai").lower()
         
-        if self.provider == "groq":
-            # Usar Groq (grátis!)
-            groq_key = os.getenv("GROQ_API_KEY")
-            if groq_key:
-                self.client = Groq(api_key=groq_key)
+        # Limite de gerações simultâneas no provider (as restantes esperam a vez)
+        self.max_concurrency = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.http_client: Optional[httpx.AsyncClient] = None
+        
+        # Router dos providers: criado no arranque da app (start) ou no primeiro uso,
+        # para não importar os SDKs nem abrir ligações ao importar o módulo
+        self._router: Optional[ProviderRouter] = None
+        self._owns_router = False
+        self._sdk_import: Optional[asyncio.Future] = None
+        
+        # Backpressure: acima de N gerações pendentes o POST responde 429 + Retry-After
+        self.max_queue = int(os.getenv("AI_MAX_QUEUE", "64"))
+        # Segundos de atraso na fila por dia de viagem (viagens curtas passam à frente)
+        self.queue_day_weight = float(os.getenv("AI_QUEUE_DAY_WEIGHT", "2.0"))
+        self.pending = 0
+        
+        # Cache de roteiros gerados (LRU + TTL) com deduplicação de pedidos idênticos
+        self.cache = ItineraryCache(
+            max_entries=int(os.getenv("ITINERARY_CACHE_SIZE", "256")),
+            ttl_seconds=float(os.getenv("ITINERARY_CACHE_TTL", "3600"))
+        )
+        
+        # Dias já gerados, para compor viagens do mesmo destino/escalão/interesses
+        # com outra duração pedindo ao provider só os dias que faltam
+        self.day_cache = DayCache(
+            max_pools=int(os.getenv("DAY_CACHE_POOLS", "256")),
+            max_days_per_pool=int(os.getenv("DAY_CACHE_DAYS_PER_POOL", "30")),
+            ttl_seconds=float(os.getenv("DAY_CACHE_TTL", "3600"))
+        )
+        
+        # Tokens de entrada por pedido (para acompanhar o tamanho dos prompts)
+        self.prompt_stats = PromptStats()
+        
+        # max_tokens aprendido com o consumo real (por provider, escalão e dias)
+        self.adaptive_max_tokens = os.getenv("AI_MAX_TOKENS_ADAPTIVE", "true").lower() == "true"
+        self.token_budget = MaxTokensEstimator(
+            margin=float(os.getenv("AI_MAX_TOKENS_MARGIN", "0.2")),
+            quantile=float(os.getenv("AI_MAX_TOKENS_QUANTILE", "0.95")),
+            ceiling=int(os.getenv("AI_MAX_TOKENS_CEILING", "8000"))
+        )
+        
+        # Viagens acima do limiar são geradas em partes paralelas de N dias
+        self.chunk_days = int(os.getenv("GENERATION_CHUNK_DAYS", "5"))
+        self.chunk_threshold = int(os.getenv("GENERATION_CHUNK_THRESHOLD", "7"))
+        
+        # Respostas truncadas/inválidas: pedir só os dias em falta em vez de descartar tudo
+        self.repair_missing_days = os.getenv("AI_REPAIR_MISSING_DAYS", "true").lower() == "true"
+        # Guarda as respostas que precisaram de salvamento (corpus para benchmarks/salvage.py)
+        self.salvage_corpus_dir = os.getenv("SALVAGE_CORPUS_DIR")
+    
+    @property
+    def router(self) -> ProviderRouter:
+        """Todos os providers configurados, por ordem de preferência (o de AI_PROVIDER primeiro)"""
+        if self._router is None:
+            self._router = ProviderRouter(
+                self._build_backends(),
+                hedge=os.getenv("AI_HEDGE", "false").lower() == "true",
+                hedge_quantile=float(os.getenv("AI_HEDGE_QUANTILE", "0.9")),
+                hedge_min_delay=float(os.getenv("AI_HEDGE_MIN_DELAY", "2.0")),
+                concurrency=self._semaphore
+            )
+            self._owns_router = True
+        return self._router
+    
+    @property
+    def backends(self) -> List[ProviderBackend]:
+        """Backends já criados (nenhum antes do arranque): para métricas e backpressure
+        lerem o estado sem criar o router nem importar os SDKs no event loop"""
+        return self._router.backends if self._router is not None else []
+    
+    @router.setter
+    def router(self, router: ProviderRouter):
+        # Router externo (benchmarks): não é recriado nem descartado pelo serviço
+        self._router = router
+        self._owns_router = False
+    
+    async def start(self):
+        """Cria os backends dos providers (chamado no arranque da app).
+
+        Os SDKs são importados numa thread para não bloquear o event loop
+        enquanto o servidor já responde ao /health.
+        """
+        if self._router is not None:
+            return
+        loop = asyncio.get_running_loop()
+        if self._sdk_import is None or self._sdk_import.get_loop() is not loop:
+            # Pedidos que cheguem durante o import esperam pelo mesmo import
+            modules = sorted({PROVIDER_SDKS[name] for name in self._provider_order() if self._api_key(name)})
+            self._sdk_import = loop.run_in_executor(None, lambda: [importlib.import_module(m) for m in modules])
+        await asyncio.shield(self._sdk_import)
+        self.router  # Cria os backends (já sem custo de import)
+    
+    async def warm_up(self):
+        """Aquecimento em background depois de o servidor aceitar pedidos:
+        SDKs e backends, uma ligação keep-alive por provider e o catálogo de regiões"""
+        start = time.perf_counter()
+        try:
+            await self.start()
+            await asyncio.gather(*(self._warm_connection(backend) for backend in self.router.backends))
+            for name in catalog.regions:
+                # Aliases, pool de atrações do mock e validação do JSON (caminho do fallback)
+                resolve_destination(name)
+                ITINERARY_ADAPTER.validate_json(mock_itinerary_json(name, 1))
+                await asyncio.sleep(0)
+        except Exception as e:
+            # O que faltar é criado no primeiro pedido
+            log_event(logger, logging.WARNING, "warm_up_failed", error=type(e).__name__, detail=str(e)[:200])
+            return
+        log_event(logger, logging.INFO, "warm_up_done", seconds=round(time.perf_counter() - start, 3),
+                  providers=[backend.name for backend in self.router.backends], regions=len(catalog.regions))
+    
+    async def _warm_connection(self, backend: ProviderBackend):
+        """Abre (TCP + TLS) uma ligação ao provider, que fica no pool partilhado"""
+        base_url = getattr(backend.client, "base_url", None)
+        if base_url is None or self.http_client is None:
+            return
+        try:
+            await self.http_client.head(str(base_url), timeout=5.0)
+        except Exception as e:
+            log_event(logger, logging.WARNING, "warm_up_connection_failed", provider=backend.name,
+                      error=type(e).__name__)
+    
+    def _provider_order(self) -> List[str]:
+        """AI_PROVIDERS (ex: "groq,openai") ou AI_PROVIDER seguido dos restantes"""
+        configured = os.getenv("AI_PROVIDERS")
+        if configured:
+            return [name.strip().lower() for name in configured.split(",") if name.strip()]
+        if self.provider == "simulated":
+            # Simulador local: nunca cair para um provider pago
+            return ["simulated"]
+        return [self.provider] + [name for name in ("groq", "openai") if name != self.provider]
+    
+    def _build_backends(self) -> List[ProviderBackend]:
+        """Cria um backend por provider com chave configurada (partilham o pool HTTP)"""
+        backends = []
+        # Retries internos do SDK antes de o router passar ao provider seguinte
+        max_retries = int(os.getenv("AI_SDK_MAX_RETRIES", "2"))
+        for name in self._provider_order():
+            if name not in PROVIDER_SDKS:
+                log_event(logger, logging.WARNING, "provider_unknown", provider=name)
+                continue
+            api_key = self._api_key(name)
+            if not api_key:
+                continue
+            if name == "groq":
+                # Usar Groq (grátis!)
+                from groq import AsyncGroq
+                client = AsyncGroq(api_key=api_key, http_client=self._shared_http_client(), max_retries=max_retries)
                 # Usar modelo mais recente e disponível
-                self.model = "llama-3.3-70b-versatile"  # Modelo grátis e excelente
-                print("✅ Usando Groq (GRÁTIS!)")
+                model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")  # Modelo grátis e excelente
+            elif name == "openai":
+                from openai import AsyncOpenAI
+                client = AsyncOpenAI(api_key=api_key, http_client=self._shared_http_client(), max_retries=max_retries)
+                model = os.getenv("OPENAI_MODEL", "gpt-4o")
             else:
-                self.client = None
-        else:
-            # Usar OpenAI
+                # Simulador local compatível com a OpenAI (app/services/provider_simulator.py)
+                from openai import AsyncOpenAI
+                client = AsyncOpenAI(api_key=api_key, base_url=simulator_base_url(),
+                                     http_client=self._shared_http_client(), max_retries=max_retries)
+                model = "simulated"
+            log_event(logger, logging.INFO, "provider_configured", provider=name, model=model)
+            breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv("AI_CIRCUIT_FAILURES", "5")),
+                reset_seconds=float(os.getenv("AI_CIRCUIT_RESET", "30"))
+            )
+            # Quotas do provider (0 = sem limite), ex: GROQ_RPM=30 GROQ_TPM=6000
+            limiter = RateLimitScheduler(
+                rpm=int(os.getenv(f"{name.upper()}_RPM", "0")),
+                tpm=int(os.getenv(f"{name.upper()}_TPM", "0"))
+            )
+            backends.append(ProviderBackend(name, client, model, breaker, limiter))
+        return backends
+    
+    @staticmethod
+    def _api_key(name: str) -> Optional[str]:
+        """Chave do provider (None se não estiver configurado)"""
+        if name == "groq":
+            return os.getenv("GROQ_API_KEY") or None
+        if name == "openai":
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key or api_key == "sk-test-key-placeholder":
-                self.client = None  # Modo de teste sem API key
-            else:
-                self.client = OpenAI(api_key=api_key)
-                self.model = "gpt-4o"
-                print("✅ Usando OpenAI")
+                return None  # Modo de teste sem API key
+            return api_key
+        return "simulated" if name == "simulated" else None
+    
+    def _shared_http_client(self) -> httpx.AsyncClient:
+        if self.http_client is None:
+            self.http_client = self._build_http_client()
+        return self.http_client
+    
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Cria o cliente HTTP partilhado (keep-alive) usado pelo SDK do provider"""
+        max_connections = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", str(max(self.max_concurrency, 10))))
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0
+            ),
+            timeout=httpx.Timeout(float(os.getenv("AI_TIMEOUT", "90")), connect=10.0)
+        )
+    
+    async def aclose(self):
+        """Fecha o pool de ligações ao provider (chamado no shutdown da app)"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+        if self._owns_router:
+            # Os backends usavam o pool fechado: recriados no próximo arranque
+            self._router = None
+            self._owns_router = False
+        self._sdk_import = None
         
     async def generate_itinerary(
         self,
@@ -39,733 +291,670 @@ class OpenAIService:
         budget: str = "medio",
         interests: list = None,
         budget_min: int = None,
-        budget_max: int = None
-    ) -> Dict[str, Any]:
+        budget_max: int = None,
+        country: Optional[str] = None
+    ) -> ItineraryData:
         """Gera um roteiro de viagem usando GPT-4"""
+        # Variantes equivalentes do pedido ("Lisbon", " lisboa, Portugal") partilham o roteiro;
+        # um país explícito diferente do conhecido segue no destino ("Valência, Venezuela")
+        query = normalize_request(region, duration_days, budget, interests, budget_min, budget_max, country)
+        region, budget, interests = query.destination.label, query.budget, list(query.interests)
+        return await self.cache.get_or_create(
+            query.key,
+            lambda: self._generate(region, duration_days, budget, interests, budget_min, budget_max)
+        )
+    
+    def overload_retry_after(
+        self,
+        region: str,
+        duration_days: int,
+        budget: str = "medio",
+        interests: list = None,
+        budget_min: int = None,
+        budget_max: int = None,
+        country: Optional[str] = None
+    ) -> Optional[int]:
+        """Segundos a indicar em Retry-After se a fila de gerações estiver cheia (None = aceitar).
+
+        Pedidos já em cache ou a ser gerados por outro pedido são sempre aceites.
+        """
+        if self.max_queue <= 0 or self.pending < self.max_queue:
+            return None
+        if self.cache.contains(self.request_key(region, duration_days, budget, interests, budget_min, budget_max, country)):
+            return None
+        waits = [backend.limiter.estimated_wait() for backend in self.backends if backend.limiter.limited]
+        retry_after = min(waits) if waits else float(os.getenv("AI_QUEUE_RETRY_AFTER", "10"))
+        return max(1, math.ceil(retry_after))
+    
+    async def stream_itinerary(
+        self,
+        region: str,
+        duration_days: int,
+        budget: str = "medio",
+        interests: list = None,
+        budget_min: int = None,
+        budget_max: int = None,
+        country: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Union[DayItinerary, ItineraryData]]]:
+        """Gera o roteiro em streaming.
+
+        Emite ("day", dia) assim que cada dia fica completo na resposta do
+        provider e, no fim, ("summary", roteiro_completo).
+        """
+        query = normalize_request(region, duration_days, budget, interests, budget_min, budget_max, country)
+        region, budget, interests = query.destination.label, query.budget, list(query.interests)
+        cache_key = query.key
+        if self.cache.contains(cache_key):
+            # Já em cache ou a ser gerado por outro pedido: não vale a pena fazer streaming
+            data = await self.generate_itinerary(region, duration_days, budget, interests, budget_min, budget_max)
+            for day in data.itinerary:
+                yield "day", day
+            yield "summary", data
+            return
         
-        interests_text = ", ".join(interests) if interests else "turismo geral"
-        
-        # Se budget_min e budget_max foram fornecidos, usar valores personalizados
-        if budget_min is not None and budget_max is not None:
-            daily_budget = f"€{budget_min}-{budget_max}"
-            # Calcular distribuição aproximada para refeições (60% do orçamento)
-            budget_avg = int((budget_min + budget_max) / 2)
-            meal_total = int(budget_avg * 0.6)
-            breakfast_cost = int(meal_total * 0.2)
-            lunch_cost = int(meal_total * 0.35)
-            dinner_cost = int(meal_total * 0.45)
-            attractions_budget = int(budget_avg * 0.3)
-            meal_budget = f"pequeno-almoço €{breakfast_cost-2}-{breakfast_cost+2}, almoço €{lunch_cost-5}-{lunch_cost+5}, jantar €{dinner_cost-5}-{dinner_cost+5}"
-            budget_category = "personalizado"
-        else:
-            # Define limites de orçamento por categoria (deprecated, manter para compatibilidade)
-            budget_ranges = {
-                "economico": ("€30-50", "pequeno-almoço €3-5, almoço €8-12, jantar €12-20"),
-                "medio": ("€60-90", "pequeno-almoço €5-8, almoço €15-25, jantar €25-40"),
-                "alto": ("€120-200", "pequeno-almoço €10-15, almoço €30-50, jantar €50-80")
-            }
-            daily_budget, meal_budget = budget_ranges.get(budget.lower(), budget_ranges["medio"])
-            budget_category = budget
-            # Valores padrão para compatibilidade
-            budget_min = 60 if budget == "medio" else (30 if budget == "economico" else 120)
-            budget_max = 90 if budget == "medio" else (50 if budget == "economico" else 200)
-            budget_avg = int((budget_min + budget_max) / 2)
-            breakfast_cost = 5
-            lunch_cost = 15
-            dinner_cost = 25
-            attractions_budget = int(budget_avg * 0.3)
+        # Pedidos idênticos em simultâneo (streaming ou não) esperam por esta geração
+        flight = self.cache.start_flight(cache_key)
+        try:
+            _degraded_reason.set(None)
+            pool = self._day_pool_key(region, budget, interests, budget_min, budget_max)
+            composed = self.day_cache.compose(pool, duration_days)
+            if composed.days:
+                # Os dias em cache saem já; os que faltam são gerados sem streaming
+                for index, day in enumerate(composed.days):
+                    yield "day", day.model_copy(update={"day": index + 1})
+                data, ok = await self._compose(composed, pool, region, duration_days, budget, interests, budget_min, budget_max)
+                for day in data.itinerary[len(composed.days):]:
+                    yield "day", day
+                self.cache.finish_flight(cache_key, flight, data, ok)
+                yield "summary", data
+                return
         
-        # Detecta se é um destino europeu fora de Portugal
-        is_portugal = any(term in region.lower() for term in ['portugal', 'lisboa', 'porto', 'algarve', 'douro', 'braga', 'coimbra', 'aveiro'])
-        location_context = "em Portugal" if is_portugal else "na Europa"
-        cuisine_type = "portuguesa" if is_portugal else "local do destino"
+            start = time.perf_counter()
+            plan = plan_day_ranges(duration_days, self.chunk_days, self.chunk_threshold)
+            # A primeira parte é feita em streaming; as restantes correm em paralelo
+            others = [
+                asyncio.ensure_future(
+                    self._generate_chunk(plan, index, region, duration_days, budget, interests, budget_min, budget_max)
+                )
+                for index in range(1, len(plan))
+            ]
+            merger = ItineraryMerger()
+            try:
+                first_start, first_end = plan[0]
+                prompt = self._build_prompt(
+                    region, duration_days, budget, interests, budget_min, budget_max,
+                    day_range=plan[0] if others else None,
+                    focus=chunk_focus(0) if others else None
+                )
+                parser = IncrementalItineraryParser(item_loader=DayItinerary.model_validate_json)
+                tier = self._budget_tier(budget, budget_min, budget_max)
+                async for chunk in self._stream_openai(prompt, region, first_end - first_start + 1, tier, (first_start, first_end)):
+                    for day in parser.feed(chunk):
+                        yield "day", merger.add_day(day)
+            
+                data = self._parse_response(parser.text)
+                if parser.items:
+                    # Os dias desta parte já foram emitidos
+                    data = data.model_copy(update={"itinerary": parser.items})
+                    merger.add_summary(data)
+                else:
+                    for day in merger.add(data):
+                        yield "day", day
+                # Resposta cortada: os dias em falta chegam depois dos já emitidos
+                repaired = await self._repair_missing_days(
+                    data, plan[0], region, duration_days, budget, interests, budget_min, budget_max
+                )
+                for day in merger.add(repaired):
+                    yield "day", day
+            
+                ok = _degraded_reason.get() is None
+                for task in others:
+                    data, chunk_ok = await task
+                    ok = ok and chunk_ok
+                    for day in merger.add(data):
+                        yield "day", day
+            finally:
+                for task in others:
+                    task.cancel()
         
-        prompt = f"""Crie um roteiro de viagem MUITO DETALHADO para {region.upper()} {location_context} com horários específicos das 8:00 às 19:00.
-
-**DESTINO OBRIGATÓRIO**: {region.upper()} (TODAS as atrações e restaurantes DEVEM ser de {region.upper()}, NÃO de outro lugar!)
-**Duração**: {duration_days} dia(s)
-**Orçamento Diário**: {daily_budget}
-**Categoria**: {budget_category}
-**Interesses**: {interests_text}
-
-IMPORTANTE: Crie um cronograma COMPLETO e DETALHADO com:
-1. **4-6 ATRAÇÕES por dia** - ocupar o dia inteiro das 9:00 às 19:00
-2. Horários específicos para cada atividade (formato 24h: "09:00")
-3. Duração realista de cada visita (1-3 horas por atração)
-4. 3 refeições por dia com restaurantes REAIS e preços AJUSTADOS ao orçamento {daily_budget}
-5. Tempo de deslocamento entre locais (15-30 min)
-6. Pausas estratégicas para café/descanso
-
-ESTRUTURA DO DIA:
-- 08:00 → Pequeno-almoço
-- 09:00-11:30 → Atração 1 (2.5h)
-- 11:30-12:00 → Deslocamento
-- 12:00-14:00 → Atração 2 (2h)
-- 13:00-14:00 → Almoço (pode ser durante visita ou depois)
-- 14:30-16:30 → Atração 3 (2h)
-- 16:30-17:00 → Pausa café/descanso
-- 17:00-18:30 → Atração 4 (1.5h)
-- 18:30-19:00 → Deslocamento
-- 19:00-20:30 → Jantar
-
-REGRAS DE ORÇAMENTO (diário: {daily_budget}):
-- Orçamento diário TOTAL: {daily_budget}
-- Refeições: {meal_budget}
-- Escolha atrações e restaurantes que se encaixem no orçamento especificado
-- Seja realista com os preços e sugestões
-
-Formato JSON OBRIGATÓRIO:
-{{
-  "itinerary": [
-    {{
-      "day": 1,
-      "title": "Explorando {region}",
-      "daily_budget": "{daily_budget}",
-      "places": [
-        {{
-          "name": "Atração Principal 1",
-          "description": "Descrição detalhada com contexto histórico/cultural",
-          "start_time": "09:00",
-          "end_time": "11:30",
-          "duration": "2.5 horas",
-          "entrance_fee": "€8-12 ou Gratuito",
-          "tips": "Dica prática útil"
-        }},
-        {{
-          "name": "Atração 2",
-          "description": "Descrição do local",
-          "start_time": "12:00",
-          "end_time": "13:30",
-          "duration": "1.5 horas",
-          "entrance_fee": "Gratuito",
-          "tips": "Dica útil"
-        }},
-        {{
-          "name": "Atração 3",
-          "description": "Descrição do local",
-          "start_time": "14:30",
-          "end_time": "16:30",
-          "duration": "2 horas",
-          "entrance_fee": "€5 ou Gratuito",
-          "tips": "Dica útil"
-        }},
-        {{
-          "name": "Atração 4",
-          "description": "Descrição do local",
-          "start_time": "17:00",
-          "end_time": "18:30",
-          "duration": "1.5 horas",
-          "entrance_fee": "Gratuito",
-          "tips": "Bom para pôr do sol"
-        }}
-      ],
-      "meals": [
-        {{
-          "type": "Pequeno-almoço",
-          "time": "08:00",
-          "restaurant": "Nome real do café/restaurante EM {region.upper()} (ajustado ao orçamento {daily_budget})",
-          "suggestion": "Opção típica {cuisine_type}",
-          "estimated_cost": "Preço real ajustado ao orçamento {daily_budget}",
-          "location": "Perto do hotel/primeiro local EM {region.upper()}"
-        }},
-        {{
-          "type": "Almoço",
-          "time": "13:00",
-          "restaurant": "Nome real do restaurante EM {region.upper()} (ajustado ao orçamento {daily_budget})",
-          "suggestion": "Prato típico de {region.upper()}",
-          "estimated_cost": "Preço real ajustado ao orçamento {daily_budget}",
-          "location": "Zona onde estará na hora EM {region.upper()}"
-        }},
-        {{
-          "type": "Jantar",
-          "time": "19:30",
-          "restaurant": "Nome real do restaurante EM {region.upper()} (categoria {budget})",
-          "suggestion": "Especialidade de {region.upper()}",
-          "estimated_cost": "Preço real ajustado ao orçamento {budget}",
-          "location": "Perto do hotel EM {region.upper()}"
-        }}
-      ],
-      "accommodation_suggestion": "Hotel específico ou zona recomendada"
-    }}
-  ],
-  "general_tips": [
-    "Dica prática 1",
-    "Dica de transporte específico para {region}",
-    "Dica de economia para orçamento {daily_budget}"
-  ],
-  "estimated_cost": "Custo TOTAL estimado para {duration_days} dias considerando orçamento diário {daily_budget} (inclui refeições, entradas, transporte local)",
-  "best_season": "Melhor época para visitar {region}"
-}}
-
-REGRAS CRÍTICAS DE ORÇAMENTO - MUITO IMPORTANTE:
-O orçamento diário é {daily_budget}. NUNCA EXCEDA ESTE VALOR!
-
-Distribuição obrigatória do orçamento:
-- 60% para refeições (3 por dia): {meal_budget}
-- 30% para atrações/entradas
-- 10% para transporte local
-
-LIMITES RIGOROSOS:
-- Pequeno-almoço: MAX {int((budget_min + budget_max) / 2 * 0.2)}€
-- Almoço: MAX {int((budget_min + budget_max) / 2 * 0.35)}€
-- Jantar: MAX {int((budget_min + budget_max) / 2 * 0.45)}€
-- TODAS as entradas somadas: MAX {int((budget_min + budget_max) / 2 * 0.3)}€
-
-NÚMERO DE ATRAÇÕES POR DIA - OBRIGATÓRIO:
-- MÍNIMO 4 atrações por dia
-- MÁXIMO 6 atrações por dia
-- Distribua ao longo do dia (9:00 às 19:00)
-- Inclua variedade: monumentos, parques, mercados, museus, miradouros, bairros históricos
-
-ORÇAMENTO BAIXO (€10-50/dia):
-- 4-6 atrações GRATUITAS por dia: parques, igrejas gratuitas, mercados, passeios a pé, miradouros, praias, bairros históricos
-- Inclua caminhadas por bairros típicos (1-2h cada)
-- Visite mercados locais (grátis para passear)
-- Explore jardins e parques públicos
-- Restaurantes: padarias, cafés locais, fast food local, supermercados
-- Transporte: público (metro/autocarro) ou a pé
-- SEM shows, tours pagos ou restaurantes caros
-
-ORÇAMENTO MÉDIO (€50-120/dia):
-- 4-6 atrações por dia (1-2 pagas + 3-4 gratuitas)
-- Mix inteligente: museu pago de manhã + parques/mercados gratuitos à tarde
-- Priorize as atrações pagas mais importantes
-- Restaurantes tradicionais de preço médio
-- Transporte público
-
-ORÇAMENTO ALTO (>€120/dia):
-- 5-6 atrações por dia (3-4 pagas + 2 gratuitas)
-- Pode incluir múltiplas atrações pagas premium
-- Tours guiados e experiências especiais
-- Restaurantes de qualidade
-- Táxis/transporte privado quando necessário
-
-VALIDAÇÃO OBRIGATÓRIA:
-Antes de sugerir qualquer atividade ou restaurante, verifique:
-1. A soma de TODAS as refeições do dia cabe no orçamento?
-2. A soma de TODAS as entradas do dia cabe no orçamento?
-3. O TOTAL do dia (refeições + entradas + transporte €5) está dentro de {daily_budget}?
-
-Se NÃO, escolha opções mais baratas ou gratuitas!
+            if not merger.itinerary:
+                for day in merger.add(self._error_itinerary()):
+                    yield "day", day
+            data = merger.result()
+            self.cache.finish_flight(cache_key, flight, data, ok)
+            if ok:
+                self.day_cache.add(pool, data, time.perf_counter() - start)
+            yield "summary", data
+        finally:
+            # Interrompida (cliente desligou, erro): quem esperava gera o roteiro
+            self.cache.finish_flight(cache_key, flight)
+    
+    async def generate_days(
+        self,
+        days: List[DayItinerary],
+        day_range: Tuple[int, int],
+        region: str,
+        duration_days: int,
+        budget: str = "medio",
+        interests: list = None,
+        budget_min: int = None,
+        budget_max: int = None,
+        focus: Optional[str] = None
+    ) -> ItineraryData:
+        """Gera só os dias `day_range` de um roteiro com os dias `days` (estender ou regenerar).
 
-Outras regras:
-- Dia começa às 8:00 (pequeno-almoço) e termina às 19:00 (jantar)
-- 4-6 atrações por dia OBRIGATÓRIO (ocupe o dia inteiro!)
-- Tempo realista em cada local: principais (2-3h), secundárias (1-1.5h), rápidas (30min-1h)
-- Varie o tipo de atrações: museus, parques, mercados, bairros, monumentos, miradouros
-- Inclua pausas estratégicas (café 15-30min entre atrações)
-- Restaurantes REAIS e conhecidos em {region}
-- Preços REALISTAS e atualizados
-- Horários práticos com tempo de deslocamento (15-30min entre locais)
-- Use idioma e contexto cultural apropriado para {region}
-- Distribua as atrações geograficamente de forma inteligente (evite ir de um lado para outro da cidade)
+        O provider recebe um resumo compacto dos outros dias em vez do roteiro
+        inteiro; os dias devolvidos vêm numerados dentro de `day_range` e sem
+        atrações que os outros dias já usam.
+        """
+        query = normalize_request(region, duration_days, budget, interests, budget_min, budget_max)
+        region, budget, interests = query.destination.label, query.budget, list(query.interests)
+        first, last = day_range
+        context = trip_context(days, day_range)
+        plan = [
+            (start + first - 1, end + first - 1)
+            for start, end in plan_day_ranges(last - first + 1, self.chunk_days, self.chunk_threshold)
+        ]
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._generate_chunk(
+                plan, index, region, duration_days, budget, interests, budget_min, budget_max,
+                focus=focus or REPAIR_FOCUS, trip_context=context, partial=True
+            )
+            for index in range(len(plan))
+        ])
+        merger = ItineraryMerger()
+        merger.used_places = {
+            place.name.strip().casefold()
+            for day in days if not first <= day.day <= last
+            for place in day.places
+        }
+        received = []
+        for (start_day, end_day), (data, _) in zip(plan, results):
+            part = data.model_copy(update={"itinerary": data.itinerary[:end_day - start_day + 1]})
+            received.extend(part.itinerary)
+            merger.add(part)
+        generated = merger.result()
+        generated = generated.model_copy(update={"itinerary": [
+            # Um dia só com atrações repetidas fica como veio (melhor do que um dia vazio)
+            (day if day.places else original).model_copy(update={"day": day.day + first - 1})
+            for day, original in zip(generated.itinerary, received)
+        ]})
+        # Dias feitos para o foco pedido por um utilizador não servem outras viagens
+        if all(ok for _, ok in results) and generated.itinerary and focus is None:
+            pool = self._day_pool_key(region, budget, interests, budget_min, budget_max)
+            self.day_cache.add(pool, generated, time.perf_counter() - start)
+        return generated
+    
+    @staticmethod
+    def request_key(
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int,
+        country: Optional[str] = None
+    ) -> Tuple:
+        """Chave canónica do pedido: ignora maiúsculas, acentos, aliases do destino e a ordem dos interesses"""
+        return normalize_request(region, duration_days, budget, interests, budget_min, budget_max, country).key
+    
+    async def _generate(
+        self,
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int
+    ) -> Tuple[ItineraryData, bool]:
+        """Gera o roteiro no provider; devolve (dados, pode_ficar_em_cache)"""
+        pool = self._day_pool_key(region, budget, interests, budget_min, budget_max)
+        composed = self.day_cache.compose(pool, duration_days)
+        if composed.days:
+            return await self._compose(composed, pool, region, duration_days, budget, interests, budget_min, budget_max)
+        start = time.perf_counter()
+        plan = plan_day_ranges(duration_days, self.chunk_days, self.chunk_threshold)
+        if len(plan) > 1:
+            data, ok = await self._generate_chunked(plan, region, duration_days, budget, interests, budget_min, budget_max)
+        else:
+            data, ok = await self._generate_chunk(plan, 0, region, duration_days, budget, interests, budget_min, budget_max)
+        if not data.itinerary:
+            # Nada aproveitável, nem depois de pedir os dias em falta
+            return self._error_itinerary(), False
+        if ok:
+            self.day_cache.add(pool, data, time.perf_counter() - start)
+        return data, ok
+    
+    def _day_pool_key(self, region: str, budget: str, interests: list, budget_min: int, budget_max: int) -> Tuple:
+        """Pedidos cujos dias são intercambiáveis: mesmo destino, escalão e interesses"""
+        query = normalize_request(region, 0, budget, interests, budget_min, budget_max)
+        return (query.destination.key, self._budget_tier(budget, budget_min, budget_max), query.interests)
+    
+    async def _compose(
+        self,
+        composed: ComposedDays,
+        pool: Tuple,
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int
+    ) -> Tuple[ItineraryData, bool]:
+        """Completa os dias em cache com os que faltam (gerados em partes, como uma
+        viagem longa) e junta tudo num único roteiro"""
+        cached = len(composed.days)
+        generated, ok = ItineraryData(), True
+        if cached < duration_days:
+            start = time.perf_counter()
+            offset = cached
+            plan = [
+                (first + offset, last + offset)
+                for first, last in plan_day_ranges(duration_days - cached, self.chunk_days, self.chunk_threshold)
+            ]
+            focus = compose_focus(composed.days)
+            results = await asyncio.gather(*[
+                self._generate_chunk(plan, index, region, duration_days, budget, interests, budget_min, budget_max, focus=focus)
+                for index in range(len(plan))
+            ])
+            merger = ItineraryMerger()
+            for data, _ in results:
+                merger.add(data)
+            generated, ok = merger.result(), all(chunk_ok for _, chunk_ok in results)
+            if ok and generated.itinerary:
+                self.day_cache.add(pool, generated, time.perf_counter() - start)
+        
+        merger = ItineraryMerger()
+        for day in composed.days:
+            merger.add_day(day)
+        # O custo estimado pelo provider já é o da viagem toda
+        merger.add(generated)
+        merger.add_summary(ItineraryData(general_tips=composed.general_tips, best_season=composed.best_season))
+        merger.estimated_cost = merger.estimated_cost or estimate_trip_cost(duration_days, budget, budget_min, budget_max)
+        log_event(
+            logger, logging.INFO, "composed_from_day_cache",
+            days=duration_days, cached_days=cached, generated_days=len(generated.itinerary),
+            seconds_saved=round(composed.seconds_saved, 2)
+        )
+        return merger.result(), ok
+    
+    async def _generate_chunked(
+        self,
+        plan: List[Tuple[int, int]],
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int
+    ) -> Tuple[ItineraryData, bool]:
+        """Gera uma viagem longa em partes paralelas e junta-as num único roteiro"""
+        log_event(logger, logging.INFO, "chunked_generation", days=duration_days, chunks=len(plan))
+        results = await asyncio.gather(*[
+            self._generate_chunk(plan, index, region, duration_days, budget, interests, budget_min, budget_max)
+            for index in range(len(plan))
+        ])
+        merger = ItineraryMerger()
+        for data, _ in results:
+            merger.add(data)
+        return merger.result(), all(ok for _, ok in results)
+    
+    async def _generate_chunk(
+        self,
+        plan: List[Tuple[int, int]],
+        index: int,
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int,
+        focus: Optional[str] = None,
+        trip_context: Optional[str] = None,
+        partial: bool = False
+    ) -> Tuple[ItineraryData, bool]:
+        """Gera a parte `index` do plano (ou a viagem toda, se o plano a cobrir numa só parte).
 
-Seja MUITO específico com nomes reais, endereços e preços REALISTAS de {region}. 
-Inclua dicas práticas sobre transporte local, melhores horários para visitar, e avisos importantes."""
+        `partial` indica que são só alguns dias de um roteiro existente (estender ou
+        regenerar): o prompt leva sempre o intervalo, o foco e o contexto dos outros
+        dias, mesmo que o plano cubra a viagem toda (ex: regenerar o dia de uma viagem de 1 dia).
+        """
+        _degraded_reason.set(None)
+        start, end = plan[index]
+        chunked = partial or plan != [(1, duration_days)]
+        prompt = self._build_prompt(
+            region, duration_days, budget, interests, budget_min, budget_max,
+            day_range=(start, end) if chunked else None,
+            focus=(focus or chunk_focus(index)) if chunked else None,
+            trip_context=trip_context
+        )
+        tier = self._budget_tier(budget, budget_min, budget_max)
+        response = await self._call_openai(prompt, region, end - start + 1, tier, (start, end))
+        data = self._parse_response(response)
+        repaired = await self._repair_missing_days(
+            data, (start, end), region, duration_days, budget, interests, budget_min, budget_max
+        )
+        if repaired.itinerary:
+            data = ItineraryData(
+                itinerary=sorted(data.itinerary + repaired.itinerary, key=lambda d: d.day),
+                general_tips=data.general_tips or repaired.general_tips,
+                estimated_cost=data.estimated_cost or repaired.estimated_cost,
+                best_season=data.best_season or repaired.best_season
+            )
+        return data, _degraded_reason.get() is None
+    
+    async def _repair_missing_days(
+        self,
+        data: ItineraryData,
+        day_range: Tuple[int, int],
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int
+    ) -> ItineraryData:
+        """Pede ao provider só os dias de `day_range` que faltam em `data`.
 
+        Devolve os dias recuperados (já numerados dentro do intervalo pedido)
+        e os campos de resumo que a resposta truncada não chegou a incluir.
+        """
+        missing = missing_days(data.itinerary, day_range)
+        if not missing:
+            return ItineraryData()
+        reason = _degraded_reason.get()
+        if not self.repair_missing_days or not self.router.backends or reason not in REPAIRABLE_REASONS:
+            if reason is None:
+                _degraded_reason.set("missing_days")
+            return ItineraryData()
+        
+        log_event(logger, logging.INFO, "repair_missing_days", reason=reason or "missing_days", days=missing)
+        merger = ItineraryMerger()
+        repaired = []
+        for start, end in group_day_ranges(missing):
+            prompt = self._build_prompt(
+                region, duration_days, budget, interests, budget_min, budget_max,
+                day_range=(start, end),
+                focus=REPAIR_FOCUS
+            )
+            response = await self._call_openai(
+                prompt, region, end - start + 1, self._budget_tier(budget, budget_min, budget_max), (start, end)
+            )
+            part = self._parse_response(response)
+            merger.add_summary(part)
+            repaired.extend(
+                day.model_copy(update={"day": start + offset})
+                for offset, day in enumerate(part.itinerary[:end - start + 1])
+            )
+        
+        if _degraded_reason.get() in REPAIRABLE_REASONS:
+            # Só fica em cache se todos os dias foram recuperados
+            _degraded_reason.set("missing_days" if len(repaired) < len(missing) else None)
+        summary = merger.result()
+        return ItineraryData(
+            itinerary=repaired,
+            general_tips=summary.general_tips or None,
+            estimated_cost=summary.estimated_cost,
+            best_season=summary.best_season
+        )
+    
+    def _parse_response(self, response: str) -> ItineraryData:
         try:
-            response = await self._call_openai(prompt, region, duration_days)
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Se a resposta não for JSON válido, tenta extrair
+            # from_json sem cache de strings + validate_python mede-se mais rápido
+            # do que validate_json nesta versão do pydantic-core (ver benchmarks/json_path.py)
+            with phase("parse"):
+                raw = from_json(response, cache_strings=False)
+            with phase("validate"):
+                return ITINERARY_ADAPTER.validate_python(raw)
+        except ValueError:
+            # JSON inválido, com texto à volta ou fora do esquema: tenta extrair
             return self._parse_text_response(response)
     
-    async def _call_openai(self, prompt: str, region: str = None, duration_days: int = None) -> str:
-        """Chama a API de IA (Groq ou OpenAI) com fallback para mock se não houver créditos"""
+    def _build_prompt(
+        self,
+        region: str,
+        duration_days: int,
+        budget: str,
+        interests: list,
+        budget_min: int,
+        budget_max: int,
+        day_range: Optional[Tuple[int, int]] = None,
+        focus: Optional[str] = None,
+        trip_context: Optional[str] = None
+    ) -> str:
+        """Monta o prompt do utilizador para o roteiro pedido (ou só para `day_range`)"""
+        with phase("prompt"):
+            return build_user_prompt(
+                region, duration_days, budget, interests, budget_min, budget_max, day_range, focus, trip_context
+            )
+    
+    @staticmethod
+    def _budget_tier(budget: str, budget_min: int, budget_max: int) -> str:
+        return budget_context(budget, budget_min, budget_max)["tier"]
+    
+    def _max_tokens_for(self, provider: str, tier: str, days: int) -> int:
+        """max_tokens aprendido para este provider/escalão/dias (ou a fórmula fixa, sem dados)"""
+        prior = self._max_tokens(days)
+        if not self.adaptive_max_tokens:
+            return prior
+        return self.token_budget.max_tokens(provider, tier, days, prior)
+    
+    def _max_tokens(self, days: int) -> int:
+        """Estimativa inicial de max_tokens pelo número de dias (usada até haver consumo observado)"""
+        # Fórmula escalável: ~550 tokens por dia + base de 1500
+        # Suporta até 14 dias dentro do limite de 8000 tokens do Groq
+        
+        # Cálculo dinâmico que se ajusta ao número de dias
+        if days <= 3:
+            # Viagens curtas: mais tokens por dia para detalhes
+            max_tokens = 1500 + (700 * days)  # ~3600 para 3 dias
+        elif days <= 7:
+            # Viagens médias: balanceado
+            max_tokens = 1500 + (600 * days)  # ~5700 para 7 dias
+        else:
+            # Viagens longas (8-14 dias): otimizado para caber no limite
+            max_tokens = 1500 + (550 * days)  # ~9200 para 14 dias
+        
+        # Limite absoluto do Groq: 8192 tokens (usamos 8000 para segurança)
+        return min(max_tokens, 8000)
+    
+    async def _call_openai(
+        self,
+        prompt: str,
+        region: str = None,
+        duration_days: int = None,
+        tier: str = "medio",
+        day_range: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """Chama a API de IA (via router de providers) com fallback para mock se nenhum responder"""
+        await self.start()
         # Modo de teste sem API key
-        if not self.client:
-            print("⚠️  Sem API key configurada. Usando modo mock...")
-            return self._generate_mock_response(region, duration_days)
+        if not self.router.backends:
+            self._record_mock_fallback("no_api_key")
+            return self._generate_mock_response(region, duration_days, day_range)
         
         try:
-            # Calcula max_tokens baseado no número de dias (otimizado para 14 dias)
-            # Fórmula escalável: ~550 tokens por dia + base de 1500
-            # Suporta até 14 dias dentro do limite de 8000 tokens do Groq
             days = duration_days if duration_days else 3
+            reserved: Dict[str, int] = {}
             
-            # Cálculo dinâmico que se ajusta ao número de dias
-            if days <= 3:
-                # Viagens curtas: mais tokens por dia para detalhes
-                max_tokens = 1500 + (700 * days)  # ~3600 para 3 dias
-            elif days <= 7:
-                # Viagens médias: balanceado
-                max_tokens = 1500 + (600 * days)  # ~5700 para 7 dias
-            else:
-                # Viagens longas (8-14 dias): otimizado para caber no limite
-                max_tokens = 1500 + (550 * days)  # ~9200 para 14 dias
-            
-            # Limite absoluto do Groq: 8192 tokens (usamos 8000 para segurança)
-            max_tokens = min(max_tokens, 8000)
+            def max_tokens_for(backend) -> Dict[str, Any]:
+                reserved[backend.name] = self._max_tokens_for(backend.name, tier, days)
+                return {"max_tokens": reserved[backend.name]}
             
-            print(f"📊 Gerando roteiro de {days} dias (max_tokens: {max_tokens})")
+            messages = build_messages(prompt)
+            # Chamada assíncrona: não bloqueia o event loop enquanto o provider gera
+            # (o router aplica a fila de RPM/TPM e o limite de concorrência)
+            self.pending += 1
+            try:
+                completion, backend = await self.router.complete(
+                    messages=messages,
+                    temperature=0.7,
+                    per_backend=max_tokens_for,
+                    prompt_tokens=sum(estimate_tokens(m["content"]) for m in messages),
+                    priority_delay=days * self.queue_day_weight
+                )
+            finally:
+                self.pending -= 1
             
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um especialista em turismo europeu, com conhecimento profundo sobre todos os países e regiões da Europa. Forneça roteiros detalhados, práticos e personalizados em formato JSON, sempre com informações reais sobre atrações, restaurantes, horários e preços atualizados de cada destino."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=max_tokens
+            usage = getattr(completion, "usage", None)
+            finish_reason = getattr(completion.choices[0], "finish_reason", None)
+            self.token_budget.record(
+                backend.name, tier, days, reserved[backend.name],
+                getattr(usage, "completion_tokens", None), finish_reason
+            )
+            tokens = self.prompt_stats.record(messages, usage)
+            input_tokens = tokens["prompt_tokens"] or tokens["estimated_input_tokens"]
+            output_tokens = getattr(usage, "completion_tokens", None)
+            metrics.prompt_tokens.observe(input_tokens, provider=backend.name)
+            if output_tokens is not None:
+                metrics.completion_tokens.observe(output_tokens, provider=backend.name)
+            log_event(
+                logger, logging.INFO, "completion",
+                provider=backend.name, days=days, finish_reason=finish_reason,
+                completion_tokens=output_tokens, max_tokens=reserved[backend.name],
+                prompt_tokens=input_tokens, cached_prompt_tokens=tokens["cached_prompt_tokens"] or 0
             )
-            
             return completion.choices[0].message.content
             
         except Exception as e:
-            # Log detalhado do erro
-            print(f"❌ ERRO DETALHADO: {type(e).__name__}: {str(e)}")
-            
-            # Se houver erro (sem créditos, rate limit, etc), usa mock
-            error_msg = str(e).lower()
-            if any(err in error_msg for err in ["insufficient_quota", "rate_limit", "429", "quota", "limit"]):
-                print(f"⚠️  IA sem créditos/limite atingido. Usando modo mock...")
-                return self._generate_mock_response(region, duration_days)
-            else:
-                # Outros erros, relança
-                print(f"❌ Erro inesperado na IA, usando mock: {e}")
-                return self._generate_mock_response(region, duration_days)
+            self._record_provider_error(e)
+            return self._generate_mock_response(region, duration_days, day_range)
     
-    def _generate_mock_response(self, region: str, duration_days: int) -> str:
-        """Gera resposta mock dinâmica para testes sem API key"""
-        
-        # Base de dados de atrações por região
-        attractions_db = {
-            "Porto": {
-                "places": [
-                    ("Torre dos Clérigos", "Torre icónica com 240 degraus e vista panorâmica de 360 graus sobre o Porto", "1-2 horas", "Compre bilhete combinado com a Igreja dos Clérigos"),
-                    ("Livraria Lello", "Uma das livrarias mais bonitas do mundo, inspiração para Harry Potter", "45 min - 1 hora", "Reserve online para evitar filas"),
-                    ("Ribeira", "Zona histórica à beira-rio com casas coloridas e restaurantes", "2-3 horas", "Passeie pelo cais e cruze a Ponte D. Luís I"),
-                    ("Caves de Vinho do Porto", "Visita às caves em Vila Nova de Gaia com provas", "2 horas", "Reserve visita guiada com degustação"),
-                    ("Palácio da Bolsa", "Palácio neoclássico com o impressionante Salão Árabe", "1-2 horas", "Visite com guia para conhecer a história"),
-                    ("Sé do Porto", "Catedral românica no topo da colina", "1 hora", "Visite o claustro e suba à torre"),
-                    ("Casa da Música", "Sala de concertos moderna com arquitetura única", "1-2 horas", "Faça visita guiada ou assista a um concerto"),
-                ],
-                "meals": [
-                    "Francesinha no Café Santiago",
-                    "Tripas à moda do Porto no Abadia do Porto",
-                    "Bacalhau no Cantinho do Avillez",
-                    "Petiscos no Mercado do Bolhão",
-                    "Bifana no Conga",
-                ],
-                "tips": [
-                    "Compre o Porto Card para transporte e entradas gratuitas",
-                    "Use o elétrico histórico linha 1 para ir até Foz",
-                    "Experimente uma francesinha, o prato típico do Porto",
-                    "Passeie pela Avenida dos Aliados e Rua Santa Catarina",
-                    "Vista-se em camadas - o tempo pode mudar rapidamente"
-                ],
-                "cost": "€60-100 por dia"
-            },
-            "Lisboa": {
-                "places": [
-                    ("Castelo de São Jorge", "Castelo medieval com vistas panorâmicas da cidade", "2-3 horas", "Visite de manhã cedo para evitar multidões"),
-                    ("Alfama", "Bairro mais antigo de Lisboa com ruas labirínticas", "3-4 horas", "Perca-se pelas ruelas e ouça fado"),
-                    ("Belém", "Zona histórica com mosteiro e torre emblemáticos", "4-5 horas", "Experimente pastéis de nata na Fábrica"),
-                    ("Oceanário", "Um dos maiores aquários da Europa", "2-3 horas", "Ideal para famílias"),
-                    ("Elevador de Santa Justa", "Elevador neo-gótico com vista sobre a cidade", "30 min - 1 hora", "Evite horas de ponta"),
-                    ("LX Factory", "Espaço cultural em antiga fábrica", "2-3 horas", "Perfeito para compras e café"),
-                    ("Miradouro da Graça", "Vista espetacular sobre Lisboa", "30 min - 1 hora", "Visite ao pôr-do-sol"),
-                ],
-                "meals": [
-                    "Pastéis de Belém na Fábrica de Pastéis",
-                    "Bacalhau à Brás no Zé da Mouraria",
-                    "Petiscos no Time Out Market",
-                    "Sardinhas assadas em Alfama",
-                    "Bifanas no O Trevo",
-                ],
-                "tips": [
-                    "Compre o Lisboa Card para transporte e museus gratuitos",
-                    "Use sapatos confortáveis - Lisboa tem muitas colinas",
-                    "Use os elétricos históricos (especialmente o 28)",
-                    "Reserve restaurantes de fado com antecedência",
-                    "Cuidado com carteiristas em zonas turísticas"
-                ],
-                "cost": "€50-90 por dia"
-            },
-            "Algarve": {
-                "places": [
-                    ("Praia da Marinha", "Uma das praias mais bonitas do mundo", "3-4 horas", "Vá cedo para estacionar"),
-                    ("Benagil Cave", "Gruta marinha icónica", "2-3 horas", "Reserve tour de barco ou caiaque"),
-                    ("Lagos", "Cidade histórica com praias deslumbrantes", "4-5 horas", "Visite Ponta da Piedade"),
-                    ("Albufeira", "Centro turístico com vida noturna", "3-4 horas", "Explore a cidade velha"),
-                    ("Sagres", "Ponto mais a sudoeste da Europa", "2-3 horas", "Visite a fortaleza e o cabo"),
-                    ("Tavira", "Cidade histórica tranquila", "3-4 horas", "Visite a ponte romana e igrejas"),
-                    ("Ria Formosa", "Parque natural com ilhas e praias desertas", "4-5 horas", "Faça tour de barco"),
-                ],
-                "meals": [
-                    "Cataplana de marisco em Lagos",
-                    "Peixe grelhado em Albufeira",
-                    "Percebes em Sagres",
-                    "Arroz de polvo em Tavira",
-                    "Sardinhas assadas na praia",
-                ],
-                "tips": [
-                    "Alugue carro para explorar a costa livremente",
-                    "Reserve hotéis com antecedência no verão",
-                    "Use protetor solar - o sol é muito forte",
-                    "Experimente a gastronomia do mar fresca",
-                    "Visite grutas de barco ou caiaque"
-                ],
-                "cost": "€70-120 por dia"
-            },
-            "Douro": {
-                "places": [
-                    ("Cruzeiro no Rio Douro", "Passeio de barco pelos vinhedos", "2-4 horas", "Reserve com antecedência"),
-                    ("Quinta do Seixo", "Quinta vinícola com provas", "2-3 horas", "Faça visita guiada"),
-                    ("Pinhão", "Vila no coração do Douro", "3-4 horas", "Veja os azulejos na estação"),
-                    ("Peso da Régua", "Capital do Vinho do Porto", "2-3 horas", "Visite o Museu do Douro"),
-                    ("Miradouro de São Leonardo de Galafura", "Vista espetacular sobre o vale", "1 hora", "Melhor ao nascer ou pôr-do-sol"),
-                    ("Lamego", "Cidade histórica com santuário", "3-4 horas", "Visite Nossa Senhora dos Remédios"),
-                ],
-                "meals": [
-                    "Cozido à portuguesa em quinta",
-                    "Polvo assado em Pinhão",
-                    "Vitela assada no Régua",
-                    "Enchidos regionais",
-                    "Queijos da região",
-                ],
-                "tips": [
-                    "Reserve provas de vinho com antecedência",
-                    "Melhor época: setembro/outubro (vindimas)",
-                    "Leve roupa confortável para caminhar nas quintas",
-                    "Combine cruzeiro com visita a quintas",
-                    "Designe motorista se for provar vinhos"
-                ],
-                "cost": "€80-150 por dia"
-            },
-            "Coimbra": {
-                "places": [
-                    ("Universidade de Coimbra", "Uma das universidades mais antigas da Europa", "2-3 horas", "Visite a Biblioteca Joanina obrigatoriamente"),
-                    ("Quinta das Lágrimas", "Jardim histórico e romântico", "1-2 horas", "Local da lenda de Pedro e Inês"),
-                    ("Mosteiro de Santa Clara-a-Velha", "Mosteiro gótico parcialmente submerso", "1-2 horas", "Veja o centro interpretativo"),
-                    ("Portugal dos Pequenitos", "Parque temático com monumentos em miniatura", "2-3 horas", "Ideal para famílias"),
-                    ("Sé Velha", "Catedral românica do século XII", "1 hora", "Uma das mais bem preservadas de Portugal"),
-                    ("Jardim Botânico", "Jardim histórico da universidade", "1-2 horas", "Perfeito para relaxar"),
-                ],
-                "meals": [
-                    "Chanfana no Zé Manel dos Ossos",
-                    "Leitão à Bairrada na Mealhada",
-                    "Arroz de lampreia (época)",
-                    "Pastéis de Santa Clara",
-                    "Tapas no Loggia",
-                ],
-                "tips": [
-                    "Caminhe pela Baixa até à Universidade",
-                    "Ouça fado de Coimbra (diferente do de Lisboa)",
-                    "Vista roupa confortável para subir à Alta",
-                    "Visite durante a semana académica (maio)",
-                    "Experimente os pastéis de Santa Clara"
-                ],
-                "cost": "€45-75 por dia"
-            },
-            "Braga": {
-                "places": [
-                    ("Bom Jesus do Monte", "Santuário com escadaria monumental", "2-3 horas", "Suba de funicular ou pelas escadas"),
-                    ("Centro Histórico de Braga", "Cidade dos arcebispos", "3-4 horas", "Visite a Sé Catedral"),
-                    ("Santuário do Sameiro", "Vista panorâmica sobre Braga", "1-2 horas", "Ideal ao pôr-do-sol"),
-                    ("Guimarães", "Berço da Nação Portuguesa", "4-5 horas", "Visite o castelo e paço dos duques"),
-                    ("Citânia de Briteiros", "Castro pré-romano", "2 horas", "Um dos mais bem preservados"),
-                    ("Termas Romanas", "Ruínas romanas no centro", "1 hora", "Entrada gratuita"),
-                ],
-                "meals": [
-                    "Bacalhau à Narcisa",
-                    "Papas de sarrabulho",
-                    "Rojões à minhota",
-                    "Pudim Abade de Priscos",
-                    "Vinho Verde da região",
-                ],
-                "tips": [
-                    "Braga é conhecida como Roma Portuguesa",
-                    "Combine visita a Braga e Guimarães",
-                    "Experimente a gastronomia minhota",
-                    "Visite durante a Semana Santa (procissões)",
-                    "Use transporte público entre cidades"
-                ],
-                "cost": "€50-80 por dia"
-            },
-            "Aveiro": {
-                "places": [
-                    ("Passeio de Moliceiro", "Tour pelos canais de Aveiro", "45 min - 1 hora", "Melhor forma de conhecer a cidade"),
-                    ("Costa Nova", "Praias com casas às riscas", "2-3 horas", "Ótimo para fotos"),
-                    ("Barra e Farol", "Maior farol de Portugal", "1-2 horas", "Vista espetacular"),
-                    ("Centro Histórico", "Museu Arte Nova e praças", "2-3 horas", "Arquitetura única"),
-                    ("Ílhavo e Museu do Bacalhau", "História marítima", "2 horas", "Imperdível"),
-                    ("Praia da Barra", "Praia urbana com ondas", "2-3 horas", "Ideal para surf"),
-                ],
-                "meals": [
-                    "Ovos moles (doce típico)",
-                    "Enguias fritas",
-                    "Caldeirada de peixe",
-                    "Tripas de Aveiro (doce)",
-                    "Leitão da Bairrada",
-                ],
-                "tips": [
-                    "A Veneza de Portugal tem clima marítimo",
-                    "Compre ovos moles para levar",
-                    "Combine praia e cidade num dia",
-                    "Alugue bicicleta para explorar",
-                    "Visite o mercado do peixe"
-                ],
-                "cost": "€50-85 por dia"
-            },
-            "Sintra": {
-                "places": [
-                    ("Palácio da Pena", "Palácio colorido no topo da serra", "2-3 horas", "Reserve online para evitar filas"),
-                    ("Quinta da Regaleira", "Palácio com poço iniciático", "2-3 horas", "Explore os jardins e túneis"),
-                    ("Castelo dos Mouros", "Ruínas mouriscas com vista", "1-2 horas", "Caminhe pelas muralhas"),
-                    ("Palácio Nacional de Sintra", "Palácio com chaminés cónicas", "1-2 horas", "No centro da vila"),
-                    ("Cabo da Roca", "Ponto mais ocidental da Europa", "1 hora", "Leve certificado"),
-                    ("Praia da Adraga", "Praia selvagem e dramática", "2 horas", "Cuidado com correntes"),
-                ],
-                "meals": [
-                    "Travesseiros de Sintra",
-                    "Queijadas de Sintra",
-                    "Marisco em Azenhas do Mar",
-                    "Petiscos na Vila",
-                    "Café no Palácio de Seteais",
-                ],
-                "tips": [
-                    "Chegue cedo para evitar multidões",
-                    "Use o autocarro 434 entre palácios",
-                    "Reserve pelo menos um dia inteiro",
-                    "Leve casaco - pode estar frio no topo",
-                    "Compre bilhete combinado para palácios"
-                ],
-                "cost": "€60-100 por dia"
-            },
-            "Cascais": {
-                "places": [
-                    ("Boca do Inferno", "Formação rochosa dramática", "30 min - 1 hora", "Melhor com mar agitado"),
-                    ("Centro Histórico", "Marina e praias urbanas", "2-3 horas", "Perfeito para passear"),
-                    ("Praia do Guincho", "Praia ventosa ideal para surf", "2-3 horas", "Cuidado com ondas fortes"),
-                    ("Museu Condes Castro Guimarães", "Palácio à beira-mar", "1-2 horas", "Arquitetura única"),
-                    ("Cidadela de Cascais", "Fortaleza com galerias arte", "1-2 horas", "Entrada gratuita"),
-                    ("Estoril e Casino", "Zona elegante e casino", "2-3 horas", "Passeie pelo calçadão"),
-                ],
-                "meals": [
-                    "Peixe fresco no mercado",
-                    "Marisco no Porto de Santa Maria",
-                    "Santola no Baía do Peixe",
-                    "Gelados na Santini",
-                    "Brunch no The Lisbonaire",
-                ],
-                "tips": [
-                    "Combine com visita a Sintra",
-                    "Alugue bicicleta para ciclovia costeira",
-                    "Visite o mercado da vila",
-                    "Cascais é mais calma que Lisboa",
-                    "Experimente desportos aquáticos"
-                ],
-                "cost": "€70-120 por dia"
-            },
-            "Alentejo": {
-                "places": [
-                    ("Évora - Centro Histórico", "Cidade Património Mundial UNESCO", "4-5 horas", "Visite o Templo Romano e Capela dos Ossos"),
-                    ("Monsaraz", "Vila medieval amuralhada", "2-3 horas", "Vista sobre o Alqueva"),
-                    ("Cromeleque dos Almendres", "Círculo de pedras megalítico", "1 hora", "Stonehenge português"),
-                    ("Barragem do Alqueva", "Maior lago artificial da Europa", "2-3 horas", "Faça passeio de barco"),
-                    ("Elvas", "Fortificações impressionantes", "3-4 horas", "Património Mundial"),
-                    ("Marvão", "Vila no topo da serra", "2-3 horas", "Vista de 360 graus"),
-                ],
-                "meals": [
-                    "Açorda alentejana",
-                    "Porco preto ibérico",
-                    "Migas com carne de porco",
-                    "Queijo de Serpa",
-                    "Vinhos do Alentejo",
-                ],
-                "tips": [
-                    "Verões muito quentes - visite cedo",
-                    "Alugue carro - distâncias grandes",
-                    "Prove os vinhos da região",
-                    "Visite planícies douradas no verão",
-                    "Observe estrelas no Dark Sky Reserve"
-                ],
-                "cost": "€55-90 por dia"
-            },
-        }
-        
-        # Usar dados da região ou fallback para dados genéricos
-        region_data = attractions_db.get(region, attractions_db["Lisboa"])
-        places_pool = region_data["places"]
-        meals_pool = region_data["meals"]
-        tips = region_data["tips"]
-        cost = region_data["cost"]
-        
-        # Gerar itinerário para cada dia
-        itinerary = []
-        places_per_day = max(2, min(4, len(places_pool) // max(1, duration_days)))
-        
-        # Definir horários e custos de refeições por região
-        breakfast_places = {
-            "Porto": [("Café Majestic", "€8-12"), ("Confeitaria do Bolhão", "€5-8")],
-            "Lisboa": [("Pastelaria de Belém", "€6-10"), ("Café A Brasileira", "€8-12")],
-            "Algarve": [("Café del Mar", "€10-15"), ("Pastelaria Vilamoura", "€7-12")],
-        }
-        
-        lunch_places = {
-            "Porto": [("Cantinho do Avillez", "€20-30"), ("Tapabento", "€18-28"), ("Mercado do Bolhão", "€12-20")],
-            "Lisboa": [("Time Out Market", "€15-25"), ("Cervejaria Ramiro", "€30-45"), ("Taberna da Rua das Flores", "€20-30")],
-            "Algarve": [("Restaurante O Marinheiro", "€25-40"), ("Vila Joya", "€50-80"), ("Casa do Polvo", "€20-35")],
-        }
-        
-        dinner_places = {
-            "Porto": [("The Yeatman", "€40-65"), ("Pedro Lemos", "€45-70"), ("Antiqvvm", "€35-55")],
-            "Lisboa": [("Belcanto", "€80-120"), ("Bairro do Avillez", "€30-50"), ("Solar dos Presuntos", "€35-55")],
-            "Algarve": [("Ocean Restaurant", "€60-90"), ("NoSoloÁgua", "€30-50"), ("A Vela", "€25-40")],
-        }
+    async def _stream_openai(
+        self,
+        prompt: str,
+        region: str = None,
+        duration_days: int = None,
+        tier: str = "medio",
+        day_range: Optional[Tuple[int, int]] = None
+    ) -> AsyncIterator[str]:
+        """Versão em streaming de `_call_openai`: emite o texto à medida que o provider o gera"""
+        await self.start()
+        if not self.router.backends:
+            self._record_mock_fallback("no_api_key")
+            yield self._generate_mock_response(region, duration_days, day_range)
+            return
         
-        # Fallback genérico
-        breakfast_default = [("Café Local", "€6-10"), ("Pastelaria Tradicional", "€7-12")]
-        lunch_default = [("Restaurante Típico", "€18-28"), ("Tasca Local", "€15-25")]
-        dinner_default = [("Restaurante Tradicional", "€25-40"), ("Casa de Fados", "€30-50")]
+        days = duration_days if duration_days else 3
+        reserved: Dict[str, int] = {}
         
-        breakfast_opts = breakfast_places.get(region, breakfast_default)
-        lunch_opts = lunch_places.get(region, lunch_default)
-        dinner_opts = dinner_places.get(region, dinner_default)
+        def max_tokens_for(backend) -> Dict[str, Any]:
+            reserved[backend.name] = self._max_tokens_for(backend.name, tier, days)
+            log_event(logger, logging.INFO, "stream_started", provider=backend.name, days=days, max_tokens=reserved[backend.name])
+            return {"max_tokens": reserved[backend.name]}
         
-        for day in range(1, duration_days + 1):
-            day_places = []
-            current_time = 9  # Começa às 9:00 (após pequeno-almoço às 8:00)
-            
-            start_idx = (day - 1) * places_per_day
-            end_idx = min(start_idx + places_per_day, len(places_pool))
-            
-            for i in range(start_idx, end_idx):
-                if i < len(places_pool):
-                    place = places_pool[i]
-                    
-                    # Determinar duração em horas
-                    duration_text = place[2]
-                    if "3-4" in duration_text or "4-5" in duration_text:
-                        duration_hours = 3.5
-                    elif "2-3" in duration_text:
-                        duration_hours = 2.5
-                    elif "1-2" in duration_text:
-                        duration_hours = 1.5
-                    else:
-                        duration_hours = 1
-                    
-                    start_hour = int(current_time)
-                    start_min = int((current_time - start_hour) * 60)
-                    end_time_val = current_time + duration_hours
-                    end_hour = int(end_time_val)
-                    end_min = int((end_time_val - end_hour) * 60)
-                    
-                    day_places.append({
-                        "name": place[0],
-                        "description": place[1],
-                        "start_time": f"{start_hour:02d}:{start_min:02d}",
-                        "end_time": f"{end_hour:02d}:{end_min:02d}",
-                        "duration": place[2],
-                        "entrance_fee": "€5-15" if "museu" in place[0].lower() or "palácio" in place[0].lower() else "Grátis",
-                        "tips": place[3]
-                    })
-                    
-                    current_time = end_time_val + 0.5  # 30 min para deslocamento
-                    
-                    # Pausa para almoço se passar das 12:30
-                    if current_time >= 12.5 and current_time < 14:
-                        current_time = 14  # Almoço das 12:30 às 14:00
-            
-            # Título do dia
-            if day == 1:
-                title = f"Descobrindo {region}"
-            elif day == duration_days:
-                title = f"Último Dia em {region}"
-            else:
-                title = f"Explorando {region} - Dia {day}"
-            
-            # Refeições do dia com horários e preços
-            breakfast_idx = (day - 1) % len(breakfast_opts)
-            lunch_idx = (day - 1) % len(lunch_opts)
-            dinner_idx = (day - 1) % len(dinner_opts)
-            
-            day_meals = [
-                {
-                    "type": "Pequeno-almoço",
-                    "time": "08:00",
-                    "restaurant": breakfast_opts[breakfast_idx][0],
-                    "suggestion": "Pastel de nata, torrada e café",
-                    "estimated_cost": breakfast_opts[breakfast_idx][1],
-                    "location": "Perto do hotel"
-                },
-                {
-                    "type": "Almoço",
-                    "time": "13:00",
-                    "restaurant": lunch_opts[lunch_idx][0],
-                    "suggestion": meals_pool[lunch_idx % len(meals_pool)],
-                    "estimated_cost": lunch_opts[lunch_idx][1],
-                    "location": "Centro histórico"
-                },
-                {
-                    "type": "Jantar",
-                    "time": "19:30",
-                    "restaurant": dinner_opts[dinner_idx][0],
-                    "suggestion": meals_pool[(lunch_idx + 1) % len(meals_pool)],
-                    "estimated_cost": dinner_opts[dinner_idx][1],
-                    "location": "Zona ribeirinha"
-                }
-            ]
-            
-            itinerary.append({
-                "day": day,
-                "title": title,
-                "daily_budget": cost,
-                "places": day_places,
-                "meals": day_meals,
-                "accommodation_suggestion": f"Hotel no centro de {region} para fácil acesso"
-            })
-        
-        response_data = {
-            "itinerary": itinerary,
-            "general_tips": tips,
-            "estimated_cost": cost,
-            "best_season": "Primavera (Abril-Junho) ou Outono (Setembro-Outubro) - clima agradável"
-        }
-        
-        return json.dumps(response_data, ensure_ascii=False)
+        messages = build_messages(prompt)
+        self.prompt_stats.record(messages)
+        input_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        parts: List[str] = []
+        self.pending += 1
+        try:
+            async for delta, finish_reason, backend in self.router.stream(
+                messages=messages,
+                temperature=0.7,
+                per_backend=max_tokens_for,
+                prompt_tokens=input_tokens,
+                priority_delay=days * self.queue_day_weight
+            ):
+                if delta:
+                    parts.append(delta)
+                    yield delta
+                if finish_reason:
+                    # Sem usage no streaming: estima os tokens de saída pelo texto
+                    output_tokens = estimate_tokens("".join(parts))
+                    self.token_budget.record(
+                        backend.name, tier, days, reserved[backend.name],
+                        output_tokens, finish_reason
+                    )
+                    metrics.prompt_tokens.observe(input_tokens, provider=backend.name)
+                    metrics.completion_tokens.observe(output_tokens, provider=backend.name)
+        except Exception as e:
+            if parts:
+                # Os dias já emitidos mantêm-se; o resto da resposta perdeu-se
+                log_event(logger, logging.WARNING, "stream_interrupted", error_type=type(e).__name__, error=str(e))
+                _degraded_reason.set("stream_interrupted")
+                return
+            self._record_provider_error(e)
+            yield self._generate_mock_response(region, duration_days, day_range)
+        finally:
+            self.pending -= 1
+    
+    def _record_provider_error(self, e: Exception):
+        """Regista o erro do provider antes do fallback para mock"""
+        # Se todos os providers falharem (sem créditos, rate limit, circuito aberto...), usa mock
+        reason = classify_error(e)
+        self._record_mock_fallback(reason, error_type=type(e).__name__, error=str(e))
+        _degraded_reason.set(reason)
+    
+    @staticmethod
+    def _record_mock_fallback(reason: str, **fields):
+        metrics.mock_fallbacks.inc(reason=reason)
+        log_event(logger, logging.WARNING, "mock_fallback", reason=reason, **fields)
+    
+    def _generate_mock_response(self, region: str, duration_days: int, day_range: Optional[Tuple[int, int]] = None) -> str:
+        """Gera resposta mock dinâmica para testes sem API key (só os dias de `day_range`, se indicado)"""
+        if day_range is not None:
+            return mock_itinerary_json(region or "Lisboa", day_range[1], day_range[0])
+        return mock_itinerary_json(region or "Lisboa", duration_days or 3)
     
-    def _parse_text_response(self, text: str) -> Dict[str, Any]:
-        """Fallback para parsing de resposta de texto"""
-        # Tenta extrair JSON da resposta
+    def _parse_text_response(self, text: str) -> ItineraryData:
+        """Fallback para respostas truncadas, com texto à volta ou fora do esquema.
+
+        Aproveita todos os dias completos e válidos e os campos de topo que
+        chegaram inteiros; os dias em falta são pedidos depois pelo chamador.
+        """
+        self._save_salvage_sample(text)
+        with phase("salvage"):
+            days, fields, finished = salvage_json_object(text, item_loader=DayItinerary.model_validate_json)
+        if not days:
+            _degraded_reason.set("parse_error")
+            metrics.parse_failures.inc(reason="parse_error")
+        elif not finished:
+            _degraded_reason.set("truncated")
+            metrics.parse_failures.inc(reason="truncated")
+        tips = fields.get("general_tips")
+        cost = fields.get("estimated_cost")
+        season = fields.get("best_season")
+        return ItineraryData(
+            itinerary=days,
+            general_tips=[str(tip) for tip in tips if isinstance(tip, (str, int, float))] if isinstance(tips, list) else None,
+            estimated_cost=str(cost) if cost is not None else None,
+            best_season=str(season) if season is not None else None
+        )
+    
+    def _save_salvage_sample(self, text: str):
+        """Guarda a resposta em SALVAGE_CORPUS_DIR (se configurado) para alimentar o corpus"""
+        if not self.salvage_corpus_dir:
+            return
         try:
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            if start != -1 and end > start:
-                json_str = text[start:end]
-                return json.loads(json_str)
-        except:
-            pass
-        
-        # Se falhar, retorna estrutura básica válida
-        return {
-            "itinerary": [{
-                "day": 1,
-                "title": "Erro ao processar resposta",
-                "places": [{
-                    "name": "Serviço temporariamente indisponível",
-                    "description": "Houve um erro ao processar sua solicitação. Por favor, tente novamente em alguns instantes.",
-                    "duration": "N/A",
-                    "start_time": None,
-                    "end_time": None,
-                    "entrance_fee": None,
-                    "tips": "Se o erro persistir, tente com menos dias ou menos interesses."
-                }],
-                "meals": [],
-                "daily_budget": None,
-                "accommodation_suggestion": None
-            }],
-            "general_tips": ["Tente novamente em alguns instantes", "O serviço pode estar com limite de requisições"],
-            "estimated_cost": "N/A",
-            "best_season": "Todo o ano"
-        }
+            os.makedirs(self.salvage_corpus_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{abs(hash(text)) % 10**8:08d}.txt"
+            with open(os.path.join(self.salvage_corpus_dir, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            log_event(logger, logging.WARNING, "salvage_sample_failed", error=str(e))
+    
+    @staticmethod
+    def _error_itinerary() -> ItineraryData:
+        """Roteiro de erro, usado só quando não foi possível aproveitar nenhum dia"""
+        _degraded_reason.set("parse_error")
+        return ItineraryData(
+            itinerary=[DayItinerary(
+                day=1,
+                title="Erro ao processar resposta",
+                places=[Place(
+                    name="Serviço temporariamente indisponível",
+                    description="Houve um erro ao processar sua solicitação. Por favor, tente novamente em alguns instantes.",
+                    duration="N/A",
+                    tips="Se o erro persistir, tente com menos dias ou menos interesses."
+                )],
+                meals=[]
+            )],
+            general_tips=["Tente novamente em alguns instantes", "O serviço pode estar com limite de requisições"],
+            estimated_cost="N/A",
+            best_season="Todo o ano"
+        )
 
 # Instância global
 openai_service = OpenAIService()
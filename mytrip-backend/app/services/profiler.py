@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+class StackSampler:
+    """Profiler por amostragem: uma thread lê a stack da thread do event loop
+    a cada `interval` s e conta as stacks no formato "folded" (`a;b;c N`),
+    que o flamegraph.pl, o speedscope e o inferno leem diretamente.
+
+    Corre na mesma thread que os outros pedidos, pelo que as amostras incluem
+    o que o event loop estiver a fazer por eles; o tempo à espera de I/O
+    (ex: do provider) aparece como o `select` do event loop.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        """Começa a amostrar a thread que chama este método"""
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Para o profiler e devolve as stacks no formato folded"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
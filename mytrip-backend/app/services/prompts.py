@@ -0,0 +1,282 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.normalization import resolve_destination
+
+# Prefixo estático (mensagem de sistema): igual em todos os pedidos, para que o
+# provider possa reaproveitar a cache de prompt. NÃO colocar aqui nada que
+# dependa do pedido (destino, orçamento, dias...).
+SYSTEM_PREFIX = """Você é um especialista em turismo europeu, com conhecimento profundo sobre todos os países e regiões da Europa. Forneça roteiros detalhados, práticos e personalizados em formato JSON, sempre com informações reais sobre atrações, restaurantes, horários e preços atualizados de cada destino.
+
+Crie sempre um cronograma COMPLETO e DETALHADO com:
+1. **4-6 ATRAÇÕES por dia** - ocupar o dia inteiro das 9:00 às 19:00
+2. Horários específicos para cada atividade (formato 24h: "09:00")
+3. Duração realista de cada visita (1-3 horas por atração)
+4. 3 refeições por dia com restaurantes REAIS e preços AJUSTADOS ao orçamento diário pedido
+5. Tempo de deslocamento entre locais (15-30 min)
+6. Pausas estratégicas para café/descanso
+
+ESTRUTURA DO DIA:
+- 08:00 → Pequeno-almoço
+- 09:00-11:30 → Atração 1 (2.5h)
+- 11:30-12:00 → Deslocamento
+- 12:00-14:00 → Atração 2 (2h)
+- 13:00-14:00 → Almoço (pode ser durante visita ou depois)
+- 14:30-16:30 → Atração 3 (2h)
+- 16:30-17:00 → Pausa café/descanso
+- 17:00-18:30 → Atração 4 (1.5h)
+- 18:30-19:00 → Deslocamento
+- 19:00-20:30 → Jantar
+
+Distribuição obrigatória do orçamento diário:
+- 60% para refeições (3 por dia)
+- 30% para atrações/entradas
+- 10% para transporte local
+
+VALIDAÇÃO OBRIGATÓRIA:
+Antes de sugerir qualquer atividade ou restaurante, verifique:
+1. A soma de TODAS as refeições do dia cabe no orçamento?
+2. A soma de TODAS as entradas do dia cabe no orçamento?
+3. O TOTAL do dia (refeições + entradas + transporte €5) está dentro do orçamento diário?
+Se NÃO, escolha opções mais baratas ou gratuitas!
+
+Outras regras:
+- TODAS as atrações e restaurantes DEVEM ser do destino pedido, NÃO de outro lugar
+- Dia começa às 8:00 (pequeno-almoço) e termina às 19:00 (jantar)
+- 4-6 atrações por dia OBRIGATÓRIO (ocupe o dia inteiro!)
+- Tempo realista em cada local: principais (2-3h), secundárias (1-1.5h), rápidas (30min-1h)
+- Varie o tipo de atrações: monumentos, parques, mercados, museus, miradouros, bairros históricos
+- Inclua pausas estratégicas (café 15-30min entre atrações)
+- Restaurantes REAIS e conhecidos no destino
+- Preços REALISTAS e atualizados
+- Horários práticos com tempo de deslocamento (15-30min entre locais)
+- Use idioma e contexto cultural apropriado para o destino
+- Distribua as atrações geograficamente de forma inteligente (evite ir de um lado para outro da cidade)
+- Seja MUITO específico com nomes reais, endereços e preços REALISTAS
+- Inclua dicas práticas sobre transporte local, melhores horários para visitar, e avisos importantes
+
+Responda APENAS com JSON válido neste formato OBRIGATÓRIO (um objeto por dia em "itinerary"):
+{
+  "itinerary": [
+    {
+      "day": 1,
+      "title": "Título do dia",
+      "daily_budget": "€60-90",
+      "places": [
+        {
+          "name": "Nome real da atração",
+          "description": "Descrição detalhada com contexto histórico/cultural",
+          "start_time": "09:00",
+          "end_time": "11:30",
+          "duration": "2.5 horas",
+          "entrance_fee": "€8-12 ou Gratuito",
+          "tips": "Dica prática útil"
+        }
+      ],
+      "meals": [
+        {
+          "type": "Pequeno-almoço",
+          "time": "08:00",
+          "restaurant": "Nome real do café/restaurante no destino",
+          "suggestion": "Opção típica",
+          "estimated_cost": "Preço real ajustado ao orçamento",
+          "location": "Perto do hotel/primeiro local"
+        },
+        {"type": "Almoço", "time": "13:00", "restaurant": "...", "suggestion": "...", "estimated_cost": "...", "location": "..."},
+        {"type": "Jantar", "time": "19:30", "restaurant": "...", "suggestion": "...", "estimated_cost": "...", "location": "..."}
+      ],
+      "accommodation_suggestion": "Hotel específico ou zona recomendada"
+    }
+  ],
+  "general_tips": ["Dica prática", "Dica de transporte", "Dica de economia"],
+  "estimated_cost": "Custo TOTAL estimado da viagem (refeições, entradas, transporte local)",
+  "best_season": "Melhor época para visitar"
+}"""
+
+# Regras específicas de cada escalão de orçamento: só a do pedido é enviada
+BUDGET_TIER_RULES = {
+    "baixo": """ORÇAMENTO BAIXO (€10-50/dia):
+- 4-6 atrações GRATUITAS por dia: parques, igrejas gratuitas, mercados, passeios a pé, miradouros, praias, bairros históricos
+- Inclua caminhadas por bairros típicos (1-2h cada)
+- Visite mercados locais (grátis para passear)
+- Explore jardins e parques públicos
+- Restaurantes: padarias, cafés locais, fast food local, supermercados
+- Transporte: público (metro/autocarro) ou a pé
+- SEM shows, tours pagos ou restaurantes caros
+- entrance_fee: quase sempre "Gratuito\"""",
+    "medio": """ORÇAMENTO MÉDIO (€50-120/dia):
+- 4-6 atrações por dia (1-2 pagas + 3-4 gratuitas)
+- Mix inteligente: museu pago de manhã + parques/mercados gratuitos à tarde
+- Priorize as atrações pagas mais importantes
+- Restaurantes tradicionais de preço médio
+- Transporte público
+- entrance_fee: ex. "€8-12" nas pagas, "Gratuito" nas restantes""",
+    "alto": """ORÇAMENTO ALTO (>€120/dia):
+- 5-6 atrações por dia (3-4 pagas + 2 gratuitas)
+- Pode incluir múltiplas atrações pagas premium
+- Tours guiados e experiências especiais
+- Restaurantes de qualidade
+- Táxis/transporte privado quando necessário
+- entrance_fee: ex. "€15-30" em museus/tours, "Gratuito" nas restantes""",
+}
+
+# Escalões de orçamento antigos (deprecated, manter para compatibilidade)
+LEGACY_BUDGETS = {
+    "economico": (30, 50, "pequeno-almoço €3-5, almoço €8-12, jantar €12-20"),
+    "medio": (60, 90, "pequeno-almoço €5-8, almoço €15-25, jantar €25-40"),
+    "alto": (120, 200, "pequeno-almoço €10-15, almoço €30-50, jantar €50-80"),
+}
+
+USER_TEMPLATE = """Crie um roteiro de viagem MUITO DETALHADO para {region_upper} {location_context} com horários específicos das 8:00 às 19:00.
+
+**DESTINO OBRIGATÓRIO**: {region_upper} (TODAS as atrações e restaurantes DEVEM ser de {region_upper}, NÃO de outro lugar!)
+**Duração**: {duration_days} dia(s)
+**Orçamento Diário**: {daily_budget}
+**Categoria**: {budget_category}
+**Interesses**: {interests_text}
+{part_text}
+REGRAS CRÍTICAS DE ORÇAMENTO - O orçamento diário é {daily_budget}. NUNCA EXCEDA ESTE VALOR!
+- Refeições: {meal_budget}
+- Pequeno-almoço: MAX {breakfast_max}€
+- Almoço: MAX {lunch_max}€
+- Jantar: MAX {dinner_max}€
+- TODAS as entradas somadas: MAX {attractions_max}€
+
+{tier_rules}
+
+Cozinha: {cuisine_type}. Restaurantes REAIS de {region}, com preços ajustados ao orçamento {daily_budget}.
+"estimated_cost": custo TOTAL para {duration_days} dias com orçamento diário {daily_budget}.
+"best_season": melhor época para visitar {region}."""
+
+PART_TEMPLATE = """
+**PARTE DA VIAGEM**: Gere APENAS os dias {start} a {end} (numerados de {start} a {end}) de uma viagem de {duration_days} dias. Os restantes dias são planeados em separado.
+**Foco destes dias**: {focus}. Dê prioridade a atrações deste foco para não repetir as que as outras partes da viagem incluem.
+"""
+
+# Resumo dos dias já guardados quando se estende ou regenera parte de um roteiro
+TRIP_CONTEXT_TEMPLATE = """**Resto da viagem (já planeado, NÃO repetir)**: {trip_context}
+"""
+
+def budget_tier(budget_avg: int) -> str:
+    if budget_avg < 50:
+        return "baixo"
+    if budget_avg <= 120:
+        return "medio"
+    return "alto"
+
+def budget_context(budget: str, budget_min: Optional[int], budget_max: Optional[int]) -> Dict[str, Any]:
+    """Orçamento diário, distribuição por refeição e escalão do pedido"""
+    if budget_min is not None and budget_max is not None:
+        # Calcular distribuição aproximada para refeições (60% do orçamento)
+        budget_avg = int((budget_min + budget_max) / 2)
+        meal_total = int(budget_avg * 0.6)
+        breakfast_cost = int(meal_total * 0.2)
+        lunch_cost = int(meal_total * 0.35)
+        dinner_cost = int(meal_total * 0.45)
+        meal_budget = f"pequeno-almoço €{breakfast_cost-2}-{breakfast_cost+2}, almoço €{lunch_cost-5}-{lunch_cost+5}, jantar €{dinner_cost-5}-{dinner_cost+5}"
+        budget_category = "personalizado"
+    else:
+        budget = (budget or "medio").lower()
+        budget_min, budget_max, meal_budget = LEGACY_BUDGETS.get(budget, LEGACY_BUDGETS["medio"])
+        budget_category = budget
+        budget_avg = int((budget_min + budget_max) / 2)
+    return {
+        "daily_budget": f"€{budget_min}-{budget_max}",
+        "meal_budget": meal_budget,
+        "budget_category": budget_category,
+        "breakfast_max": int(budget_avg * 0.2),
+        "lunch_max": int(budget_avg * 0.35),
+        "dinner_max": int(budget_avg * 0.45),
+        "attractions_max": int(budget_avg * 0.3),
+        "tier": budget_tier(budget_avg),
+    }
+
+def estimate_trip_cost(duration_days: int, budget: str, budget_min: Optional[int], budget_max: Optional[int]) -> str:
+    """Custo total pelo orçamento diário (roteiros compostos sem estimativa do provider)"""
+    if budget_min is None or budget_max is None:
+        budget_min, budget_max, _ = LEGACY_BUDGETS.get((budget or "medio").lower(), LEGACY_BUDGETS["medio"])
+    return f"€{budget_min * duration_days}-{budget_max * duration_days}"
+
+def build_user_prompt(
+    region: str,
+    duration_days: int,
+    budget: str,
+    interests: List[str],
+    budget_min: Optional[int],
+    budget_max: Optional[int],
+    day_range: Optional[Tuple[int, int]] = None,
+    focus: Optional[str] = None,
+    trip_context: Optional[str] = None
+) -> str:
+    """Parte variável do prompt: destino, orçamento e só as regras do escalão pedido"""
+    context = budget_context(budget, budget_min, budget_max)
+
+    # Detecta se é um destino europeu fora de Portugal (país inferido pelos aliases)
+    is_portugal = resolve_destination(region).country == "Portugal"
+
+    part_text = ""
+    if day_range:
+        start, end = day_range
+        part_text = PART_TEMPLATE.format(start=start, end=end, duration_days=duration_days, focus=focus)
+        if trip_context:
+            part_text += TRIP_CONTEXT_TEMPLATE.format(trip_context=trip_context)
+
+    return USER_TEMPLATE.format(
+        region=region,
+        region_upper=region.upper(),
+        location_context="em Portugal" if is_portugal else "na Europa",
+        cuisine_type="portuguesa" if is_portugal else "local do destino",
+        duration_days=duration_days,
+        interests_text=", ".join(interests) if interests else "turismo geral",
+        part_text=part_text,
+        tier_rules=BUDGET_TIER_RULES[context["tier"]],
+        **context
+    )
+
+def build_messages(user_prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PREFIX},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa rápida de tokens (~4 caracteres por token) quando o provider não reporta"""
+    return math.ceil(len(text) / 4)
+
+SYSTEM_PREFIX_TOKENS = estimate_tokens(SYSTEM_PREFIX)
+
+class PromptStats:
+    """Tokens de entrada por pedido: estimativa local e valores reportados pelo provider"""
+
+    def __init__(self):
+        self.requests = 0
+        self.estimated_input_tokens = 0
+        self.reported_requests = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.last: Optional[Dict[str, Any]] = None
+
+    def record(self, messages: List[Dict[str, str]], usage: Any = None) -> Dict[str, Any]:
+        estimated = sum(estimate_tokens(m["content"]) for m in messages)
+        entry = {"estimated_input_tokens": estimated, "prompt_tokens": None, "cached_prompt_tokens": None}
+        self.requests += 1
+        self.estimated_input_tokens += estimated
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if prompt_tokens is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = getattr(details, "cached_tokens", None) or 0
+            entry.update(prompt_tokens=prompt_tokens, cached_prompt_tokens=cached)
+            self.reported_requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_prompt_tokens += cached
+        self.last = entry
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "system_prefix_estimated_tokens": SYSTEM_PREFIX_TOKENS,
+            "avg_estimated_input_tokens": round(self.estimated_input_tokens / self.requests, 1) if self.requests else 0.0,
+            "avg_prompt_tokens": round(self.prompt_tokens / self.reported_requests, 1) if self.reported_requests else None,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "last": self.last,
+        }
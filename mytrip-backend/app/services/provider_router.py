@@ -0,0 +1,401 @@
+import asyncio
+import contextlib
+import inspect
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+from app.services import metrics
+from app.services.rate_limiter import RateLimitScheduler
+from app.services.structured_logging import get_logger, log_event
+from app.services.timing import phase, record_phase
+
+logger = get_logger("providers")
+
+# Parâmetros que dependem do provider escolhido (ex: max_tokens aprendido por provider)
+BackendParams = Optional[Callable[["ProviderBackend"], Dict[str, Any]]]
+
+class NoProviderAvailable(Exception):
+    """Nenhum provider configurado ou todos com o circuito aberto"""
+
+class EmptyCompletion(Exception):
+    """O provider respondeu sem conteúdo utilizável"""
+
+def classify_error(e: Exception) -> str:
+    """Motivo de degradação a partir do tipo de erro (e não do texto da mensagem)"""
+    status = getattr(e, "status_code", None)
+    code = getattr(e, "code", None)
+    if status == 429 or code in ("insufficient_quota", "rate_limit_exceeded"):
+        return "quota"
+    if isinstance(e, NoProviderAvailable):
+        return "provider_unavailable"
+    return "provider_error"
+
+class CircuitBreaker:
+    """Circuit breaker por provider.
+
+    closed: tudo passa. Após `failure_threshold` falhas seguidas fica open e
+    o provider é saltado durante `reset_seconds`; depois fica half_open e deixa
+    passar um pedido de teste, que fecha o circuito (sucesso) ou volta a abri-lo.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Pode receber pedidos (sem reservar o pedido de teste)"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probe_in_flight)
+
+    def acquire(self) -> bool:
+        """Reserva a passagem de um pedido; em half_open só passa um de cada vez"""
+        if not self.available():
+            return False
+        if self.state == "half_open":
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self._probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None or self._probe_in_flight:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release(self):
+        """Pedido cancelado (perdeu o hedge): não conta como sucesso nem falha"""
+        self._probe_in_flight = False
+
+class ProviderBackend:
+    """Um provider compatível com a API de chat da OpenAI, com as suas métricas"""
+
+    def __init__(
+        self,
+        name: str,
+        client: Any,
+        model: str,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[RateLimitScheduler] = None
+    ):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or RateLimitScheduler()
+        self.latencies: Deque[float] = deque(maxlen=200)  # Segundos, só pedidos com sucesso
+        self.outcomes: Deque[bool] = deque(maxlen=100)  # Resultado dos últimos pedidos
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.cancelled = 0
+        self.hedge_wins = 0
+
+    def latency_quantile(self, q: float, min_samples: int = 10) -> Optional[float]:
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.latencies.append(latency)
+        metrics.provider_request_seconds.observe(latency, provider=self.name, model=self.model, outcome="ok")
+        self.outcomes.append(True)
+        self.breaker.record_success()
+
+    def record_failure(self, e: Exception, latency: Optional[float] = None):
+        self.requests += 1
+        self.errors += 1
+        reason = classify_error(e)
+        if reason == "quota":
+            self.rate_limited += 1
+        if latency is not None:
+            metrics.provider_request_seconds.observe(latency, provider=self.name, model=self.model, outcome=reason)
+        self.outcomes.append(False)
+        self.breaker.record_failure()
+
+    def record_cancelled(self):
+        self.cancelled += 1
+        self.breaker.release()
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency_quantile(0.5, min_samples=1)
+        p90 = self.latency_quantile(0.9, min_samples=1)
+        return {
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "cancelled": self.cancelled,
+            "hedge_wins": self.hedge_wins,
+            "recent_error_rate": round(self.outcomes.count(False) / len(self.outcomes), 4) if self.outcomes else 0.0,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p90_ms": round(p90 * 1000, 1) if p90 is not None else None,
+            "rate_limit": self.limiter.stats(),
+        }
+
+def _error_headers(e: Exception) -> Optional[Mapping[str, str]]:
+    response = getattr(e, "response", None)
+    return getattr(response, "headers", None)
+
+async def _create(backend: ProviderBackend, params: Dict[str, Any]) -> Tuple[Any, Optional[Mapping[str, str]]]:
+    """Chama o provider e devolve (resposta, headers HTTP) para ler os limites de rate"""
+    completions = backend.client.chat.completions
+    raw_api = getattr(completions, "with_raw_response", None)
+    if raw_api is None:
+        return await completions.create(model=backend.model, **params), None
+    raw = await raw_api.create(model=backend.model, **params)
+    parsed = raw.parse()
+    if inspect.isawaitable(parsed):
+        # O SDK da Groq devolve um parse assíncrono
+        parsed = await parsed
+    return parsed, raw.headers
+
+def _has_content(completion: Any) -> bool:
+    try:
+        return bool(completion.choices[0].message.content)
+    except (AttributeError, IndexError):
+        return False
+
+class ProviderRouter:
+    """Encaminha cada geração para o melhor provider disponível.
+
+    Os providers são tentados por ordem de preferência, saltando os que têm o
+    circuito aberto; se um falhar, passa ao seguinte. Com `hedge` ativo, se o
+    provider escolhido demorar mais do que o seu p90 de latência, é lançado o
+    mesmo pedido no provider seguinte e fica a primeira resposta válida.
+    """
+
+    def __init__(
+        self,
+        backends: List[ProviderBackend],
+        hedge: bool = False,
+        hedge_quantile: float = 0.9,
+        hedge_min_delay: float = 2.0,
+        concurrency: Optional[asyncio.Semaphore] = None
+    ):
+        self.backends = backends
+        # Limite de chamadas simultâneas, aplicado depois da fila de rate limit
+        self.concurrency = concurrency
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedges = 0
+        self.failovers = 0
+
+    @property
+    def primary(self) -> Optional[ProviderBackend]:
+        return self.backends[0] if self.backends else None
+
+    def _candidates(self) -> List[ProviderBackend]:
+        """Providers com o circuito fechado; os suspensos por Retry-After ficam para o fim"""
+        available = [backend for backend in self.backends if backend.breaker.available()]
+        return sorted(available, key=lambda backend: backend.limiter.paused_for() > 0)
+
+    def _slot(self):
+        return self.concurrency if self.concurrency is not None else contextlib.nullcontext()
+
+    @staticmethod
+    def _settle(backend: ProviderBackend, reserved: int, usage: Any):
+        backend.limiter.settle(reserved, getattr(usage, "total_tokens", None))
+
+    def hedge_delay(self, backend: ProviderBackend) -> float:
+        """Tempo de espera antes de lançar o pedido de reserva noutro provider"""
+        quantile = backend.latency_quantile(self.hedge_quantile)
+        return max(self.hedge_min_delay, quantile or 0.0)
+
+    async def _attempt(
+        self,
+        backend: ProviderBackend,
+        kwargs: Dict[str, Any],
+        is_valid: Callable[[Any], bool],
+        per_backend: BackendParams,
+        schedule: Tuple[int, float]
+    ) -> Any:
+        if per_backend is not None:
+            kwargs = {**kwargs, **per_backend(backend)}
+        prompt_tokens, delay = schedule
+        reserved = prompt_tokens + kwargs.get("max_tokens", 0)
+        start = None
+        try:
+            # Fila do provider: espera até haver quota de RPM/TPM
+            queued_at = time.monotonic()
+            await backend.limiter.acquire(reserved, delay)
+            async with self._slot():
+                start = time.monotonic()
+                record_phase("queue", start - queued_at)
+                with phase("provider"):
+                    completion, headers = await _create(backend, kwargs)
+            backend.limiter.update_from_headers(headers)
+            self._settle(backend, reserved, getattr(completion, "usage", None))
+            if not is_valid(completion):
+                raise EmptyCompletion(f"{backend.name}: resposta vazia")
+        except asyncio.CancelledError:
+            backend.record_cancelled()
+            raise
+        except Exception as e:
+            backend.limiter.update_from_headers(_error_headers(e))
+            backend.record_failure(e, time.monotonic() - start if start is not None else None)
+            raise
+        backend.record_success(time.monotonic() - start)
+        return completion
+
+    async def complete(
+        self,
+        is_valid: Callable[[Any], bool] = _has_content,
+        per_backend: BackendParams = None,
+        prompt_tokens: int = 0,
+        priority_delay: float = 0.0,
+        **kwargs
+    ) -> Tuple[Any, ProviderBackend]:
+        """Pedido de chat completion; devolve (resposta, provider que respondeu).
+
+        `per_backend(backend)` devolve parâmetros extra calculados para o provider escolhido.
+        `prompt_tokens` + max_tokens é a reserva de TPM; `priority_delay` (s) atrasa o
+        pedido na fila do provider (pedidos maiores esperam mais).
+        """
+        schedule = (prompt_tokens, priority_delay)
+        queue = self._candidates()
+        if not queue:
+            raise NoProviderAvailable("Nenhum provider disponível (circuitos abertos)")
+        first = queue[0]
+        pending: Dict[asyncio.Task, ProviderBackend] = {}
+        last_error: Optional[Exception] = NoProviderAvailable("Nenhum provider disponível (circuitos abertos)")
+        hedged = False
+
+        def launch():
+            while queue:
+                backend = queue.pop(0)
+                if backend.breaker.acquire():
+                    pending[asyncio.ensure_future(self._attempt(backend, kwargs, is_valid, per_backend, schedule))] = backend
+                    return
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and queue and len(pending) == 1:
+                    timeout = self.hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # O provider está a demorar mais do que o habitual: pedido de reserva
+                    self.hedges += 1
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    try:
+                        completion = task.result()
+                    except Exception as e:
+                        last_error = e
+                        log_event(logger, logging.WARNING, "provider_failed", provider=backend.name, error_type=type(e).__name__, error=str(e))
+                        continue
+                    if hedged and backend is not first:
+                        backend.hedge_wins += 1
+                    return completion, backend
+                if not pending and queue:
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    async def stream(
+        self,
+        per_backend: BackendParams = None,
+        prompt_tokens: int = 0,
+        priority_delay: float = 0.0,
+        **kwargs
+    ) -> AsyncIterator[Tuple[str, Optional[str], ProviderBackend]]:
+        """Versão em streaming: emite (texto, finish_reason, provider).
+
+        Muda de provider se a ligação falhar antes do primeiro bocado; depois
+        disso o erro é propagado (o texto já emitido não pode ser desfeito).
+        """
+        queue = self._candidates()
+        if not queue:
+            raise NoProviderAvailable("Nenhum provider disponível (circuitos abertos)")
+        last_error: Exception = NoProviderAvailable("Nenhum provider disponível (circuitos abertos)")
+        for index, backend in enumerate(queue):
+            if not backend.breaker.acquire():
+                continue
+            if index:
+                self.failovers += 1
+            params = {**kwargs, **per_backend(backend)} if per_backend is not None else kwargs
+            reserved = prompt_tokens + params.get("max_tokens", 0)
+            received = False
+            generated = 0
+            start = None
+            try:
+                queued_at = time.monotonic()
+                await backend.limiter.acquire(reserved, priority_delay)
+                async with self._slot():
+                    start = time.monotonic()
+                    record_phase("queue", start - queued_at)
+                    # Até o provider começar a responder (o resto chega durante o streaming)
+                    with phase("provider_first_byte"):
+                        stream, headers = await _create(backend, {**params, "stream": True})
+                    backend.limiter.update_from_headers(headers)
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        delta = choice.delta.content
+                        if delta:
+                            received = True
+                            generated += len(delta)
+                        if delta or choice.finish_reason:
+                            yield delta or "", choice.finish_reason, backend
+            except (asyncio.CancelledError, GeneratorExit):
+                backend.record_cancelled()
+                raise
+            except Exception as e:
+                backend.limiter.update_from_headers(_error_headers(e))
+                backend.record_failure(e, time.monotonic() - start if start is not None else None)
+                if received:
+                    raise
+                last_error = e
+                log_event(logger, logging.WARNING, "provider_failed", provider=backend.name, error_type=type(e).__name__, error=str(e))
+                continue
+            if not received:
+                # Ligação aberta mas sem texto: tenta o provider seguinte
+                last_error = EmptyCompletion(f"{backend.name}: resposta vazia")
+                backend.record_failure(last_error, time.monotonic() - start)
+                continue
+            # Sem usage no streaming: tokens de saída estimados (~4 caracteres por token)
+            backend.limiter.settle(reserved, prompt_tokens + math.ceil(generated / 4))
+            backend.record_success(time.monotonic() - start)
+            return
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedging": self.hedge,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "providers": {backend.name: backend.stats() for backend in self.backends},
+        }
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Servidor local compatível com a API de chat da OpenAI (AI_PROVIDER=simulated).
+
+Responde a POST /v1/chat/completions (normal e stream) com roteiros do
+catálogo mock para o destino e os dias pedidos no prompt, com tempo até ao
+primeiro token e tokens/segundo configuráveis. Permite injetar erros 5xx,
+429 (com Retry-After) e respostas truncadas (finish_reason="length"), e
+respeita max_tokens (~4 caracteres por token). Com `rpm`/`tpm` aplica quotas
+como a Groq (429 + headers x-ratelimit-*). Como é HTTP a sério, exercita o
+pool de ligações, os timeouts, o streaming e o tratamento de rate limits.
+
+Uso: python -m app.services.provider_simulator [porta]  (configuração por SIMULATOR_*)
+"""
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.mock_itinerary import mock_itinerary_json
+from app.services.rate_limiter import TokenBucket
+
+load_dotenv()
+
+_PART = re.compile(r"Gere APENAS os dias (\d+) a (\d+)")
+_DURATION = re.compile(r"\*\*Duração\*\*: (\d+) dia")
+_REGION = re.compile(r"MUITO DETALHADO para (.+?) (?:em Portugal|na Europa)")
+STREAM_CHUNK_TOKENS = 16
+
+def requested_days(prompt: str) -> Tuple[int, int]:
+    """(primeiro, último) dia pedidos no prompt"""
+    part = _PART.search(prompt)
+    if part:
+        return int(part.group(1)), int(part.group(2))
+    duration = _DURATION.search(prompt)
+    return 1, int(duration.group(1)) if duration else 3
+
+def requested_region(prompt: str) -> str:
+    match = _REGION.search(prompt)
+    return match.group(1).title() if match else "Lisboa"
+
+def itinerary_json(region: str, first: int, last: int) -> str:
+    """Roteiro mock dos dias `first`..`last` (os mesmos dias de uma viagem de `last` dias)"""
+    return mock_itinerary_json(region, last, first)
+
+def create_app(
+    ttft: Union[float, Callable[[], float]] = 0.4,
+    tokens_per_second: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 500,
+    rate_limit_rate: float = 0.0,
+    truncate_rate: float = 0.0,
+    rpm: int = 0,
+    tpm: int = 0,
+    seed: Optional[int] = None
+) -> FastAPI:
+    """`ttft`: segundos até ao primeiro token (ou função que os devolve); com
+    `tokens_per_second` > 0 a resposta demora também o tempo de a gerar"""
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.served = 0
+    app.state.rate_limited = 0
+    app.state.truncated = 0
+    rng = random.Random(seed)
+    first_token = ttft if callable(ttft) else (lambda: ttft)
+    per_token = 1 / tokens_per_second if tokens_per_second > 0 else 0.0
+    request_quota = TokenBucket(rpm)
+    token_quota = TokenBucket(tpm)
+
+    def quota_headers() -> dict:
+        headers = {}
+        for bucket, kind in ((request_quota, "requests"), (token_quota, "tokens")):
+            if bucket.enabled:
+                headers[f"x-ratelimit-limit-{kind}"] = str(bucket.per_minute)
+                headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, math.floor(bucket.level)))
+                headers[f"x-ratelimit-reset-{kind}"] = f"{(bucket.capacity - bucket.level) * 60 / bucket.per_minute:.2f}s"
+        return headers
+
+    def rate_limited(wait: float) -> JSONResponse:
+        app.state.rate_limited += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after": str(max(1, math.ceil(wait))), **quota_headers()}
+        )
+
+    @app.post("/v1/chat/completions")
+    @app.post("/openai/v1/chat/completions")  # Caminho usado pelo SDK da Groq
+    async def chat_completions(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        max_tokens = body.get("max_tokens") or 0
+        reserved = sum(len(m["content"]) for m in body["messages"]) // 4 + max_tokens
+        wait = max(request_quota.wait_time(1), token_quota.wait_time(reserved))
+        if wait > 0:
+            return rate_limited(wait)
+        if rng.random() < rate_limit_rate:
+            return rate_limited(1)
+        request_quota.consume(1)
+        token_quota.consume(reserved)
+        await asyncio.sleep(first_token())
+        if rng.random() < error_rate:
+            return JSONResponse(
+                {"error": {"message": "falha simulada", "type": "server_error", "code": None}},
+                status_code=error_status
+            )
+        content = itinerary_json(requested_region(prompt), *requested_days(prompt))
+        finish_reason = "stop"
+        if max_tokens and len(content) > max_tokens * 4:
+            content = content[:max_tokens * 4]
+            finish_reason = "length"
+        elif rng.random() < truncate_rate:
+            content = content[:int(len(content) * rng.uniform(0.3, 0.95))]
+            finish_reason = "length"
+        app.state.truncated += finish_reason == "length"
+        completion_tokens = -(-len(content) // 4)
+        token_quota.refund(max_tokens - completion_tokens)
+        app.state.served += 1
+        created = int(time.time())
+        if body.get("stream"):
+            async def events():
+                size = STREAM_CHUNK_TOKENS * 4
+                chunk = {"id": "chatcmpl-sim", "object": "chat.completion.chunk", "created": created, "model": body["model"]}
+                for i in range(0, len(content), size):
+                    if per_token:
+                        await asyncio.sleep(STREAM_CHUNK_TOKENS * per_token)
+                    chunk["choices"] = [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                chunk["choices"] = [{"index": 0, "delta": {}, "finish_reason": finish_reason}]
+                yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream", headers=quota_headers())
+        if per_token:
+            await asyncio.sleep(completion_tokens * per_token)
+        prompt_tokens = reserved - max_tokens
+        return JSONResponse({
+            "id": "chatcmpl-sim", "object": "chat.completion", "created": created, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }, headers=quota_headers())
+
+    return app
+
+def create_app_from_env() -> FastAPI:
+    """Simulador configurado pelas variáveis SIMULATOR_*"""
+    seed = os.getenv("SIMULATOR_SEED")
+    return create_app(
+        ttft=float(os.getenv("SIMULATOR_TTFT", "0.4")),
+        tokens_per_second=float(os.getenv("SIMULATOR_TOKENS_PER_SECOND", "300")),
+        error_rate=float(os.getenv("SIMULATOR_ERROR_RATE", "0")),
+        error_status=int(os.getenv("SIMULATOR_ERROR_STATUS", "500")),
+        rate_limit_rate=float(os.getenv("SIMULATOR_429_RATE", "0")),
+        truncate_rate=float(os.getenv("SIMULATOR_TRUNCATE_RATE", "0")),
+        rpm=int(os.getenv("SIMULATOR_RPM", "0")),
+        tpm=int(os.getenv("SIMULATOR_TPM", "0")),
+        seed=int(seed) if seed else None
+    )
+
+async def start_server(app: FastAPI, port: int, host: str = "127.0.0.1"):
+    """Arranca o servidor em background no event loop atual"""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    # Os sinais (Ctrl+C) ficam para o servidor principal, que para o simulador no fim
+    server.capture_signals = contextlib.nullcontext
+    server.task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        if server.task.done():
+            # Falhou ao arrancar (ex: porta ocupada)
+            raise RuntimeError(f"Simulador não arrancou na porta {port}")
+        await asyncio.sleep(0.01)
+    return server
+
+async def stop_servers(*servers):
+    for server in servers:
+        server.should_exit = True
+    await asyncio.gather(*[server.task for server in servers], return_exceptions=True)
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv("SIMULATOR_PORT", "8900"))
+    uvicorn.run(create_app_from_env(), host="127.0.0.1", port=port)
@@ -0,0 +1,230 @@
+import asyncio
+import heapq
+import itertools
+import math
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)?")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, None: 1.0}
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Duração dos headers de rate limit em segundos ("7.66s", "1m30.5s", "120ms", "2")"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit or None] for number, unit in parts)
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Espera pedida pelo provider: retry-after-ms, retry-after (segundos ou data HTTP)"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+class TokenBucket:
+    """Token bucket com reposição contínua de `per_minute` unidades por minuto"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos até haver `amount` unidades disponíveis"""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.per_minute
+
+    def consume(self, amount: float):
+        if self.enabled:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        if self.enabled:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, remaining: float):
+        """Alinha com o que o provider diz que resta (nunca aumenta o nível local)"""
+        if self.enabled:
+            self._refill()
+            self.level = min(self.level, remaining)
+
+class RateLimitScheduler:
+    """Fila de pedidos a um provider respeitando os limites de RPM e TPM.
+
+    Cada pedido reserva 1 pedido e os tokens estimados (prompt + max_tokens)
+    e só sai da fila quando os dois buckets têm capacidade. A fila é ordenada
+    por prazo virtual (chegada + `delay`), pelo que viagens curtas passam à
+    frente das longas sem que estas fiquem paradas indefinidamente. Retry-After
+    e os headers x-ratelimit-* do provider suspendem ou ajustam os buckets.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queue: List[list] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.paused_until = 0.0
+        self.queued_tokens = 0
+        self.granted = 0
+        self.total_wait = 0.0
+        self.pauses = 0
+
+    @property
+    def limited(self) -> bool:
+        return self.requests.enabled or self.tokens.enabled
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for entry in self._queue if not entry[3].done())
+
+    def paused_for(self) -> float:
+        return max(0.0, self.paused_until - time.monotonic())
+
+    async def acquire(self, tokens: int, delay: float = 0.0):
+        """Espera pela vez deste pedido; `delay` (s) atrasa a sua prioridade na fila"""
+        if not self._queue and not self.paused_for() and self.requests.wait_time(1) == 0 and self.tokens.wait_time(tokens) == 0:
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.granted += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        enqueued = time.monotonic()
+        heapq.heappush(self._queue, [enqueued + delay, next(self._seq), tokens, future])
+        self.queued_tokens += tokens
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Já tinha vez: devolve a reserva
+                self.requests.refund(1)
+                self.tokens.refund(tokens)
+            else:
+                self.queued_tokens -= tokens
+            raise
+        self.total_wait += time.monotonic() - enqueued
+
+    def _dispatch(self):
+        self._timer = None
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = max(self.paused_for(), self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                self._schedule(wait)
+                return
+            heapq.heappop(self._queue)
+            self.queued_tokens -= tokens
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.granted += 1
+            future.set_result(None)
+
+    def _schedule(self, wait: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """Devolve ao bucket de TPM os tokens reservados mas não usados"""
+        if used is not None and used < reserved:
+            self.tokens.refund(reserved - used)
+
+    def pause(self, seconds: float):
+        """O provider pediu para esperar (Retry-After): ninguém sai da fila até lá"""
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            self.pauses += 1
+            if self._queue:
+                self._schedule(seconds)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]):
+        """Ajusta os buckets aos headers x-ratelimit-* e Retry-After do provider"""
+        if not headers:
+            return
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            bucket.sync(remaining)
+            if remaining <= 0 and not bucket.enabled:
+                # Sem quota configurada: espera o tempo de repor uma unidade
+                # (o reset dos headers é o tempo até a quota estar cheia)
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                try:
+                    unit = 60 / float(headers.get(f"x-ratelimit-limit-{kind}") or 0)
+                except (ValueError, ZeroDivisionError):
+                    unit = None
+                wait = min(w for w in (reset, unit) if w is not None) if reset or unit else None
+                if wait:
+                    self.pause(wait)
+        retry_after = retry_after_seconds(headers)
+        if retry_after:
+            self.pause(retry_after)
+
+    def estimated_wait(self) -> float:
+        """Estimativa (s) do tempo até a fila atual esvaziar"""
+        waits = [self.paused_for()]
+        if self.requests.enabled:
+            waits.append((self.queued + 1) * 60 / self.requests.per_minute)
+        if self.tokens.enabled:
+            waits.append(self.queued_tokens * 60 / self.tokens.per_minute)
+        return max(waits)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rpm": self.requests.per_minute or None,
+            "tpm": self.tokens.per_minute or None,
+            "queued": self.queued,
+            "queued_tokens": self.queued_tokens,
+            "granted": self.granted,
+            "avg_wait_ms": round(self.total_wait * 1000 / self.granted, 1) if self.granted else 0.0,
+            "paused_for_s": round(self.paused_for(), 2),
+            "pauses": self.pauses,
+            "available_requests": math.floor(self.requests.level) if self.requests.enabled else None,
+            "available_tokens": math.floor(self.tokens.level) if self.tokens.enabled else None,
+        }
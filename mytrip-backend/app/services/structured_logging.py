@@ -0,0 +1,64 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por evento: ts, level, logger, event e os campos extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para desenvolvimento: evento seguido de chave=valor"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in getattr(record, "fields", {}).items())
+        line = f"{record.levelname:<7} {record.name} {record.getMessage()}"
+        return f"{line} {fields}" if fields else line
+
+def setup_logging():
+    """Configura o logger "mytrip" para escrever numa fila, despejada para o
+    stdout por uma thread (QueueListener): o event loop nunca espera pelo I/O"""
+    global _listener
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if os.getenv("LOG_FORMAT", "json").lower() == "json" else TextFormatter())
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    logger = logging.getLogger("mytrip")
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"mytrip.{name}")
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """Regista `event` com campos estruturados (ignorado se o nível estiver desativado)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
@@ -0,0 +1,73 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+class PhaseTimer:
+    """Tempo acumulado por fase de um pedido (prompt, provider, parse...).
+
+    Fases que correm em paralelo (partes de uma viagem longa, hedging) somam
+    as durações, pelo que a soma pode ultrapassar o tempo total do pedido.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}  # nome -> [segundos, nº de vezes]
+
+    def record(self, name: str, seconds: float):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def snapshot(self) -> Dict[str, float]:
+        """Milissegundos por fase, mais o total decorrido"""
+        timings = {name: round(seconds * 1000, 2) for name, (seconds, _) in self.phases.items()}
+        timings["total"] = round(self.elapsed() * 1000, 2)
+        return timings
+
+    def server_timing(self) -> str:
+        """Valor do header Server-Timing (ex: `provider;dur=812.4;desc="2x", total;dur=830.1`)"""
+        entries = []
+        for name, (seconds, count) in self.phases.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count}x"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+# Timer do pedido HTTP atual (definido pelo TimingMiddleware)
+_current: ContextVar[Optional[PhaseTimer]] = ContextVar("phase_timer", default=None)
+
+def current_timer() -> Optional[PhaseTimer]:
+    return _current.get()
+
+def start_timer() -> PhaseTimer:
+    timer = PhaseTimer()
+    _current.set(timer)
+    return timer
+
+def record_phase(name: str, seconds: float):
+    """Soma `seconds` à fase `name` do pedido atual (se houver)"""
+    timer = _current.get()
+    if timer is not None:
+        timer.record(name, seconds)
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Mede o bloco como a fase `name` do pedido atual (sem custo fora de um pedido)"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.record(name, time.perf_counter() - start)
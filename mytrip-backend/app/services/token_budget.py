@@ -0,0 +1,139 @@
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Uma resposta cortada (finish_reason="length") precisava de mais do que o
+# max_tokens reservado; conta como amostra deste valor vezes o reservado
+TRUNCATION_BOOST = 1.3
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+class _KeyStats:
+    """Contadores e amostras recentes de uma combinação (provider, escalão, dias)"""
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)  # Tokens de saída necessários
+        self.requests = 0
+        self.truncated = 0
+        self.reported = 0  # Respostas completas com tokens de saída conhecidos
+        self.reserved_tokens = 0  # Soma dos max_tokens pedidos (respostas completas)
+        self.completion_tokens = 0  # Soma dos tokens gerados (respostas completas)
+        self.last_max_tokens: Optional[int] = None
+
+class MaxTokensEstimator:
+    """Calcula max_tokens a partir do consumo real observado.
+
+    Guarda os tokens de saída (`completion.usage`) e o finish_reason de cada
+    pedido, por (provider, escalão de orçamento, dias). Com amostras
+    suficientes, max_tokens é o quantil `quantile` dessas amostras mais a
+    margem de segurança; antes disso usa a taxa por dia do mesmo provider e
+    escalão e, sem dados nenhuns, a estimativa fixa (`prior`).
+    """
+
+    def __init__(
+        self,
+        margin: float = 0.2,
+        quantile: float = 0.95,
+        min_samples: int = 5,
+        window: int = 50,
+        floor: int = 800,
+        ceiling: int = 8000
+    ):
+        self.margin = margin
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.window = window
+        self.floor = floor
+        self.ceiling = ceiling
+        self._keys: Dict[Tuple[str, str, int], _KeyStats] = {}
+        self._per_day: Dict[Tuple[str, str], Deque[float]] = {}
+        self.learned = 0  # Pedidos cujo max_tokens veio das amostras
+        self.fallback = 0  # Pedidos que usaram a estimativa fixa
+
+    def _key_stats(self, key: Tuple[str, str, int]) -> _KeyStats:
+        stats = self._keys.get(key)
+        if stats is None:
+            stats = self._keys[key] = _KeyStats(self.window)
+        return stats
+
+    def max_tokens(self, provider: str, tier: str, days: int, prior: int) -> int:
+        """max_tokens para o próximo pedido desta combinação"""
+        key = (provider, tier, days)
+        stats = self._keys.get(key)
+        per_day = self._per_day.get((provider, tier))
+        if stats is not None and len(stats.samples) >= self.min_samples:
+            needed = _quantile(stats.samples, self.quantile)
+        elif per_day is not None and len(per_day) >= self.min_samples:
+            needed = _quantile(per_day, self.quantile) * days
+        else:
+            self.fallback += 1
+            value = min(prior, self.ceiling)
+            self._key_stats(key).last_max_tokens = value
+            return value
+        self.learned += 1
+        value = int(min(self.ceiling, max(self.floor, needed * (1 + self.margin))))
+        self._key_stats(key).last_max_tokens = value
+        return value
+
+    def record(
+        self,
+        provider: str,
+        tier: str,
+        days: int,
+        max_tokens: int,
+        completion_tokens: Optional[int],
+        finish_reason: Optional[str]
+    ):
+        """Regista o consumo de um pedido (completion_tokens=None se o provider não o reportou)"""
+        stats = self._key_stats((provider, tier, days))
+        stats.requests += 1
+        if finish_reason == "length":
+            stats.truncated += 1
+            needed = max(completion_tokens or 0, max_tokens) * TRUNCATION_BOOST
+        elif completion_tokens is None:
+            return
+        else:
+            needed = completion_tokens
+            stats.reported += 1
+            stats.reserved_tokens += max_tokens
+            stats.completion_tokens += completion_tokens
+        stats.samples.append(needed)
+        per_day = self._per_day.get((provider, tier))
+        if per_day is None:
+            per_day = self._per_day[(provider, tier)] = deque(maxlen=self.window)
+        per_day.append(needed / max(days, 1))
+
+    def stats(self) -> Dict[str, Any]:
+        keys = {}
+        totals = {"requests": 0, "truncated": 0, "reserved_tokens": 0, "completion_tokens": 0}
+        for (provider, tier, days), stats in sorted(self._keys.items()):
+            if not stats.requests:
+                continue
+            keys[f"{provider}/{tier}/{days}d"] = {
+                "requests": stats.requests,
+                "truncated": stats.truncated,
+                "truncation_rate": round(stats.truncated / stats.requests, 4),
+                "avg_completion_tokens": round(stats.completion_tokens / stats.reported, 1) if stats.reported else None,
+                "wasted_reservation": _wasted(stats.reserved_tokens, stats.completion_tokens),
+                "max_tokens": stats.last_max_tokens,
+            }
+            totals["requests"] += stats.requests
+            totals["truncated"] += stats.truncated
+            totals["reserved_tokens"] += stats.reserved_tokens
+            totals["completion_tokens"] += stats.completion_tokens
+        return {
+            "requests": totals["requests"],
+            "truncation_rate": round(totals["truncated"] / totals["requests"], 4) if totals["requests"] else 0.0,
+            "wasted_reservation": _wasted(totals["reserved_tokens"], totals["completion_tokens"]),
+            "learned_estimates": self.learned,
+            "fallback_estimates": self.fallback,
+            "margin": self.margin,
+            "quantile": self.quantile,
+            "by_key": keys,
+        }
+
+def _wasted(reserved: int, used: int) -> Optional[float]:
+    """Fração dos tokens reservados (max_tokens) que ficou por usar"""
+    return round(1 - used / reserved, 4) if reserved else None
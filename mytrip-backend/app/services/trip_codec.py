@@ -0,0 +1,48 @@
+import zlib
+from typing import Optional
+from app.models.trip import TripResponse
+from app.services.catalog import catalog
+from app.services.mock_itinerary import mock_itinerary_json
+
+# Tamanho máximo de um dicionário do zlib (janela de 32 KB)
+MAX_DICTIONARY_BYTES = 32 * 1024
+
+def build_dictionary(days: int = 2) -> bytes:
+    """Dicionário do zlib com o texto do catálogo (atrações, refeições, dicas,
+    custos) e as chaves do JSON de um roteiro, partilhado por todos os blobs"""
+    text = "".join(mock_itinerary_json(name, days) for name in catalog.regions).encode()
+    # O zlib encontra melhor as referências no fim do dicionário
+    return text[-MAX_DICTIONARY_BYTES:]
+
+class TripCodec:
+    """Converte roteiros em blobs comprimidos (JSON + zlib) e vice-versa.
+
+    O dicionário faz com que o texto repetido entre roteiros (nomes e
+    descrições do catálogo, "€15-25", chaves do JSON) ocupe só uma
+    referência em cada blob. É criado no primeiro uso e só vale para este
+    processo: os blobs não devem ser guardados fora da memória.
+    """
+
+    def __init__(self, level: int = 6, dictionary: Optional[bytes] = None):
+        self.level = level
+        self._dictionary = dictionary
+
+    @property
+    def dictionary(self) -> bytes:
+        if self._dictionary is None:
+            self._dictionary = build_dictionary()
+        return self._dictionary
+
+    def encode_json(self, raw: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        return compressor.compress(raw) + compressor.flush()
+
+    def encode(self, trip: TripResponse) -> bytes:
+        return self.encode_json(trip.model_dump_json().encode())
+
+    def decode_json(self, blob: bytes) -> bytes:
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        return decompressor.decompress(blob) + decompressor.flush()
+
+    def decode(self, blob: bytes) -> TripResponse:
+        return TripResponse.model_validate_json(self.decode_json(blob))
@@ -0,0 +1,154 @@
+from typing import List, Optional, Set, Tuple
+from app.models.trip import DayItinerary, ItineraryData
+
+# Foco atribuído a cada parte de uma viagem longa, para que as partes geradas
+# em paralelo não escolham todas as mesmas atrações
+CHUNK_FOCUSES = [
+    "principais monumentos e centro histórico",
+    "museus, arte e cultura",
+    "bairros típicos, mercados e vida local",
+    "natureza, parques, miradouros e costa",
+    "excursões de um dia aos arredores",
+    "gastronomia, vinhos e experiências locais",
+]
+
+def plan_day_ranges(duration_days: int, chunk_days: int, threshold: int) -> List[Tuple[int, int]]:
+    """Divide a viagem em intervalos de dias (inclusivos) equilibrados.
+
+    Viagens até `threshold` dias são geradas de uma vez; acima disso são
+    divididas em partes de no máximo `chunk_days` dias.
+    """
+    if duration_days <= threshold or chunk_days <= 0:
+        return [(1, duration_days)]
+    chunks = -(-duration_days // chunk_days)
+    base, extra = divmod(duration_days, chunks)
+    ranges = []
+    start = 1
+    for i in range(chunks):
+        size = base + (1 if i < extra else 0)
+        ranges.append((start, start + size - 1))
+        start += size
+    return ranges
+
+# Mínimo de atrações de um dia depois de retiradas as já usadas noutros dias:
+# abaixo disso o dia fica com as atrações que trazia (melhor repetir do que ficar vazio)
+MIN_DAY_PLACES = 2
+
+# Foco dos dias pedidos de novo depois de uma resposta truncada ou inválida
+REPAIR_FOCUS = "atrações diferentes das que os outros dias da viagem já incluem"
+
+def chunk_focus(index: int) -> str:
+    return CHUNK_FOCUSES[index % len(CHUNK_FOCUSES)]
+
+def compose_focus(days: List[DayItinerary]) -> str:
+    """Foco dos dias gerados para completar uma viagem composta de dias em cache"""
+    names = sorted({place.name for day in days for place in day.places})
+    return f"{REPAIR_FOCUS} (já incluídas: {', '.join(names)})"
+
+def _day_end(day: DayItinerary) -> Optional[str]:
+    """Onde o dia acaba: local do jantar ou a última atração"""
+    for meal in reversed(day.meals):
+        if meal.location:
+            return meal.location
+    return day.places[-1].name if day.places else None
+
+def trip_context(days: List[DayItinerary], day_range: Tuple[int, int]) -> str:
+    """Resumo compacto dos dias fora de `day_range` para o prompt de uma edição:
+    atrações já usadas e onde acabam/começam os dias vizinhos (em vez do roteiro inteiro)"""
+    start, end = day_range
+    others = [day for day in days if not start <= day.day <= end]
+    names = sorted({place.name for day in others for place in day.places})
+    parts = [f"atrações já incluídas: {', '.join(names)}" if names else "sem outros dias"]
+    before = next((day for day in days if day.day == start - 1), None)
+    after = next((day for day in days if day.day == end + 1), None)
+    if before is not None and _day_end(before):
+        parts.append(f"o dia {before.day} acaba em {_day_end(before)}")
+    if after is not None and after.places:
+        parts.append(f"o dia {after.day} começa em {after.places[0].name}")
+    replaced = sorted({place.name for day in days if start <= day.day <= end for place in day.places})
+    if replaced:
+        parts.append(f"escolher atrações diferentes das dos dias a substituir ({', '.join(replaced)})")
+    return "; ".join(parts)
+
+def missing_days(days: List[DayItinerary], day_range: Tuple[int, int]) -> List[int]:
+    """Números dos dias de `day_range` que não estão em `days`.
+
+    Se o provider numerou os dias fora do intervalo pedido, assume que os
+    dias recebidos são os primeiros e que faltam os do fim.
+    """
+    start, end = day_range
+    expected = range(start, end + 1)
+    numbers = {day.day for day in days}
+    if numbers <= set(expected):
+        return [n for n in expected if n not in numbers]
+    return list(expected[len(days):])
+
+def group_day_ranges(days: List[int]) -> List[Tuple[int, int]]:
+    """Agrupa números de dias ordenados em intervalos contíguos ([2, 3, 5] -> [(2, 3), (5, 5)])"""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] == day - 1:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+class ItineraryMerger:
+    """Junta as partes de um roteiro gerado por intervalos de dias.
+
+    Renumera os dias sequencialmente, remove atrações já usadas em dias
+    anteriores e junta as dicas sem repetições.
+    """
+
+    def __init__(self):
+        self.itinerary: List[DayItinerary] = []
+        self.general_tips: List[str] = []
+        self.estimated_cost: Optional[str] = None
+        self.best_season: Optional[str] = None
+        self.used_places: Set[str] = set()
+        self._seen_tips: Set[str] = set()
+
+    def add(self, data: ItineraryData) -> List[DayItinerary]:
+        """Adiciona a próxima parte (por ordem) e devolve os seus dias renumerados"""
+        days = [self.add_day(day) for day in data.itinerary]
+        self.add_summary(data)
+        return days
+
+    def add_day(self, day: DayItinerary) -> DayItinerary:
+        """Adiciona um dia a seguir aos anteriores e devolve-o renumerado.
+
+        Retira as atrações já usadas, exceto se o dia ficar com menos de
+        MIN_DAY_PLACES (ou sem nenhuma): nesse caso mantém as originais.
+        """
+        places = []
+        seen = set()
+        for place in day.places:
+            key = place.name.strip().casefold()
+            if key and (key in self.used_places or key in seen):
+                continue
+            seen.add(key)
+            places.append(place)
+        if len(places) < min(MIN_DAY_PLACES, len(day.places)):
+            places = list(day.places)
+        self.used_places.update(key for key in (place.name.strip().casefold() for place in places) if key)
+        day = day.model_copy(update={"day": len(self.itinerary) + 1, "places": places})
+        self.itinerary.append(day)
+        return day
+
+    def add_summary(self, data: ItineraryData):
+        """Junta dicas, custo e melhor época de uma parte"""
+        for tip in data.general_tips or []:
+            key = tip.strip().casefold()
+            if key not in self._seen_tips:
+                self._seen_tips.add(key)
+                self.general_tips.append(tip)
+        self.estimated_cost = self.estimated_cost or data.estimated_cost
+        self.best_season = self.best_season or data.best_season
+
+    def result(self) -> ItineraryData:
+        return ItineraryData(
+            itinerary=self.itinerary,
+            general_tips=self.general_tips,
+            estimated_cost=self.estimated_cost,
+            best_season=self.best_season
+        )
@@ -0,0 +1,302 @@
+import os
+import uuid
+import base64
+import binascii
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.models.trip import TripResponse, TripSummary
+from app.services.trip_codec import TripCodec
+
+# Chave de ordenação da listagem: (created_at, id)
+SortKey = Tuple[datetime, str]
+
+def new_trip_id() -> str:
+    """Gera um id único (não depende do nº de roteiros guardados)"""
+    return f"trip_{uuid.uuid4().hex}"
+
+def encode_cursor(key: SortKey) -> str:
+    created_at, trip_id = key
+    raw = f"{created_at.isoformat()}|{trip_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Converte o cursor opaco em (created_at, id); ValueError se for inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, trip_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), trip_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Cursor inválido")
+
+def summarize(trip: TripResponse) -> TripSummary:
+    return TripSummary(
+        id=trip.id,
+        region=trip.region,
+        duration_days=trip.duration_days,
+        created_at=trip.created_at
+    )
+
+class TripStore(ABC):
+    """Armazenamento de roteiros gerados"""
+
+    async def initialize(self):
+        """Prepara o armazenamento (índices, ligações) no arranque da app"""
+
+    async def close(self):
+        """Liberta recursos no shutdown da app"""
+
+    @abstractmethod
+    async def insert(self, trip: TripResponse) -> TripResponse:
+        """Guarda o roteiro, atribuindo-lhe um id novo se não tiver"""
+
+    @abstractmethod
+    async def get(self, trip_id: str) -> Optional[TripResponse]:
+        ...
+
+    @abstractmethod
+    async def update(self, trip: TripResponse) -> bool:
+        """Substitui o roteiro com o mesmo id; devolve False se não existir"""
+
+    @abstractmethod
+    async def delete(self, trip_id: str) -> bool:
+        """Remove o roteiro; devolve False se não existir"""
+
+    @abstractmethod
+    async def list_summaries(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = True
+    ) -> Tuple[List[TripSummary], Optional[str]]:
+        """Página de resumos ordenada por created_at; devolve (resumos, próximo_cursor)"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"trips": await self.count()}
+
+    def on_remove(self, callback: Callable[[str], None]):
+        """Regista uma função chamada com o id de cada roteiro removido (incluindo
+        os descartados pelo limite ou expirados), ex: para invalidar caches"""
+
+class InMemoryTripStore(TripStore):
+    """Roteiros em memória, indexados por id (O(1) para get/delete).
+
+    Cada roteiro fica guardado como um blob comprimido (ver TripCodec) e só
+    é convertido de volta em modelos quando é lido. Os resumos para listagem
+    são calculados na inserção e mantidos numa lista ordenada por
+    (created_at, id), para paginar sem tocar nos roteiros.
+    Os roteiros mais antigos são descartados acima de `max_trips` roteiros
+    ou `max_bytes` de blobs, e os criados há mais de `ttl_seconds` expiram
+    (0 = sem limite), para a memória não crescer sem limite.
+    """
+
+    def __init__(self, max_trips: int = 0, max_bytes: int = 0, ttl_seconds: float = 0.0, codec: Optional[TripCodec] = None):
+        self.max_trips = max_trips
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.codec = codec or TripCodec()
+        self._trips: Dict[str, bytes] = {}
+        self._summaries: Dict[str, TripSummary] = {}
+        self._order: List[SortKey] = []
+        self.stored_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._remove_callbacks: List[Callable[[str], None]] = []
+
+    def on_remove(self, callback: Callable[[str], None]):
+        self._remove_callbacks.append(callback)
+
+    async def insert(self, trip: TripResponse) -> TripResponse:
+        if not trip.id:
+            trip.id = new_trip_id()
+        if trip.id in self._trips:
+            self._remove(trip.id)
+        self._store(trip)
+        insort(self._order, (trip.created_at, trip.id))
+        self._expire()
+        while len(self._order) > 1 and self._over_limit():
+            self._remove(self._order[0][1])
+            self.evictions += 1
+        return trip
+
+    def _store(self, trip: TripResponse):
+        blob = self.codec.encode(trip)
+        self.stored_bytes += len(blob) - len(self._trips.get(trip.id, b""))
+        self._trips[trip.id] = blob
+        self._summaries[trip.id] = summarize(trip)
+
+    def _over_limit(self) -> bool:
+        return (
+            (self.max_trips > 0 and len(self._trips) > self.max_trips)
+            or (self.max_bytes > 0 and self.stored_bytes > self.max_bytes)
+        )
+
+    def _expire(self):
+        """Remove os roteiros criados há mais de `ttl_seconds` (os primeiros da lista ordenada)"""
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        while self._order and self._order[0][0] < cutoff:
+            self._remove(self._order[0][1])
+            self.expirations += 1
+
+    async def get(self, trip_id: str) -> Optional[TripResponse]:
+        self._expire()
+        blob = self._trips.get(trip_id)
+        return self.codec.decode(blob) if blob is not None else None
+
+    async def update(self, trip: TripResponse) -> bool:
+        self._expire()
+        current = self._summaries.get(trip.id)
+        if current is None:
+            return False
+        if current.created_at != trip.created_at:
+            # A ordem da listagem depende de created_at
+            await self.insert(trip)
+            return True
+        self._store(trip)
+        while len(self._order) > 1 and self._over_limit():
+            self._remove(self._order[0][1])
+            self.evictions += 1
+        return True
+
+    async def delete(self, trip_id: str) -> bool:
+        if trip_id not in self._trips:
+            return False
+        self._remove(trip_id)
+        return True
+
+    def _remove(self, trip_id: str):
+        summary = self._summaries.pop(trip_id)
+        self.stored_bytes -= len(self._trips.pop(trip_id))
+        index = bisect_left(self._order, (summary.created_at, trip_id))
+        del self._order[index]
+        for callback in self._remove_callbacks:
+            callback(trip_id)
+
+    async def list_summaries(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = True
+    ) -> Tuple[List[TripSummary], Optional[str]]:
+        self._expire()
+        order = self._order
+        if descending:
+            end = bisect_left(order, decode_cursor(cursor)) if cursor else len(order)
+            start = max(0, end - limit)
+            keys = order[start:end][::-1]
+            has_more = start > 0
+        else:
+            start = bisect_right(order, decode_cursor(cursor)) if cursor else 0
+            keys = order[start:start + limit]
+            has_more = start + limit < len(order)
+        summaries = [self._summaries[trip_id] for _, trip_id in keys]
+        next_cursor = encode_cursor(keys[-1]) if keys and has_more else None
+        return summaries, next_cursor
+
+    async def count(self) -> int:
+        self._expire()
+        return len(self._trips)
+
+    async def stats(self) -> Dict[str, Any]:
+        trips = await self.count()
+        return {
+            "trips": trips,
+            "stored_bytes": self.stored_bytes,
+            "bytes_per_trip": round(self.stored_bytes / trips) if trips else 0,
+            "max_trips": self.max_trips,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+class MongoTripStore(TripStore):
+    """Roteiros no MongoDB (motor), com índices em id, region e created_at"""
+
+    def __init__(self, url: str, database: str, collection: str = "trips"):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self.client = AsyncIOMotorClient(url)
+        self.collection = self.client[database][collection]
+
+    async def initialize(self):
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index("region")
+        await self.collection.create_index([("created_at", 1), ("id", 1)])
+
+    async def close(self):
+        self.client.close()
+
+    async def insert(self, trip: TripResponse) -> TripResponse:
+        if not trip.id:
+            trip.id = new_trip_id()
+        await self.collection.insert_one(trip.model_dump())
+        return trip
+
+    async def get(self, trip_id: str) -> Optional[TripResponse]:
+        doc = await self.collection.find_one({"id": trip_id}, {"_id": 0})
+        return TripResponse(**doc) if doc else None
+
+    async def update(self, trip: TripResponse) -> bool:
+        result = await self.collection.replace_one({"id": trip.id}, trip.model_dump())
+        return result.matched_count > 0
+
+    async def delete(self, trip_id: str) -> bool:
+        result = await self.collection.delete_one({"id": trip_id})
+        return result.deleted_count > 0
+
+    async def list_summaries(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = True
+    ) -> Tuple[List[TripSummary], Optional[str]]:
+        query = {}
+        if cursor:
+            created_at, trip_id = decode_cursor(cursor)
+            op = "$lt" if descending else "$gt"
+            query = {"$or": [
+                {"created_at": {op: created_at}},
+                {"created_at": created_at, "id": {op: trip_id}}
+            ]}
+        direction = -1 if descending else 1
+        projection = {"_id": 0, "id": 1, "region": 1, "duration_days": 1, "created_at": 1}
+        docs = await (
+            self.collection.find(query, projection)
+            .sort([("created_at", direction), ("id", direction)])
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+        summaries = [TripSummary(**doc) for doc in docs[:limit]]
+        next_cursor = None
+        if len(docs) > limit:
+            last = summaries[-1]
+            next_cursor = encode_cursor((last.created_at, last.id))
+        return summaries, next_cursor
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+def create_trip_store() -> TripStore:
+    """Escolhe o backend a partir de TRIP_STORE (memory ou mongo)"""
+    backend = os.getenv("TRIP_STORE", "memory").lower()
+    if backend == "mongo":
+        return MongoTripStore(
+            url=os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+            database=os.getenv("DATABASE_NAME", "mytrip")
+        )
+    return InMemoryTripStore(
+        max_trips=int(os.getenv("TRIP_STORE_MAX_TRIPS", "10000")),
+        max_bytes=int(float(os.getenv("TRIP_STORE_MAX_MB", "64")) * 1024 * 1024),
+        ttl_seconds=float(os.getenv("TRIP_STORE_TTL", "0"))
+    )
+
+# Instância global
+trip_store = create_trip_store()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""POST /trips síncrono vs assíncrono (?async=true + polling de /jobs/{id}).
+
+N clientes pedem um roteiro ao mesmo tempo a um provider falso lento. No modo
+síncrono cada pedido fica com a ligação HTTP aberta durante toda a geração;
+no modo assíncrono o POST responde 202 logo e o cliente consulta o job de
+`intervalo` em `intervalo` segundos. Mede a latência do POST, o máximo de
+pedidos HTTP abertos em simultâneo e o tempo até todos os roteiros estarem prontos.
+
+Uso: python -m benchmarks.async_jobs [N] [latência_provider_s]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.main import app
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from benchmarks.fake_provider import create_app, start_server, stop_servers
+
+PORT = 8941
+POLL_INTERVAL = 0.5
+
+
+class OpenRequests:
+    """Conta os pedidos HTTP em curso (o que num proxy seriam ligações ocupadas)"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    async def send(self, request):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            return await request
+        finally:
+            self.current -= 1
+
+
+async def scenario(label: str, n: int, async_mode: bool):
+    openai_service.cache.clear()
+    open_requests = OpenRequests()
+    post_latencies = []
+    transport = httpx.ASGITransport(app=app)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as api:
+        async def one(i: int) -> bool:
+            trip = {"region": "Lisboa", "duration_days": 3, "budget": "medio", "interests": [f"{label}-{i}"]}
+            sent = time.perf_counter()
+            url = "/api/v1/trips?async=true" if async_mode else "/api/v1/trips"
+            response = await open_requests.send(api.post(url, json=trip))
+            post_latencies.append(time.perf_counter() - sent)
+            if not async_mode:
+                return response.status_code == 201
+            job_id = response.json()["id"]
+            while True:
+                await asyncio.sleep(POLL_INTERVAL)
+                job = (await open_requests.send(api.get(f"/api/v1/jobs/{job_id}"))).json()
+                if job["status"] in ("done", "failed"):
+                    return job["status"] == "done"
+
+        results = await asyncio.gather(*[one(i) for i in range(n)])
+    elapsed = time.perf_counter() - start
+    ordered = sorted(post_latencies)
+    print(f"   {label:<11} roteiros={sum(results)}/{n}  POST p50={statistics.median(ordered) * 1000:7.1f}ms  "
+          f"p99={ordered[max(0, int(n * 0.99) - 1)] * 1000:7.1f}ms  pedidos abertos (máx)={open_requests.peak:4d}  "
+          f"todos prontos em {elapsed:.1f}s")
+
+
+async def main(n: int, latency: float):
+    server = await start_server(create_app(lambda: latency), PORT)
+    client = AsyncOpenAI(api_key="fake", base_url=f"http://127.0.0.1:{PORT}/v1", max_retries=0)
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("fake", client, "fake-model")],
+        concurrency=openai_service._semaphore
+    )
+    openai_service.max_queue = 0
+    print(f"🔍 {n} clientes em simultâneo, provider de {latency}s, "
+          f"{openai_service.max_concurrency} gerações de cada vez")
+    try:
+        await scenario("síncrono", n, async_mode=False)
+        await scenario("assíncrono", n, async_mode=True)
+    finally:
+        await stop_servers(server)
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    provider_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    asyncio.run(main(clients, provider_latency))
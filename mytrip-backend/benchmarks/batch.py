@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Lote de 50 roteiros: POST /trips um a um vs POST /trips/batch.
+
+O lote tem combinações destino/duração com alguns pedidos repetidos (como
+nos pedidos dos parceiros) e corre contra um provider falso com latência
+fixa. Mede o tempo total e os roteiros por segundo com vários limites de
+fan-out (BATCH_CONCURRENCY).
+
+Uso: python -m benchmarks.batch [itens] [latência_provider_s]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.main import app
+from app.routes import trips as trips_routes
+from app.services.day_cache import DayCache
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from benchmarks.fake_provider import create_app, start_server, stop_servers
+
+PORT = 8951
+REGIONS = ["Lisboa", "Porto", "Madrid", "Paris", "Roma", "Berlim", "Praga", "Viena"]
+
+
+def batch_items(n: int) -> list:
+    # 1 em cada 5 pedidos repete um anterior
+    items = []
+    for i in range(n):
+        j = i - 3 if i % 5 == 4 else i
+        items.append({"region": REGIONS[j % len(REGIONS)], "duration_days": 1 + j % 4, "interests": [f"lote-{j}"]})
+    return items
+
+
+async def serial(api: httpx.AsyncClient, items: list) -> int:
+    ok = 0
+    for item in items:
+        response = await api.post("/api/v1/trips", json=item)
+        ok += response.status_code == 201
+    return ok
+
+
+async def batch(api: httpx.AsyncClient, items: list) -> int:
+    response = await api.post("/api/v1/trips/batch", json={"trips": items})
+    return response.json()["succeeded"]
+
+
+async def main(n: int, latency: float):
+    server = await start_server(create_app(lambda: latency), PORT)
+    client = AsyncOpenAI(api_key="fake", base_url=f"http://127.0.0.1:{PORT}/v1", max_retries=0)
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("fake", client, "fake-model")],
+        concurrency=openai_service._semaphore
+    )
+    # Sem cache de dias: os cenários repetem os mesmos pedidos e seriam compostos dos dias já gerados
+    openai_service.day_cache = DayCache(max_pools=0)
+    items = batch_items(n)
+    unique = len({(i["region"], i["duration_days"], i["interests"][0]) for i in items})
+    print(f"🔍 Lote de {n} pedidos ({unique} únicos), provider de {latency}s")
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as api:
+            scenarios = [("um a um", serial, None)] + [(f"lote fan-out={c}", batch, c) for c in (1, 4, 8)]
+            for label, run, concurrency in scenarios:
+                openai_service.cache.clear()
+                if concurrency is not None:
+                    trips_routes.BATCH_CONCURRENCY = concurrency
+                start = time.perf_counter()
+                ok = await run(api, items)
+                elapsed = time.perf_counter() - start
+                print(f"   {label:<16} {ok}/{n} roteiros em {elapsed:6.2f}s  ({ok / elapsed:5.1f} roteiros/s)")
+    finally:
+        await stop_servers(server)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    provider_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    asyncio.run(main(count, provider_latency))
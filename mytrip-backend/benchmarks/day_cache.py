@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Cache de dias desligada vs ligada, com tráfego de poucos destinos e várias durações.
+
+Os pedidos (Lisboa, Porto e Algarve com 1 a 7 dias, interesses repetidos)
+passam por `generate_itinerary` com o provider simulado em processo. Mede
+os dias pedidos ao provider, as chamadas, a latência média/p95 e o tempo
+que a cache de dias estima ter poupado.
+
+Uso: python -m benchmarks.day_cache [pedidos] [escala_tempo]
+"""
+import asyncio
+import logging
+import math
+import random
+import statistics
+import sys
+import time
+
+from app.services.day_cache import DayCache
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from benchmarks.stub_provider import stub_client
+
+REGIONS = ["Lisboa", "Porto", "Algarve"]
+INTERESTS = [[], ["cultura"], ["gastronomia", "cultura"]]
+
+
+def workload(n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [(rng.choice(REGIONS), rng.randint(1, 7), rng.choice(INTERESTS)) for _ in range(n)]
+
+
+async def run(requests: list, day_cache: DayCache, time_scale: float) -> dict:
+    client = stub_client(time_scale=time_scale)
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("stub", client, "stub-model")],
+        concurrency=openai_service._semaphore
+    )
+    openai_service.cache.clear()
+    openai_service.day_cache = day_cache
+    latencies = []
+    for region, days, interests in requests:
+        start = time.perf_counter()
+        data = await openai_service.generate_itinerary(region, days, "medio", interests)
+        latencies.append(time.perf_counter() - start)
+        assert len(data.itinerary) == days
+    ordered = sorted(latencies)
+    return {
+        "calls": client.chat.completions.calls,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p95_ms": ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000,
+        "stats": day_cache.stats(),
+    }
+
+
+async def main(n: int, time_scale: float):
+    logging.getLogger("mytrip").setLevel(logging.WARNING)
+    requests = workload(n)
+    total_days = sum(days for _, days, _ in requests)
+    print(f"🔍 {n} pedidos ({total_days} dias) a {len(REGIONS)} destinos, provider simulado (escala {time_scale})")
+    for label, cache in (("sem cache de dias", DayCache(max_pools=0)), ("com cache de dias", DayCache())):
+        result = await run(requests, cache, time_scale)
+        stats = result["stats"]
+        print(f"   {label}: {result['calls']:4d} chamadas ao provider  média {result['mean_ms']:7.1f}ms  "
+              f"p95 {result['p95_ms']:7.1f}ms  dias da cache {stats['days_from_cache']:3d} ({stats['day_hit_rate']:.0%})  "
+              f"compostos {stats['full_hits']} completos / {stats['partial_hits']} parciais  "
+              f"poupado ~{stats['seconds_saved']:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    ))
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Servidor falso compatível com a API de chat da OpenAI, para benchmarks locais.
+
+É o simulador de `app/services/provider_simulator.py` (o mesmo que
+AI_PROVIDER=simulated usa), com latência instantânea na geração: só o tempo
+até ao primeiro token conta. Os SDKs da OpenAI/Groq apontam para ele com
+`base_url` (ou OPENAI_BASE_URL / GROQ_BASE_URL).
+
+Uso: python -m benchmarks.fake_provider [porta] [latência_s] [taxa_erro]
+"""
+import random
+import sys
+from typing import Callable
+
+import uvicorn
+
+from app.services.provider_simulator import create_app, start_server, stop_servers
+
+__all__ = ["create_app", "start_server", "stop_servers", "tail_latency"]
+
+
+def tail_latency(base: float, slow_fraction: float = 0.1, slow_factor: float = 5.0) -> Callable[[], float]:
+    """Latência com cauda longa: `slow_fraction` dos pedidos demora `slow_factor`x mais"""
+    return lambda: base * (slow_factor if random.random() < slow_fraction else random.uniform(0.8, 1.2))
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8900
+    base_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    errors = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    uvicorn.run(create_app(tail_latency(base_latency), error_rate=errors), host="127.0.0.1", port=port)
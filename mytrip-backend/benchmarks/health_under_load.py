@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Mede a latência do /health enquanto N gerações de roteiro estão em curso.
+
+Uso: python -m benchmarks.health_under_load [N] [latência_provider_s]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.main import app
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+
+
+class SlowCompletions:
+    """Provider falso: demora `latency` segundos sem bloquear o event loop"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        content = openai_service._generate_mock_response("Lisboa", 3)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def main(generations: int, latency: float):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions(latency)))
+    # Com o limite de gerações simultâneas do serviço, como o router criado pela app
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("simulated", client, "simulated")],
+        concurrency=openai_service._semaphore
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        idle = asyncio.create_task(probe_health(client, stop))
+        await asyncio.sleep(0.5)
+        stop.set()
+        idle_latencies = await idle
+
+        print(f"🔍 {generations} gerações simultâneas (provider: {latency}s, limite: {openai_service.max_concurrency})...")
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop))
+        # Interesses distintos para que a cache não junte os pedidos
+        trips = [{"region": "Lisboa", "duration_days": 3, "budget": "medio", "interests": [f"bench-{i}"]} for i in range(generations)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[client.post("/api/v1/trips", json=trip) for trip in trips])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        busy_latencies = await probe
+
+    ok = sum(1 for r in responses if r.status_code == 201)
+    print(f"✅ {ok}/{generations} roteiros criados em {elapsed:.2f}s")
+    for label, values in (("em repouso", idle_latencies), ("sob carga", busy_latencies)):
+        print(f"   /health {label}: p50={statistics.median(values):.2f}ms max={max(values):.2f}ms ({len(values)} amostras)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    provider_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    asyncio.run(main(n, provider_latency))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Compara o caminho antigo e o novo de JSON do provider -> resposta HTTP.
+
+Antigo: json.loads -> dict -> TripResponse(...) -> validação do response_model
+        -> serialização do FastAPI -> json.dumps
+Novo:   pydantic-core from_json -> TypeAdapter.validate_python -> TripResponse(...)
+        -> pydantic-core to_json (sem jsonable_encoder nem revalidação)
+Também mede TypeAdapter.validate_json isolado, para confirmar qual é mais rápido.
+
+Uso: python -m benchmarks.json_path [repetições]
+"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.trip import TripResponse
+from app.responses import ModelJSONResponse
+from app.services.mock_itinerary import mock_itinerary_json
+from app.services.openai_service import ITINERARY_ADAPTER, openai_service
+
+CREATED_AT = datetime(2025, 1, 1)
+RESPONSE_FIELD = create_model_field(name="Response_create_trip", type_=TripResponse, mode="serialization")
+
+
+async def old_path(raw: str) -> bytes:
+    data = json.loads(raw)
+    trip = TripResponse(
+        id="trip_bench",
+        region="Lisboa",
+        duration_days=len(data["itinerary"]),
+        itinerary=data.get("itinerary", []),
+        general_tips=data.get("general_tips", []),
+        estimated_cost=data.get("estimated_cost"),
+        best_season=data.get("best_season"),
+        created_at=CREATED_AT
+    )
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=trip)
+    return JSONResponse(content).body
+
+
+async def new_path(raw: str) -> bytes:
+    data = openai_service._parse_response(raw)
+    trip = TripResponse(
+        id="trip_bench",
+        region="Lisboa",
+        duration_days=len(data.itinerary),
+        itinerary=data.itinerary,
+        general_tips=data.general_tips or [],
+        estimated_cost=data.estimated_cost,
+        best_season=data.best_season,
+        created_at=CREATED_AT
+    )
+    return ModelJSONResponse(trip).body
+
+
+async def validate_json_only(raw: str):
+    ITINERARY_ADAPTER.validate_json(raw)
+
+
+async def parse_only(raw: str):
+    openai_service._parse_response(raw)
+
+
+async def measure(fn, raw: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn(raw)
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+async def main(repeat: int):
+    print("🔍 Tempo por resposta (µs), provider -> bytes HTTP")
+    for days in (3, 14, 30):
+        raw = mock_itinerary_json("Lisboa", days)
+        assert json.loads(await old_path(raw)) == json.loads(await new_path(raw))
+        old = await measure(old_path, raw, repeat)
+        new = await measure(new_path, raw, repeat)
+        parse = await measure(parse_only, raw, repeat)
+        validate_json = await measure(validate_json_only, raw, repeat)
+        print(f"   {days:>2} dias ({len(raw.encode()) // 1024} KB): antigo={old:>8.1f}  novo={new:>8.1f}  ({old / new:.1f}x)"
+              f"  | parse: from_json+validate_python={parse:.1f} validate_json={validate_json:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Latência do GET /api/v1/trips (página de resumos) à medida que o armazenamento cresce.
+
+Uso: python -m benchmarks.list_trips [pedidos_por_tamanho]
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+from app.models.trip import TripResponse
+from app.services.openai_service import openai_service
+from app.services.trip_store import trip_store
+
+
+async def main(requests: int):
+    data = json.loads(openai_service._generate_mock_response("Lisboa", 5))
+    template = TripResponse(region="Lisboa", duration_days=5, **data)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in (100, 1_000, 10_000, 100_000):
+            while await trip_store.count() < size:
+                await trip_store.insert(template.model_copy())
+
+            latencies = []
+            cursor = None
+            for _ in range(requests):
+                params = {"limit": 20}
+                if cursor:
+                    params["cursor"] = cursor
+                start = time.perf_counter()
+                response = await client.get("/api/v1/trips", params=params)
+                latencies.append((time.perf_counter() - start) * 1000)
+                cursor = response.json()["next_cursor"]
+            print(f"   {size:>7,} roteiros: p50={statistics.median(latencies):.2f}ms "
+                  f"max={max(latencies):.2f}ms ({len(response.content):,} bytes/página)")
+
+
+if __name__ == "__main__":
+    trip_store.max_trips = 0
+    trip_store.max_bytes = 0
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
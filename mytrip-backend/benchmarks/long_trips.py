@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Viagens longas (8 a 30 dias) geradas em partes: nenhum dia pode ficar sem atrações.
+
+Gera cada duração com `generate_itinerary` através do provider simulado em
+processo (partes paralelas + ItineraryMerger) e falha se algum dia juntado
+ficar vazio. Mostra as chamadas, o tempo e as atrações por dia (mín./média).
+
+Uso: python -m benchmarks.long_trips [escala_tempo]
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from app.services.day_cache import DayCache
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from benchmarks.stub_provider import stub_client
+
+
+async def main(time_scale: float):
+    logging.getLogger("mytrip").setLevel(logging.WARNING)
+    client = stub_client(time_scale=time_scale)
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("stub", client, "stub-model")],
+        concurrency=openai_service._semaphore
+    )
+    # Só as partes geradas pelo provider, sem reutilizar dias de viagens anteriores
+    openai_service.day_cache = DayCache(max_pools=0)
+    print(f"🔍 Viagens de 8 a 30 dias em partes de {openai_service.chunk_days} dias (provider simulado, escala {time_scale})")
+    for days in range(8, 31):
+        openai_service.cache.clear()
+        calls = client.chat.completions.calls
+        start = time.perf_counter()
+        data = await openai_service.generate_itinerary("Lisboa", days, "medio", [])
+        elapsed = time.perf_counter() - start
+        places = [len(day.places) for day in data.itinerary]
+        assert len(places) == days, f"{days} dias: recebidos {len(places)}"
+        assert min(places) > 0, f"{days} dias: dias vazios {[day.day for day in data.itinerary if not day.places]}"
+        print(f"   {days:2d} dias: {client.chat.completions.calls - calls} chamadas  {elapsed * 1000:6.0f}ms  "
+              f"atrações/dia mín. {min(places)} média {statistics.fmean(places):.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.02))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Débito do gerador de roteiros mock (fallback e backend de testes de carga).
+
+Antes de medir, gera cada caso por `openai_service.generate_itinerary` sem
+provider (o caminho real do fallback, com partes e ItineraryMerger) e falha
+se algum dia ficar sem atrações ou se uma atração se repetir.
+
+Uso: python -m benchmarks.mock_itinerary [segundos_por_caso]
+"""
+import asyncio
+import logging
+import sys
+import time
+
+from app.services.day_cache import DayCache
+from app.services.mock_itinerary import generate_mock_itinerary, mock_itinerary_json
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderRouter
+
+REGIONS = ("Lisboa", "lisbon", "Praga")
+DAYS = (1, 3, 7, 8, 12, 14, 20, 30)
+
+
+def measure(fn, region: str, days: int, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn(region, days)
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+async def check_service():
+    """Todos os dias com atrações e sem atrações repetidas, pelo caminho do serviço"""
+    logging.getLogger("mytrip").setLevel(logging.ERROR)
+    openai_service.router = ProviderRouter([])
+    openai_service.day_cache = DayCache(max_pools=0)
+    for region in REGIONS:
+        for days in DAYS:
+            openai_service.cache.clear()
+            data = await openai_service.generate_itinerary(region, days, "medio", [])
+            names = [place.name for day in data.itinerary for place in day.places]
+            assert len(data.itinerary) == days, f"{region} {days} dias: recebidos {len(data.itinerary)}"
+            assert all(day.places for day in data.itinerary), f"{region} {days} dias: dias vazios"
+            assert len(names) == len(set(names)), f"{region} {days} dias: atrações repetidas"
+
+
+def main(seconds: float):
+    asyncio.run(check_service())
+    print(f"✅ generate_itinerary sem provider: {len(REGIONS) * len(DAYS)} roteiros sem dias vazios nem atrações repetidas")
+    print("🔍 Roteiros mock por segundo (gerar dicts / JSON memorizado)")
+    for region in REGIONS:
+        for days in DAYS:
+            raw = measure(generate_mock_itinerary, region, days, seconds)
+            cached = measure(mock_itinerary_json, region, days, seconds)
+            print(f"   {region:<8} {days:>2} dias: {raw:>10,.0f}/s   {cached:>12,.0f}/s")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.3)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Taxa de acerto da cache com a chave antiga (só maiúsculas/espaços) vs a
+chave canónica (aliases do destino, acentos, sinónimos dos interesses).
+
+Simula um tráfego em que os mesmos pedidos chegam escritos de formas
+diferentes ("Lisbon", " lisboa, Portugal", interesses em inglês ou noutra
+ordem) e conta quantas gerações cada chave evitaria. Mede também o custo da
+normalização por pedido.
+
+Uso: python -m benchmarks.normalization [pedidos]
+"""
+import random
+import sys
+import time
+
+from app.services.normalization import normalize_request, resolve_destination
+
+# Destinos e as formas como os utilizadores os escrevem
+VARIANTS = {
+    "Lisboa": ["Lisboa", "lisboa", "Lisbon", " Lisboa, Portugal", "LISBOA"],
+    "Porto": ["Porto", "porto", "Oporto", "Porto, Portugal"],
+    "Roma": ["Roma", "Rome", "roma", "Rome, Italy"],
+    "Praga": ["Praga", "Prague", "praha"],
+    "Évora": ["Évora", "Evora", "évora"],
+}
+INTERESTS = [
+    ["gastronomia", "cultura"],
+    ["Food", "Culture"],
+    ["cultura", "gastronomia"],
+    ["Cultura", "Gastronomia", "cultura"],
+    ["história"],
+    ["History"],
+    ["historia"],
+]
+
+
+def old_key(region, duration_days, budget, interests, budget_min, budget_max) -> tuple:
+    """Chave usada antes da normalização"""
+    if budget_min is not None and budget_max is not None:
+        budget_key = (budget_min, budget_max)
+    else:
+        budget_key = (budget or "medio").strip().lower()
+    interests_key = tuple(sorted({i.strip().casefold() for i in (interests or []) if i.strip()}))
+    return (region.strip().casefold(), duration_days, budget_key, interests_key)
+
+
+def workload(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(n):
+        region = rng.choice(rng.choice(list(VARIANTS.values())))
+        requests.append((region, rng.choice([2, 3, 5]), rng.choice(["medio", "Médio", "medio "]), rng.choice(INTERESTS), None, None))
+    return requests
+
+
+def hit_rate(requests: list, key) -> float:
+    seen = set()
+    hits = 0
+    for request in requests:
+        k = key(*request)
+        hits += k in seen
+        seen.add(k)
+    return hits / len(requests)
+
+
+def main(n: int):
+    requests = workload(n)
+    print(f"🔍 {n} pedidos com {len(VARIANTS)} destinos escritos de várias formas")
+    new_key = lambda *request: normalize_request(*request).key
+    print(f"   chave antiga:   {hit_rate(requests, old_key):6.1%} acertos, {len({old_key(*r) for r in requests})} roteiros distintos")
+    print(f"   chave canónica: {hit_rate(requests, new_key):6.1%} acertos, {len({new_key(*r) for r in requests})} roteiros distintos")
+
+    for label, prepare in (("com memo", lambda: None), ("sem memo", resolve_destination.cache_clear)):
+        start = time.perf_counter()
+        for request in requests:
+            prepare()
+            normalize_request(*request)
+        elapsed = time.perf_counter() - start
+        print(f"   normalize_request {label}: {elapsed / n * 1e6:6.1f} µs/pedido")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
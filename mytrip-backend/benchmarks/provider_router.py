@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Router de providers contra dois servidores falsos compatíveis com a OpenAI.
+
+Cenários:
+  1. Só o provider A (latência com cauda longa)
+  2. A + B com hedging (pedido de reserva em B após o p90 de A)
+  3. A sempre a falhar (erro 500) + B: failover e circuit breaker
+
+Uso: python -m benchmarks.provider_router [pedidos] [latência_base_s]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from openai import AsyncOpenAI
+
+from app.services.provider_router import CircuitBreaker, ProviderBackend, ProviderRouter
+from benchmarks.fake_provider import create_app, start_server, stop_servers, tail_latency
+
+PORT_A = 8901
+PORT_B = 8902
+PORT_BROKEN = 8903
+SLOW_FRACTION = 0.05
+
+
+def backend(name: str, port: int, **breaker) -> ProviderBackend:
+    client = AsyncOpenAI(api_key="fake", base_url=f"http://127.0.0.1:{port}/v1", max_retries=0)
+    return ProviderBackend(name, client, "fake-model", CircuitBreaker(**breaker))
+
+
+async def run(router: ProviderRouter, requests: int, concurrency: int = 4) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await router.complete(messages=[{"role": "user", "content": "roteiro"}], max_tokens=100)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return latencies
+
+
+def report(label: str, latencies: list, router: ProviderRouter):
+    ordered = sorted(latencies)
+    p90 = ordered[int(len(ordered) * 0.9) - 1]
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(f"   {label:<28} p50={statistics.median(ordered) * 1000:7.0f}ms  p90={p90 * 1000:7.0f}ms  "
+          f"p99={p99 * 1000:7.0f}ms  hedges={router.hedges} failovers={router.failovers}")
+
+
+async def main(requests: int, base: float):
+    app_a = create_app(tail_latency(base, SLOW_FRACTION))
+    app_b = create_app(tail_latency(base, SLOW_FRACTION))
+    app_broken = create_app(lambda: 0.05, error_rate=1.0)
+    servers = [
+        await start_server(app_a, PORT_A),
+        await start_server(app_b, PORT_B),
+        await start_server(app_broken, PORT_BROKEN),
+    ]
+    print(f"🔍 {requests} pedidos por cenário (latência base {base}s, {SLOW_FRACTION:.0%} dos pedidos 5x mais lentos)")
+    try:
+        single = ProviderRouter([backend("A", PORT_A)])
+        report("só A", await run(single, requests), single)
+
+        hedged = ProviderRouter([backend("A", PORT_A), backend("B", PORT_B)], hedge=True, hedge_min_delay=0.0)
+        # Aquecimento para o router conhecer o p90 de A
+        await run(hedged, 20)
+        hedged.hedges = hedged.backends[1].hedge_wins = 0
+        report("A + B com hedging (p90)", await run(hedged, requests), hedged)
+        print(f"      pedidos extra em B: {hedged.hedges} ({hedged.hedges / requests:.0%}), "
+              f"ganhos por B: {hedged.backends[1].hedge_wins}")
+
+        app_broken.state.requests = 0
+        failover = ProviderRouter([backend("A (avariado)", PORT_BROKEN, failure_threshold=5, reset_seconds=60), backend("B", PORT_B)])
+        report("A avariado + B (failover)", await run(failover, requests), failover)
+        print(f"      pedidos que chegaram ao A avariado: {app_broken.state.requests} de {requests} "
+              f"(circuito: {failover.backends[0].breaker.state})")
+    finally:
+        await stop_servers(*servers)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    base_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(main(n, base_latency))
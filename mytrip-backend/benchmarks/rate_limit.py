@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Quotas RPM/TPM: sem fila vs com o scheduler de rate limit do cliente.
+
+Um servidor falso aplica quotas como a Groq (429 + Retry-After). Durante
+`segundos`, chegam pedidos POST /api/v1/trips a 4x o ritmo que a quota
+permite. Sem scheduler, os pedidos acima da quota falham no provider e caem
+para mock; com o scheduler, esperam na fila até haver quota e, com a fila
+cheia, a API responde 429 + Retry-After em vez de servir mock.
+
+Uso: python -m benchmarks.rate_limit [segundos] [rpm]
+"""
+import asyncio
+import sys
+import time
+from collections import Counter
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.main import app
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from app.services.rate_limiter import RateLimitScheduler
+from benchmarks.fake_provider import create_app, start_server, stop_servers
+
+PORT = 8931
+LATENCY = 0.5
+
+
+class NoScheduler(RateLimitScheduler):
+    """Comportamento antigo: chama o provider logo e ignora Retry-After"""
+
+    async def acquire(self, tokens: int, delay: float = 0.0):
+        return
+
+    def update_from_headers(self, headers):
+        return
+
+
+async def scenario(label: str, seconds: float, rpm: int, tpm: int, scheduled: bool):
+    provider = create_app(lambda: LATENCY, rpm=rpm, tpm=tpm)
+    server = await start_server(provider, PORT)
+    client = AsyncOpenAI(api_key="fake", base_url=f"http://127.0.0.1:{PORT}/v1", max_retries=0)
+    limiter = RateLimitScheduler(rpm, tpm) if scheduled else NoScheduler()
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("fake", client, "fake-model", limiter=limiter)],
+        concurrency=openai_service._semaphore
+    )
+    openai_service.cache.clear()
+    openai_service.max_queue = 8 if scheduled else 0
+
+    interval = 60 / (rpm * 4)
+    statuses = Counter()
+    transport = httpx.ASGITransport(app=app)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as api:
+        async def one(i: int):
+            trip = {"region": "Lisboa", "duration_days": 1 + i % 3, "budget": "medio", "interests": [f"rl-{label}-{i}"]}
+            response = await api.post("/api/v1/trips", json=trip)
+            statuses[response.status_code] += 1
+
+        tasks = []
+        i = 0
+        while time.perf_counter() - start < seconds:
+            tasks.append(asyncio.ensure_future(one(i)))
+            i += 1
+            await asyncio.sleep(interval)
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await stop_servers(server)
+
+    fallbacks = statuses[201] - provider.state.served
+    print(f"   {label:<14} {i} pedidos em {elapsed:.0f}s: roteiros reais={provider.state.served} "
+          f"({provider.state.served * 60 / elapsed:.0f}/min), mock={fallbacks}, "
+          f"429 do provider={provider.state.rate_limited}, 429 da API={statuses[429]}")
+
+
+async def main(seconds: float, rpm: int):
+    tpm = rpm * 4000
+    print(f"🔍 Quota do provider: {rpm} RPM / {tpm} TPM; pedidos a 4x esse ritmo durante {seconds:.0f}s")
+    await scenario("sem fila", seconds, rpm, tpm, scheduled=False)
+    await scenario("com scheduler", seconds, rpm, tpm, scheduled=True)
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    quota_rpm = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    asyncio.run(main(duration, quota_rpm))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Dias recuperados de respostas truncadas/com prosa: parser antigo vs salvamento.
+
+Antigo: find('{')/rfind('}') + json.loads; se falhar, ou se algum dia não
+        validar (erro 500 ao criar o TripResponse), 0 dias.
+Novo:   salvage_json_object (dias completos + campos de topo parciais).
+
+O corpus está em benchmarks/corpus/salvage (manifest.json indica os dias
+esperados e quantos estão completos em cada ficheiro). Para juntar respostas
+reais, arranque a API com SALVAGE_CORPUS_DIR=<pasta> e copie os ficheiros.
+
+Uso: python -m benchmarks.salvage [repetições]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.models.trip import DayItinerary
+from app.services.json_stream import salvage_json_object
+from app.services.trip_planner import missing_days
+
+CORPUS = Path(__file__).resolve().parent / "corpus" / "salvage"
+
+
+def old_days(text: str) -> int:
+    try:
+        start = text.find('{')
+        end = text.rfind('}') + 1
+        if start != -1 and end > start:
+            days = json.loads(text[start:end]).get("itinerary", [])
+            return len([DayItinerary.model_validate(day) for day in days])
+    except (ValueError, AttributeError):
+        pass
+    return 0
+
+
+def new_days(text: str) -> list:
+    days, _, _ = salvage_json_object(text, item_loader=DayItinerary.model_validate_json)
+    return days
+
+
+def measure(fn, text: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main(repeat: int):
+    manifest = json.loads((CORPUS / "manifest.json").read_text(encoding="utf-8"))
+    totals = {"expected": 0, "recoverable": 0, "old": 0, "new": 0, "missing": 0}
+    print(f"🔍 {len(manifest)} respostas do corpus (dias recuperados / µs por resposta)")
+    for name, meta in sorted(manifest.items()):
+        text = (CORPUS / name).read_text(encoding="utf-8")
+        days = new_days(text)
+        assert len(days) == meta["recoverable_days"], (name, len(days))
+        missing = missing_days(days, (1, meta["expected_days"]))
+        old = old_days(text)
+        totals["expected"] += meta["expected_days"]
+        totals["recoverable"] += meta["recoverable_days"]
+        totals["old"] += old
+        totals["new"] += len(days)
+        totals["missing"] += len(missing)
+        print(f"   {name:<32} antigo={old}/{meta['expected_days']}  novo={len(days)}/{meta['expected_days']}"
+              f"  em falta={missing}  ({measure(new_days, text, repeat):.0f} µs)")
+    print(f"\n   Total: antigo={totals['old']} novo={totals['new']} de {totals['expected']} dias "
+          f"({totals['missing']} pedidos de novo em vez de {totals['expected'] - totals['old']})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Arranque a frio: tempo de import da app, até ao primeiro /health e latência do primeiro roteiro.
+
+Arranca o uvicorn num processo novo (como o Procfile/railway.json) com o
+provider simulado sem latência, mede desde o spawn até ao primeiro
+`/health` com 200 e a duração do primeiro POST /api/v1/trips, com e sem o
+aquecimento em background (WARM_UP). O primeiro roteiro é pedido logo a
+seguir ao /health e, noutro arranque, `espera` segundos depois: o
+aquecimento só o acelera se terminar antes de o pedido chegar.
+
+Uso: python -m benchmarks.startup [repetições] [espera_s]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds() -> float:
+    result = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def cold_start(warm_up: bool, idle: float = 0.0) -> dict:
+    port = free_port()
+    env = dict(
+        os.environ,
+        AI_PROVIDER="simulated",
+        SIMULATOR_PORT=str(free_port()),
+        SIMULATOR_TTFT="0",
+        SIMULATOR_TOKENS_PER_SECOND="0",
+        WARM_UP="true" if warm_up else "false",
+        LOG_LEVEL="WARNING",
+    )
+    env.pop("SIMULATED_BASE_URL", None)
+    env.pop("AI_PROVIDERS", None)
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError("o servidor terminou durante o arranque")
+                time.sleep(0.005)
+            healthy = time.perf_counter() - start
+            # Primeiro utilizador a chegar `idle` segundos depois do arranque
+            time.sleep(idle)
+            request_start = time.perf_counter()
+            response = client.post("/api/v1/trips", json={"region": "Lisboa", "duration_days": 3})
+            response.raise_for_status()
+            first_trip = time.perf_counter() - request_start
+    finally:
+        server.terminate()
+        server.wait()
+    return {"healthy": healthy, "first_trip": first_trip}
+
+
+def main(repeats: int, idle: float):
+    imports = [import_seconds() for _ in range(repeats)]
+    print(f"🔍 {repeats} arranques a frio por modo (provider simulado sem latência)")
+    print(f"   import app.main: mediana {statistics.median(imports) * 1000:7.1f}ms")
+    for label, warm_up in (("sem aquecimento", False), ("com aquecimento", True)):
+        for wait in (0.0, idle):
+            runs = [cold_start(warm_up, wait) for _ in range(repeats)]
+            healthy = statistics.median(run["healthy"] for run in runs)
+            first_trip = statistics.median(run["first_trip"] for run in runs)
+            print(f"   {label}: primeiro /health {healthy * 1000:7.1f}ms  "
+                  f"primeiro roteiro {wait:.0f}s depois: {first_trip * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    )
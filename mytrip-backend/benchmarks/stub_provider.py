@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Provider de IA simulado em processo, determinístico, para benchmarks.
+
+Imita `client.chat.completions.create` dos SDKs (normal e stream=True) sem
+rede: responde com o roteiro mock dos dias pedidos no prompt, com latência
+realista (tempo até ao primeiro token + geração a `tokens_per_second`, com
+cauda lenta) e respeita max_tokens (finish_reason="length"). A latência de
+cada pedido depende só do prompt, pelo que duas execuções são comparáveis.
+`time_scale` encolhe todas as esperas (0.1 = 10x mais rápido que o real).
+"""
+import asyncio
+import math
+import random
+import zlib
+from types import SimpleNamespace
+from typing import Tuple
+
+from app.services.provider_simulator import STREAM_CHUNK_TOKENS, itinerary_json, requested_days
+
+
+class StubCompletions:
+    def __init__(self, ttfb: float, tokens_per_second: float, slow_fraction: float, slow_factor: float, time_scale: float):
+        self.ttfb = ttfb
+        self.tokens_per_second = tokens_per_second
+        self.slow_fraction = slow_fraction
+        self.slow_factor = slow_factor
+        self.time_scale = time_scale
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._content = {}
+
+    def _itinerary(self, first: int, last: int) -> str:
+        key = (first, last)
+        if key not in self._content:
+            self._content[key] = itinerary_json("Lisboa", first, last)
+        return self._content[key]
+
+    def _latency(self, prompt: str) -> Tuple[float, float]:
+        """(tempo até ao primeiro token, fator de lentidão) derivados do prompt"""
+        rng = random.Random(zlib.crc32(prompt.encode()))
+        factor = self.slow_factor if rng.random() < self.slow_fraction else 1.0
+        return self.ttfb * rng.uniform(0.7, 1.3) * factor * self.time_scale, factor
+
+    async def create(self, model: str, messages: list, max_tokens: int = None, stream: bool = False, **kwargs):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        content = self._itinerary(*requested_days(prompt))
+        finish_reason = "stop"
+        if max_tokens and len(content) > max_tokens * 4:
+            content = content[:max_tokens * 4]
+            finish_reason = "length"
+        ttfb, factor = self._latency(prompt)
+        per_token = factor * self.time_scale / self.tokens_per_second
+        prompt_tokens = sum(math.ceil(len(m["content"]) / 4) for m in messages)
+        completion_tokens = math.ceil(len(content) / 4)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        await asyncio.sleep(ttfb)
+        if stream:
+            return self._stream(content, finish_reason, per_token)
+        await asyncio.sleep(completion_tokens * per_token)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+                prompt_tokens_details=None
+            )
+        )
+
+    async def _stream(self, content: str, finish_reason: str, per_token: float):
+        size = STREAM_CHUNK_TOKENS * 4
+        for i in range(0, len(content), size):
+            await asyncio.sleep(STREAM_CHUNK_TOKENS * per_token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + size]), finish_reason=None)])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=finish_reason)])
+
+
+def stub_client(
+    ttfb: float = 0.4,
+    tokens_per_second: float = 300.0,
+    slow_fraction: float = 0.05,
+    slow_factor: float = 4.0,
+    time_scale: float = 1.0
+) -> SimpleNamespace:
+    """Cliente com a mesma forma que AsyncOpenAI/AsyncGroq (só chat.completions.create)"""
+    completions = StubCompletions(ttfb, tokens_per_second, slow_fraction, slow_factor, time_scale)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
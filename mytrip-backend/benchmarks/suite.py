@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Suite de benchmarks da API, offline e reprodutível.
+
+Arranca `app.main:app` em processo (httpx + ASGI, sem rede), troca o provider
+de IA pelo simulado de `benchmarks/stub_provider.py` e mede throughput e
+latência p50/p95/p99 de create/get/list/delete com vários níveis de
+concorrência e durações de viagem. Os resultados ficam num JSON (por omissão
+benchmarks/results/<commit>.json) para comparar entre commits:
+
+  python -m benchmarks.suite [--quick] [--output ficheiro.json] [--time-scale 0.1]
+  python -m benchmarks.suite --compare antes.json depois.json [--threshold 0.1]
+
+Com --compare, o código de saída é 1 se alguma medição piorou mais do que
+`threshold` (p95 ou throughput) e o p95 subiu mais do que `min-delta-ms`.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.main import app
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from benchmarks.stub_provider import stub_client
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+FULL = {"concurrency": [1, 8, 32], "days": [1, 3, 7, 14], "requests": 32}
+QUICK = {"concurrency": [1, 8], "days": [1, 3], "requests": 8}
+# get/list demoram ~1ms: mais pedidos para os percentis serem estáveis
+FAST_OP_FACTOR = 20
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+async def run_op(concurrency: int, requests: int, call: Callable[[int], Awaitable[httpx.Response]]) -> Dict[str, float]:
+    """`requests` pedidos com `concurrency` clientes em ciclo fechado"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await call(i)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    gc.collect()
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(_percentile(ordered, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "app"], cwd=root, capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(config: dict, time_scale: float) -> dict:
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("stub", stub_client(time_scale=time_scale), "stub-model")],
+        concurrency=openai_service._semaphore
+    )
+    openai_service.max_queue = 0  # Mede o pipeline, não a rejeição com 429
+    results = []
+
+    def report(entry: dict):
+        results.append(entry)
+        label = f"{entry['op']:<6} c={entry['concurrency']:<3}" + (f" dias={entry['days']:<3}" if "days" in entry else " " * 8)
+        print(f"   {label} {entry['throughput_rps']:8.1f} pedidos/s  p50={entry['p50_ms']:8.1f}ms  "
+              f"p95={entry['p95_ms']:8.1f}ms  p99={entry['p99_ms']:8.1f}ms  erros={entry['errors']}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as api:
+            for concurrency in config["concurrency"]:
+                n = max(config["requests"], concurrency)
+                created: Dict[int, List[str]] = {}
+                for days in config["days"]:
+                    ids = created[days] = []
+
+                    async def create(i: int, days=days, ids=ids) -> httpx.Response:
+                        # Interesses únicos: a cache não pode responder por nenhum pedido
+                        trip = {"region": "Lisboa", "duration_days": days, "interests": [f"suite-{concurrency}-{days}-{i}"]}
+                        response = await api.post("/api/v1/trips", json=trip)
+                        if response.status_code == 201:
+                            ids.append(response.json()["id"])
+                        return response
+
+                    report({"op": "create", "concurrency": concurrency, "days": days, **await run_op(concurrency, n, create)})
+                for days in config["days"]:
+                    ids = created[days]
+                    get = lambda i, ids=ids: api.get(f"/api/v1/trips/{ids[i % len(ids)]}")
+                    report({"op": "get", "concurrency": concurrency, "days": days, **await run_op(concurrency, n * FAST_OP_FACTOR, get)})
+                page = lambda i: api.get("/api/v1/trips", params={"limit": 20})
+                report({"op": "list", "concurrency": concurrency, **await run_op(concurrency, n * FAST_OP_FACTOR, page)})
+                all_ids = [trip_id for ids in created.values() for trip_id in ids]
+                delete = lambda i: api.delete(f"/api/v1/trips/{all_ids[i]}")
+                report({"op": "delete", "concurrency": concurrency, **await run_op(concurrency, len(all_ids), delete)})
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {**config, "time_scale": time_scale, "max_concurrency": openai_service.max_concurrency},
+        "results": results,
+    }
+
+
+def _key(entry: dict) -> tuple:
+    return entry["op"], entry["concurrency"], entry.get("days")
+
+
+def compare(base_path: str, new_path: str, threshold: float, min_delta_ms: float) -> int:
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"🔍 {base.get('commit')} → {new.get('commit')} (piora > {threshold:.0%} assinalada)")
+    before = {_key(entry): entry for entry in base["results"]}
+    regressions = 0
+    for entry in new["results"]:
+        old = before.get(_key(entry))
+        if old is None:
+            continue
+        p95 = entry["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps = entry["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        # Diferenças abaixo de `min_delta_ms` são ruído em operações de ~1ms
+        slower = entry["p95_ms"] - old["p95_ms"] > min_delta_ms
+        worse = slower and (p95 > threshold or rps < -threshold)
+        regressions += worse
+        op, concurrency, days = _key(entry)
+        label = f"{op:<6} c={concurrency:<3}" + (f" dias={days:<3}" if days is not None else " " * 8)
+        print(f"   {'❌' if worse else '  '} {label} p95 {old['p95_ms']:8.1f} → {entry['p95_ms']:8.1f}ms ({p95:+.0%})  "
+              f"throughput {old['throughput_rps']:7.1f} → {entry['throughput_rps']:7.1f}/s ({rps:+.0%})")
+    print(f"{'❌' if regressions else '✅'} {regressions} regressões")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks da API com provider simulado")
+    parser.add_argument("--quick", action="store_true", help="Menos combinações (para uma verificação rápida)")
+    parser.add_argument("--output", help="Ficheiro JSON de resultados (por omissão benchmarks/results/<commit>.json)")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="Fator aplicado à latência simulada do provider")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="Compara dois ficheiros de resultados")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Piora relativa a partir da qual é regressão")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Piora absoluta mínima do p95 para contar como regressão")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold, args.min_delta_ms))
+
+    logging.getLogger("mytrip").setLevel(logging.WARNING)
+    config = QUICK if args.quick else FULL
+    print(f"🔍 Provider simulado (escala de tempo {args.time_scale}), concorrência {config['concurrency']}, dias {config['days']}")
+    report = asyncio.run(run_suite(config, args.time_scale))
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Resultados em {output}")
+
+
+if __name__ == "__main__":
+    main()
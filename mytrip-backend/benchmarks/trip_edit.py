@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Editar um roteiro guardado: gerar tudo de novo vs estender / regenerar um dia.
+
+Com o provider simulado em processo (e a cache de dias desligada, para
+comparar só os endpoints), mede a latência e os tokens de entrada/saída de:
+  - acrescentar 2 dias a uma viagem de 7: POST /trips com 9 dias vs POST /trips/{id}/extend
+  - trocar um dia de uma viagem de 7: POST /trips com 7 dias vs POST /trips/{id}/days/4/regenerate
+
+Uso: python -m benchmarks.trip_edit [repetições] [escala_tempo]
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+from app.services.day_cache import DayCache
+from app.services.openai_service import openai_service
+from app.services.provider_router import ProviderBackend, ProviderRouter
+from benchmarks.stub_provider import stub_client
+
+
+async def measure(client, call) -> dict:
+    completions = client.chat.completions
+    prompt, completion, calls = completions.prompt_tokens, completions.completion_tokens, completions.calls
+    start = time.perf_counter()
+    response = await call()
+    assert response.status_code in (200, 201), response.text
+    return {
+        "seconds": time.perf_counter() - start,
+        "calls": completions.calls - calls,
+        "prompt_tokens": completions.prompt_tokens - prompt,
+        "completion_tokens": completions.completion_tokens - completion,
+    }
+
+
+def report(label: str, samples: list):
+    mean = lambda key: statistics.fmean(sample[key] for sample in samples)
+    print(f"   {label:<34} {mean('seconds') * 1000:8.1f}ms  {mean('calls'):4.1f} chamadas  "
+          f"entrada {mean('prompt_tokens'):6.0f} tokens  saída {mean('completion_tokens'):6.0f} tokens")
+
+
+async def main(repeats: int, time_scale: float):
+    logging.getLogger("mytrip").setLevel(logging.WARNING)
+    client = stub_client(time_scale=time_scale)
+    openai_service.router = ProviderRouter(
+        [ProviderBackend("stub", client, "stub-model")],
+        concurrency=openai_service._semaphore
+    )
+    openai_service.day_cache = DayCache(max_pools=0)
+    print(f"🔍 Provider simulado (escala de tempo {time_scale}), {repeats} repetições")
+    results = {key: [] for key in ("full9", "extend", "full7", "regenerate")}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as api:
+            for i in range(repeats):
+                trip = lambda days, tag: {"region": "Lisboa", "duration_days": days, "interests": [f"edit-{tag}-{i}"]}
+                created = await api.post("/api/v1/trips", json=trip(7, "base"))
+                trip_id = created.json()["id"]
+                results["full9"].append(await measure(client, lambda: api.post("/api/v1/trips", json=trip(9, "full9"))))
+                results["extend"].append(await measure(client, lambda: api.post(f"/api/v1/trips/{trip_id}/extend", json={"days": 2})))
+                results["full7"].append(await measure(client, lambda: api.post("/api/v1/trips", json=trip(7, "full7"))))
+                results["regenerate"].append(await measure(client, lambda: api.post(f"/api/v1/trips/{trip_id}/days/4/regenerate")))
+    print(" + 2 dias a uma viagem de 7")
+    report("gerar de novo (POST /trips, 9 dias)", results["full9"])
+    report("POST /trips/{id}/extend", results["extend"])
+    print(" trocar 1 dia de uma viagem de 7")
+    report("gerar de novo (POST /trips, 7 dias)", results["full7"])
+    report("POST /trips/{id}/days/4/regenerate", results["regenerate"])
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    ))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Visualizações repetidas de um roteiro (GET /api/v1/trips/{id}): serializar a cada pedido
+vs corpo pré-serializado, com gzip/brotli e revalidação com ETag (304).
+
+Guarda roteiros de 14 dias e mede, para cada modo, pedidos/s, latência p50
+e bytes enviados por resposta:
+  - corpo fora da cache: ler do armazenamento, serializar e comprimir (1.ª leitura)
+  - corpo pré-serializado sem compressão, com gzip e com brotli
+  - revalidação com If-None-Match (304 sem corpo)
+
+Uso: python -m benchmarks.trip_get [pedidos] [roteiros]
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+from app.models.trip import TripResponse
+from app.services.body_cache import trip_bodies
+from app.services.mock_itinerary import mock_itinerary_json
+from app.services.trip_store import trip_store
+
+MODES = [
+    ("corpo fora da cache (1.ª leitura)", {"accept-encoding": "identity"}, False),
+    ("pré-serializado, sem compressão", {"accept-encoding": "identity"}, True),
+    ("pré-serializado, gzip", {"accept-encoding": "gzip"}, True),
+    ("pré-serializado, brotli", {"accept-encoding": "gzip, deflate, br"}, True),
+    ("revalidação If-None-Match (304)", {"accept-encoding": "gzip, deflate, br"}, True),
+]
+
+
+async def main(requests: int, trips: int):
+    ids = []
+    for i in range(trips):
+        trip = TripResponse(region="Lisboa", duration_days=14, **json.loads(mock_itinerary_json("Lisboa", 14)))
+        ids.append((await trip_store.insert(trip)).id)
+    transport = httpx.ASGITransport(app=app)
+    # Bytes tal como seguem na rede (sem descomprimir no cliente)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etags = {}
+        for trip_id in ids:
+            # A ETag depende da compressão: pedir com os cabeçalhos da revalidação
+            etags[trip_id] = (await client.get(f"/api/v1/trips/{trip_id}", headers=MODES[-1][1])).headers["etag"]
+        print(f"🔍 {requests} GET de {trips} roteiros de 14 dias")
+        for label, headers, cached in MODES:
+            latencies = []
+            sizes = []
+            revalidate = "If-None-Match" in label
+            for i in range(requests):
+                trip_id = ids[i % len(ids)]
+                if not cached:
+                    trip_bodies.clear()
+                request_headers = dict(headers, **({"if-none-match": etags[trip_id]} if revalidate else {}))
+                start = time.perf_counter()
+                async with client.stream("GET", f"/api/v1/trips/{trip_id}", headers=request_headers) as response:
+                    raw = b"".join([chunk async for chunk in response.aiter_raw()])
+                latencies.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(raw))
+                assert response.status_code == (304 if revalidate else 200)
+            elapsed = sum(latencies) / 1000
+            print(f"   {label:<34} {requests / elapsed:8.0f} pedidos/s  p50 {statistics.median(latencies):6.3f}ms  "
+                  f"{statistics.fmean(sizes):8.0f} bytes/resposta")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ))
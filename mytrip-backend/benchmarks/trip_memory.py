@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Memória por roteiro guardado: modelos pydantic vs blobs comprimidos, e latência de leitura.
+
+Para viagens de 3, 14 e 30 dias (roteiros do mock, de regiões
+diferentes), guarda N roteiros como modelos (o que o armazenamento em
+memória fazia) e no InMemoryTripStore (blobs JSON + zlib com o dicionário
+do catálogo), mede a memória alocada por roteiro com tracemalloc e os
+tempos de `insert` (comprimir) e de `get` (descomprimir + validar).
+
+Uso: python -m benchmarks.trip_memory [roteiros]
+"""
+import asyncio
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+
+from app.models.trip import TripResponse
+from app.services.catalog import catalog
+from app.services.mock_itinerary import mock_itinerary_json
+from app.services.trip_store import InMemoryTripStore
+
+
+def trips_json(n: int, days: int) -> list:
+    """JSON de `n` roteiros guardados (cada um lido com as suas próprias strings)"""
+    regions = list(catalog.regions)
+    raws = []
+    for i in range(n):
+        region = regions[i % len(regions)]
+        itinerary = mock_itinerary_json(region, days)
+        raws.append(f'{{"id": "trip_{i}", "region": "{region}", "duration_days": {days}, {itinerary[1:]}')
+    return raws
+
+
+async def allocated(build) -> int:
+    """Bytes alocados (e ainda vivos) por `build`"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = await build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+async def main(n: int):
+    print(f"🔍 {n} roteiros por duração")
+    for days in (3, 14, 30):
+        raws = trips_json(n, days)
+
+        async def as_models():
+            return [TripResponse.model_validate_json(raw) for raw in raws]
+        models_bytes = await allocated(as_models)
+
+        trips = await as_models()
+        store = InMemoryTripStore()
+        store.codec.dictionary
+
+        async def as_blobs():
+            for trip in trips:
+                await store.insert(trip)
+            return store
+        store_bytes = await allocated(as_blobs)
+
+        inserts = []
+        for trip in trips:
+            start = time.perf_counter()
+            await store.update(trip)
+            inserts.append((time.perf_counter() - start) * 1e6)
+        gets = []
+        for trip in trips:
+            start = time.perf_counter()
+            decoded = await store.get(trip.id)
+            gets.append((time.perf_counter() - start) * 1e6)
+            assert decoded == trip
+        print(f"   {days:2d} dias: modelos {models_bytes / n / 1024:6.1f} KB/roteiro  "
+              f"blobs {store_bytes / n / 1024:5.1f} KB/roteiro ({models_bytes / store_bytes:4.1f}x menos; "
+              f"blob {store.stored_bytes / n / 1024:4.1f} KB de {sum(map(len, raws)) / n / 1024:5.1f} KB de JSON)  "
+              f"guardar p50 {statistics.median(inserts):5.0f}µs  get p50 {statistics.median(gets):5.0f}µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
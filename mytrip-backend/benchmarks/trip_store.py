@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark de insert/get/delete no armazenamento de roteiros.
+
+Uso: python -m benchmarks.trip_store [N] [memory|mongo]
+(mongo usa MONGODB_URL/DATABASE_NAME; use uma base de dados descartável)
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from app.models.trip import TripResponse
+from app.services.openai_service import openai_service
+from app.services.trip_store import InMemoryTripStore, MongoTripStore
+
+
+def report(label: str, n: int, elapsed: float):
+    print(f"   {label:<7} {n / elapsed:>12,.0f} ops/s  ({elapsed * 1e6 / n:.2f} µs/op)")
+
+
+async def main(n: int, backend: str):
+    if backend == "mongo":
+        store = MongoTripStore(
+            url=os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+            database=os.getenv("DATABASE_NAME", "mytrip_bench")
+        )
+        await store.collection.drop()
+        await store.initialize()
+    else:
+        store = InMemoryTripStore()
+
+    data = json.loads(openai_service._generate_mock_response("Porto", 3))
+    template = TripResponse(region="Porto", duration_days=3, **data)
+
+    print(f"🔍 {n:,} roteiros no backend '{backend}'...")
+    ids = []
+    start = time.perf_counter()
+    for _ in range(n):
+        trip = await store.insert(template.model_copy())
+        ids.append(trip.id)
+    report("insert", n, time.perf_counter() - start)
+
+    random.shuffle(ids)
+    start = time.perf_counter()
+    for trip_id in ids:
+        await store.get(trip_id)
+    report("get", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for trip_id in ids:
+        await store.delete(trip_id)
+    report("delete", n, time.perf_counter() - start)
+
+    assert await store.count() == 0
+    assert len(set(ids)) == n, "ids repetidos!"
+    await store.close()
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    asyncio.run(main(total, sys.argv[2] if len(sys.argv) > 2 else "memory"))
@@ -48,9 +48,9 @@ async def test_api():
             # Teste 4: Listar roteiros
             print("🔍 Listando todos os roteiros...")
             response = await client.get(f"{BASE_URL}/api/v1/trips")
-            trips = response.json()
+            trips = response.json()["trips"]
             print(f"✅ Status: {response.status_code}")
-            print(f"   Total de roteiros: {len(trips)}\n")
+            print(f"   Roteiros na primeira página: {len(trips)}\n")
             
             # Teste 5: Obter roteiro específico
             trip_id = trip['id']